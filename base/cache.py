@@ -0,0 +1,150 @@
+import hashlib
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from base.models import post_soft_delete
+
+GENERATION_KEY = "generation:{}"
+RESULT_KEY = "result:{}"
+METRICS_KEY = "result-cache:{}:{}"
+# skip: resposta calculada mas não guardada (grande demais ou não JSON)
+OUTCOMES = ("hit", "miss", "skip")
+
+# Escopos dos ResultCacheMixin declarados, para o relatório de métricas
+RESULT_CACHE_SCOPES = set()
+
+
+def generation_key(model) -> str:
+    return GENERATION_KEY.format(model._meta.label_lower)
+
+
+def get_generations(models) -> list:
+    """
+    Geração atual de cada modelo, lidas em uma única chamada ao cache. Uma
+    geração ausente (primeiro uso ou descartada pelo cache) começa no horário
+    atual em nanossegundos, para nunca repetir um valor já usado em chaves.
+    """
+    keys = [generation_key(model) for model in models]
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            cache.add(key, time.time_ns(), timeout=None)
+            values[key] = cache.get(key)
+    return [values[key] for key in keys]
+
+
+def bump_generation(model):
+    try:
+        cache.incr(generation_key(model))
+    except ValueError:
+        cache.add(generation_key(model), time.time_ns(), timeout=None)
+
+
+def bump_generation_on_commit(model, using=None):
+    # Antes do commit outra requisição ainda leria os dados antigos e os
+    # gravaria sob a geração nova
+    transaction.on_commit(partial(bump_generation, model), using=using)
+
+
+def _bump_sender(sender, using=None, **kwargs):
+    bump_generation_on_commit(sender, using=using)
+
+
+def track_generations(*models):
+    """
+    Incrementa a geração dos modelos em cada escrita feita pelo ORM: save,
+    delete, exclusão lógica e alterações em relações ManyToMany (que contam
+    para os dois lados). update() e bulk_create() não disparam sinais e ficam
+    a cargo do GenerationQuerySetMixin.
+    """
+    for model in models:
+        post_save.connect(_bump_sender, sender=model, weak=False)
+        post_delete.connect(_bump_sender, sender=model, weak=False)
+        post_soft_delete.connect(_bump_sender, sender=model, weak=False)
+        for field in model._meta.local_many_to_many:
+
+            def bump_m2m(sender, using=None, model=model, field=field, **kwargs):
+                bump_generation_on_commit(model, using=using)
+                bump_generation_on_commit(field.related_model, using=using)
+
+            m2m_changed.connect(bump_m2m, sender=field.remote_field.through, weak=False)
+
+
+class GenerationQuerySetMixin:
+    """Escritas em lote do QuerySet também incrementam a geração do modelo."""
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        bump_generation_on_commit(self.model, using=self.db)
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        bump_generation_on_commit(self.model, using=self.db)
+        return objs
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        rows = super().bulk_update(objs, fields, batch_size=batch_size)
+        bump_generation_on_commit(self.model, using=self.db)
+        return rows
+
+
+def result_cache_key(parts) -> str:
+    digest = hashlib.sha256(repr(parts).encode()).hexdigest()
+    return RESULT_KEY.format(digest)
+
+
+def get_result(key):
+    return caches[settings.RESULT_CACHE_ALIAS].get(key)
+
+
+def set_result(key, content: bytes) -> bool:
+    """Guarda o conteúdo se couber em RESULT_CACHE_MAX_ENTRY_BYTES."""
+    if len(content) > settings.RESULT_CACHE_MAX_ENTRY_BYTES:
+        return False
+    caches[settings.RESULT_CACHE_ALIAS].set(
+        key, content, timeout=settings.RESULT_CACHE_TIMEOUT
+    )
+    return True
+
+
+def record_result_cache(scope: str, outcome: str):
+    key = METRICS_KEY.format(scope, outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def result_cache_stats() -> dict:
+    keys = {
+        (scope, outcome): METRICS_KEY.format(scope, outcome)
+        for scope in RESULT_CACHE_SCOPES
+        for outcome in OUTCOMES
+    }
+    values = cache.get_many(keys.values())
+    stats = {}
+    for scope in sorted(RESULT_CACHE_SCOPES):
+        counts = {outcome: values.get(keys[scope, outcome], 0) for outcome in OUTCOMES}
+        lookups = sum(counts.values())
+        stats[scope] = {
+            **counts,
+            "hit_ratio": round(counts["hit"] / lookups, 4) if lookups else None,
+        }
+    return stats
+
+
+def reset_result_cache_stats():
+    cache.delete_many(
+        [
+            METRICS_KEY.format(scope, outcome)
+            for scope in RESULT_CACHE_SCOPES
+            for outcome in OUTCOMES
+        ]
+    )
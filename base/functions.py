@@ -0,0 +1,28 @@
+from django.db import models
+
+
+class WidthBucket(models.Func):
+    """WIDTH_BUCKET(valor, mínimo, máximo, quantidade) do PostgreSQL."""
+
+    function = "WIDTH_BUCKET"
+    output_field = models.IntegerField()
+
+    def __init__(self, expression, minimo, maximo, quantidade, **extra):
+        super().__init__(
+            expression,
+            models.Value(minimo),
+            models.Value(maximo),
+            models.Value(quantidade),
+            **extra,
+        )
+
+
+class PercentileCont(models.Aggregate):
+    """PERCENTILE_CONT(p) WITHIN GROUP (ORDER BY valor) do PostgreSQL."""
+
+    function = "PERCENTILE_CONT"
+    template = "%(function)s(%(percentil)s) WITHIN GROUP (ORDER BY %(expressions)s)"
+    output_field = models.FloatField()
+
+    def __init__(self, expression, percentil: float, **extra):
+        super().__init__(expression, percentil=float(percentil), **extra)
@@ -0,0 +1,20 @@
+from base.routers import client_identity, pin_to_primary
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class ReadYourWritesMiddleware:
+    """
+    Depois de uma escrita o cliente fica preso ao banco primário por
+    READ_YOUR_WRITES_SECONDS, para não ler de uma réplica ainda atrasada.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and response.status_code < 500:
+            # O usuário autenticado pelo DRF é propagado para o HttpRequest
+            pin_to_primary(client_identity(request))
+        return response
@@ -0,0 +1,109 @@
+from django.db import models, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+# Enviado após cada exclusão lógica com `pks` e `excluido_em`, já que
+# pre_delete/post_delete não são disparados
+post_soft_delete = Signal()
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    """
+    QuerySet em que delete() é uma exclusão lógica: preenche excluido_em (e os
+    campos auto_now) com um UPDATE. Relações com on_delete=CASCADE para outros
+    modelos com exclusão lógica são excluídas logicamente da mesma forma.
+    A exclusão física fica em hard_delete().
+    """
+
+    def ativos(self):
+        return self.filter(excluido_em__isnull=True)
+
+    def excluidos(self):
+        return self.filter(excluido_em__isnull=False)
+
+    def delete(self):
+        return self.soft_delete(timezone.now())
+
+    delete.queryset_only = True
+
+    def soft_delete(self, excluido_em):
+        pks = list(self.ativos().order_by().values_list("pk", flat=True))
+        return self.soft_delete_pks(pks, excluido_em)
+
+    def soft_delete_pks(self, pks: list, excluido_em):
+        """Exclui logicamente os registros ativos com os `pks` informados."""
+        model = self.model
+        contagens = {}
+        if not pks:
+            return 0, contagens
+        valores = {
+            field.name: excluido_em
+            for field in model._meta.concrete_fields
+            if getattr(field, "auto_now", False)
+        }
+        with transaction.atomic(using=self.db):
+            total = (
+                model._base_manager.using(self.db)
+                .filter(pk__in=pks, excluido_em__isnull=True)
+                .update(excluido_em=excluido_em, **valores)
+            )
+            if not total:
+                return 0, contagens
+            contagens[model._meta.label] = total
+            for relacao in model._meta.related_objects:
+                if relacao.on_delete is models.CASCADE and issubclass(
+                    relacao.related_model, SoftDeleteModel
+                ):
+                    _, relacionados = (
+                        relacao.related_model._default_manager.using(self.db)
+                        .filter(**{f"{relacao.field.name}__in": pks})
+                        .soft_delete(excluido_em)
+                    )
+                    for label, quantidade in relacionados.items():
+                        contagens[label] = contagens.get(label, 0) + quantidade
+            post_soft_delete.send(
+                sender=model, pks=pks, excluido_em=excluido_em, using=self.db
+            )
+        return sum(contagens.values()), contagens
+
+    def hard_delete(self):
+        return super().delete()
+
+    hard_delete.queryset_only = True
+
+
+class SoftDeleteManager(models.Manager):
+    """Manager que só enxerga registros ativos (excluido_em nulo)."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(excluido_em__isnull=True)
+
+
+class SoftDeleteModel(models.Model):
+    """
+    Modelo com exclusão lógica. O manager padrão deve ser um SoftDeleteManager
+    (só registros ativos) com um SoftDeleteQuerySet; o acesso a todos os
+    registros fica em um segundo manager sem filtro.
+    """
+
+    excluido_em = models.DateTimeField(
+        _("Excluído em"), null=True, blank=True, editable=False
+    )
+
+    class Meta:
+        abstract = True
+
+    def delete(self, using=None, keep_parents=False):
+        excluido_em = timezone.now()
+        resultado = (
+            type(self)
+            ._default_manager.db_manager(using)
+            .all()
+            .soft_delete_pks([self.pk], excluido_em)
+        )
+        self.excluido_em = excluido_em
+        return resultado
+
+    def hard_delete(self, using=None, keep_parents=False):
+        return super().delete(using=using, keep_parents=keep_parents)
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+
+class AddConstraintNotValid(migrations.AddConstraint):
+    """
+    AddConstraint que no PostgreSQL cria a constraint como NOT VALID, o que
+    trava a tabela só por um instante e já vale para as novas escritas, e
+    depois verifica as linhas existentes com VALIDATE CONSTRAINT, que não
+    bloqueia leituras nem escritas. Nos outros bancos é um AddConstraint comum.
+    Deve ser usada em migrações com atomic = False, para que o VALIDATE rode
+    fora da transação do ADD. Pode ser reaplicada se o VALIDATE falhar.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        table = schema_editor.quote_name(model._meta.db_table)
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_constraint WHERE conrelid = %s::regclass "
+                "AND conname = %s",
+                [model._meta.db_table, self.constraint.name],
+            )
+            exists = cursor.fetchone() is not None
+        if not exists:
+            schema_editor.execute(
+                f"ALTER TABLE {table} ADD "
+                f"{self.constraint.constraint_sql(model, schema_editor)} NOT VALID"
+            )
+        schema_editor.execute(
+            f"ALTER TABLE {table} VALIDATE CONSTRAINT "
+            f"{schema_editor.quote_name(self.constraint.name)}"
+        )
+
+    def describe(self):
+        return f"{super().describe()} (NOT VALID + VALIDATE)"
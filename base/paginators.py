@@ -0,0 +1,44 @@
+import json
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+
+def estimated_count(queryset: QuerySet) -> int:
+    """
+    Linhas estimadas pelo planner do PostgreSQL para o queryset, a partir das
+    estatísticas atualizadas pelo ANALYZE/autovacuum.
+    """
+    plano = json.loads(queryset.order_by().explain(format="json"))
+    return int(plano[0]["Plan"]["Plan Rows"])
+
+
+def has_default_filters_only(queryset: QuerySet) -> bool:
+    # O filtro do manager padrão (ex: só registros ativos) não conta como filtro
+    default = queryset.model._default_manager.all()
+    return queryset.query.where == default.query.where
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator que, em tabelas grandes e sem filtros, usa a contagem estimada
+    pelo PostgreSQL no lugar de um COUNT(*) que percorre a tabela inteira.
+    Abaixo de `estimate_threshold` linhas (ou com filtros) conta normalmente.
+    """
+
+    estimate_threshold = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if (
+            isinstance(queryset, QuerySet)
+            and connections[queryset.db].vendor == "postgresql"
+            and has_default_filters_only(queryset)
+        ):
+            estimate = estimated_count(queryset)
+            if estimate >= self.estimate_threshold:
+                return estimate
+        return super().count
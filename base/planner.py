@@ -0,0 +1,99 @@
+from rest_framework.serializers import BaseSerializer
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+
+from base.serializers import nested_serializer
+
+
+class QueryPlan:
+    """
+    Joins, prefetches e colunas necessários para serializar um queryset,
+    calculados a partir dos campos que o serializer realmente vai ler.
+    """
+
+    def __init__(self):
+        self.select_related = []
+        self.prefetch_related = []
+        self.only = []
+        # Falso quando algum campo lê algo que não é coluna (property,
+        # SerializerMethodField, source com "."), e então only() não é seguro
+        self.exact = True
+
+    def apply(self, queryset, restrict_columns: bool = False):
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        if restrict_columns and self.exact:
+            queryset = queryset.only(*self.only)
+        return queryset
+
+
+def build_plan(model, serializer, restrict_columns=False, prefix="", plan=None):
+    plan = plan or QueryPlan()
+    opts = model._meta
+    plan.only.append(f"{prefix}{opts.pk.name}")
+
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        source = field.source
+        if source == "*" or "." in source:
+            plan.exact = False
+            continue
+        try:
+            model_field = opts.get_field(source)
+        except FieldDoesNotExist:
+            plan.exact = False
+            continue
+
+        path = f"{prefix}{source}"
+        nested = nested_serializer(field)
+        if model_field.many_to_many or model_field.one_to_many:
+            plan.prefetch_related.append(
+                Prefetch(
+                    path,
+                    queryset=related_queryset(model_field, nested, restrict_columns),
+                )
+            )
+        elif nested is not None:
+            plan.select_related.append(path)
+            if model_field.concrete:
+                plan.only.append(path)
+            build_plan(
+                model_field.related_model,
+                nested,
+                restrict_columns,
+                prefix=f"{path}__",
+                plan=plan,
+            )
+        elif model_field.concrete:
+            plan.only.append(path)
+        else:
+            plan.exact = False
+    return plan
+
+
+def related_queryset(model_field, nested, restrict_columns):
+    related_model = model_field.related_model
+    queryset = related_model._default_manager.all()
+    if isinstance(nested, BaseSerializer):
+        plan = build_plan(related_model, nested, restrict_columns)
+    else:
+        plan = QueryPlan()
+        plan.only.append(related_model._meta.pk.name)
+    if model_field.one_to_many:
+        # O prefetch reverso agrupa os objetos pela chave estrangeira
+        plan.only.append(model_field.field.name)
+    return plan.apply(queryset, restrict_columns)
+
+
+def plan_queryset(queryset, serializer, restrict_columns: bool = False):
+    """
+    Aplica ao queryset apenas os select_related/prefetch_related usados pelo
+    serializer e, com restrict_columns, only() com as colunas serializadas.
+    """
+    serializer = nested_serializer(serializer)
+    plan = build_plan(queryset.model, serializer, restrict_columns)
+    return plan.apply(queryset, restrict_columns)
@@ -0,0 +1,32 @@
+import hashlib
+import re
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w\"])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|\?")
+_IN_LIST = re.compile(r"\bIN \((?:\?, )*\?\)", re.IGNORECASE)
+_VALUES_LIST = re.compile(r"\bVALUES (?:\((?:\?, )*\?\)(?:, )?)+", re.IGNORECASE)
+_SAVEPOINT = re.compile(
+    r"\b(SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT) \"?\w+\"?"
+)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Normaliza uma instrução SQL no seu "formato": literais e parâmetros viram
+    "?", listas de IN/VALUES são colapsadas e nomes de savepoint são removidos,
+    para que a mesma consulta com valores diferentes gere o mesmo texto.
+    """
+    sql = _WHITESPACE.sub(" ", sql).strip()
+    sql = _SAVEPOINT.sub(r"\1 ?", sql)
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _IN_LIST.sub("IN (...)", sql)
+    sql = _VALUES_LIST.sub("VALUES (...)", sql)
+    return sql
+
+
+def fingerprint_sql(sql: str) -> str:
+    return hashlib.sha1(normalize_sql(sql).encode()).hexdigest()[:16]
@@ -0,0 +1,171 @@
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+PIN_CACHE_KEY = "read-your-writes:{}"
+
+
+class ReplicaReadState:
+    def __init__(self):
+        self.escreveu = False
+
+
+_replica_state = ContextVar("replica_state", default=None)
+
+
+@contextmanager
+def replica_reads():
+    """
+    Envia as leituras feitas dentro do bloco para uma réplica. Depois da
+    primeira escrita no bloco as leituras voltam para o primário.
+    """
+    token = _replica_state.set(ReplicaReadState())
+    try:
+        yield
+    finally:
+        _replica_state.reset(token)
+
+
+def client_identity(request) -> str:
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    return f"ip:{request.META.get('REMOTE_ADDR')}"
+
+
+def pin_to_primary(identidade: str):
+    cache.set(
+        PIN_CACHE_KEY.format(identidade),
+        True,
+        timeout=settings.READ_YOUR_WRITES_SECONDS,
+    )
+
+
+def is_pinned_to_primary(identidade: str) -> bool:
+    return bool(cache.get(PIN_CACHE_KEY.format(identidade)))
+
+
+def check_replica_pin_cache(app_configs=None, **kwargs) -> list:
+    """
+    System check: o pin de read-your-writes fica no cache default. Se ele for
+    local do processo, a escrita atendida por um worker não fixa no primário
+    as leituras atendidas pelos outros, então as réplicas não são habilitadas.
+    """
+    if not settings.DATABASE_REPLICAS:
+        return []
+    if isinstance(caches["default"], (LocMemCache, DummyCache)):
+        return [
+            Error(
+                "DATABASE_REPLICAS exige um cache default compartilhado entre "
+                "os processos para o read-your-writes",
+                hint="Defina REDIS_URL",
+                id="base.E003",
+            )
+        ]
+    return []
+
+
+class ReplicaHealth:
+    """
+    Guarda por processo o resultado da última verificação de cada réplica, que
+    só é refeita depois de REPLICA_HEALTH_CHECK_SECONDS.
+    """
+
+    def __init__(self):
+        self._status = {}
+        self._lock = threading.Lock()
+
+    def is_healthy(self, alias: str) -> bool:
+        agora = time.monotonic()
+        with self._lock:
+            saudavel, verificado_em = self._status.get(alias, (True, None))
+        if (
+            verificado_em is not None
+            and agora - verificado_em < settings.REPLICA_HEALTH_CHECK_SECONDS
+        ):
+            return saudavel
+        saudavel = self.check(alias)
+        with self._lock:
+            self._status[alias] = (saudavel, agora)
+        return saudavel
+
+    def check(self, alias: str) -> bool:
+        try:
+            connection = connections[alias]
+            with connection.cursor() as cursor:
+                if connection.vendor == "postgresql":
+                    cursor.execute(
+                        "SELECT COALESCE(EXTRACT(EPOCH FROM "
+                        "now() - pg_last_xact_replay_timestamp()), 0)"
+                    )
+                    atraso = cursor.fetchone()[0]
+                    if atraso > settings.REPLICA_MAX_LAG_SECONDS:
+                        logger.warning("Réplica %s atrasada em %ss", alias, atraso)
+                        return False
+                else:
+                    cursor.execute("SELECT 1")
+        except DatabaseError:
+            logger.warning("Réplica %s indisponível", alias, exc_info=True)
+            return False
+        return True
+
+
+replica_health = ReplicaHealth()
+
+
+def choose_replica():
+    replicas = [
+        (alias, peso)
+        for alias, peso in settings.DATABASE_REPLICAS.items()
+        if peso > 0 and replica_health.is_healthy(alias)
+    ]
+    if not replicas:
+        return None
+    aliases, pesos = zip(*replicas)
+    return random.choices(aliases, weights=pesos)[0]
+
+
+class ReplicaRouter:
+    """
+    Escritas vão sempre para o primário. Leituras só vão para uma réplica
+    dentro de replica_reads() e enquanto o bloco não tiver escrito nada.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _replica_state.get()
+        if state is None or state.escreveu or not settings.DATABASE_REPLICAS:
+            return None
+        # Relacionamentos de um objeto lido de uma réplica usam a mesma réplica
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db in settings.DATABASE_REPLICAS:
+            return instance._state.db
+        return choose_replica()
+
+    def db_for_write(self, model, **hints):
+        state = _replica_state.get()
+        if state is not None:
+            state.escreveu = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
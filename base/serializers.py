@@ -1,4 +1,170 @@
+from itertools import count
+
 from rest_framework import serializers
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.utils.field_mapping import get_unique_error_message
+from rest_framework.validators import UniqueValidator
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import models
+
+
+def parse_fieldset(value: str) -> dict:
+    """
+    Converte a lista de campos recebida na query string em uma árvore.
+    Ex: "id,fazenda.nome" -> {"id": {}, "fazenda": {"nome": {}}}
+    """
+    tree = {}
+    for path in value.split(","):
+        path = path.strip()
+        if not path:
+            continue
+        node = tree
+        for name in path.split("."):
+            node = node.setdefault(name, {})
+    return tree
+
+
+def _as_tree(fields) -> dict:
+    if isinstance(fields, dict):
+        return fields
+    return {name: {} for name in fields}
+
+
+def nested_serializer(field):
+    """Serializer aninhado de um campo (ou do filho, quando many=True)."""
+    if isinstance(field, serializers.ListSerializer):
+        field = field.child
+    if isinstance(field, serializers.BaseSerializer):
+        return field
+    return None
+
+
+class InBulkLookup:
+    """
+    Substitui o queryset de um PrimaryKeyRelatedField por objetos já carregados
+    (ex: com in_bulk), para validar muitos registros sem uma consulta por id.
+    """
+
+    def __init__(self, model, objetos: dict):
+        self.model = model
+        self.objetos = objetos
+
+    def get(self, pk):
+        try:
+            pk = self.model._meta.pk.to_python(pk)
+        except DjangoValidationError:
+            raise ValueError(pk)
+        try:
+            return self.objetos[pk]
+        except KeyError:
+            raise self.model.DoesNotExist
+
+    def all(self):
+        return self
+
+
+class UniqueBatchListSerializer(serializers.ListSerializer):
+    """
+    ListSerializer (many=True) que verifica a unicidade para a lista inteira.
+    Os UniqueValidator dos campos do filho, que fariam uma consulta por campo
+    e por registro, são substituídos por uma consulta IN por campo a cada
+    `unique_chunk_size` valores. Valores repetidos na própria lista são
+    reportados a partir da segunda ocorrência, com a mesma mensagem.
+
+    Para verificar repetições entre várias listas (ex: lotes de um arquivo),
+    compartilhe o mesmo dicionário em `seen_values`.
+    Ex: Meta.list_serializer_class = UniqueBatchListSerializer
+    """
+
+    unique_chunk_size = 1000
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.seen_values = {}
+        self._unique_validators = None
+
+    def pop_unique_validators(self) -> dict:
+        if self._unique_validators is None:
+            self._unique_validators = {}
+            for field_name, field in self.child.fields.items():
+                if field.read_only or len(field.source_attrs) != 1:
+                    continue
+                for validator in field.validators:
+                    if isinstance(validator, UniqueValidator) and (
+                        validator.lookup == "exact"
+                    ):
+                        self._unique_validators[field_name] = (field, validator)
+                        field.validators = [
+                            other
+                            for other in field.validators
+                            if other is not validator
+                        ]
+                        break
+        return self._unique_validators
+
+    def to_internal_value(self, data):
+        # Atualizações em lote mantêm a validação por registro, que exclui a
+        # própria instância da consulta
+        if self.instance is not None or not self.pop_unique_validators():
+            return super().to_internal_value(data)
+
+        positions = count()
+        validated = {}
+        run_validation = self.child.run_validation
+
+        def run_child_validation(item):
+            position = next(positions)
+            validated[position] = run_validation(item)
+            return validated[position]
+
+        self.child.run_validation = run_child_validation
+        try:
+            ret = super().to_internal_value(data)
+            errors = [{} for _ in ret]
+        except serializers.ValidationError as exc:
+            if not isinstance(exc.detail, list):
+                raise
+            ret, errors = None, exc.detail
+        finally:
+            del self.child.run_validation
+
+        unique_errors = self.find_unique_errors(validated)
+        for position, error in unique_errors.items():
+            errors[position] = error
+        if ret is None or unique_errors:
+            raise serializers.ValidationError(errors)
+        return ret
+
+    def find_unique_errors(self, validated: dict) -> dict:
+        errors = {}
+        for field_name, (field, validator) in self._unique_validators.items():
+            source = field.source_attrs[0]
+            values = {
+                position: item[source]
+                for position, item in validated.items()
+                if item.get(source) not in (None, "")
+            }
+            distinct = list(dict.fromkeys(values.values()))
+            existing = set()
+            for start in range(0, len(distinct), self.unique_chunk_size):
+                existing.update(
+                    validator.queryset.filter(
+                        **{
+                            f"{source}__in": distinct[
+                                start : start + self.unique_chunk_size
+                            ]
+                        }
+                    ).values_list(source, flat=True)
+                )
+            seen = self.seen_values.setdefault(field_name, set())
+            for position in sorted(values):
+                if values[position] in existing or values[position] in seen:
+                    errors.setdefault(position, {})[field_name] = [
+                        ErrorDetail(validator.message, code="unique")
+                    ]
+                seen.add(values[position])
+        return errors
 
 
 class BaseModelSerializer(serializers.ModelSerializer):
@@ -6,20 +172,109 @@ class BaseModelSerializer(serializers.ModelSerializer):
     Serializador personalizado para especificar quais campos ou quais campos
     não devem ser incluídos no retorno do serializer
     Ex: serializer = ProdutorSerializer(fields=["nome", "cnpj"])
+
+    Também aceita árvores de campos para serializers aninhados
+    Ex: serializer = ProdutorSerializer(fields={"nome": {}, "fazenda": {"nome": {}}})
+
+    Relações listadas em expandable_fields são serializadas como id, a não ser
+    que sejam expandidas com o serializer correspondente
+    Ex: serializer = FazendaSerializer(expand={"cidade": {"estado": {}}})
     """
 
+    expandable_fields = {}
+
     def __init__(self, *args, **kwargs):
+        expand = kwargs.pop("expand", None)
         fields = kwargs.pop("fields", None)
         exclude_fields = kwargs.pop("exclude_fields", None)
         super().__init__(*args, **kwargs)
 
-        if fields:
-            allowed = set(fields)
-            existing = set(self.fields.keys())
-            for field_name in existing - allowed:
-                self.fields.pop(field_name)
+        if expand:
+            self.expand_fields(_as_tree(expand))
 
+        if fields:
+            self.restrict_fields(_as_tree(fields))
         elif exclude_fields:
-            not_allowed = set(exclude_fields)
-            for field_name in not_allowed:
+            self.remove_fields(_as_tree(exclude_fields))
+
+    def build_standard_field(self, field_name, model_field):
+        field_class, field_kwargs = super().build_standard_field(
+            field_name, model_field
+        )
+        # O DRF só valida unique=True; UniqueConstraint de um único campo com
+        # condição (ex: só registros ativos) recebe o mesmo UniqueValidator,
+        # restrito às linhas cobertas pela condição
+        for constraint in self.Meta.model._meta.constraints:
+            if (
+                isinstance(constraint, models.UniqueConstraint)
+                and constraint.condition is not None
+                and list(constraint.fields) == [model_field.name]
+            ):
+                field_kwargs.setdefault("validators", []).append(
+                    UniqueValidator(
+                        queryset=self.Meta.model._default_manager.filter(
+                            constraint.condition
+                        ),
+                        message=get_unique_error_message(model_field),
+                    )
+                )
+        return field_class, field_kwargs
+
+    def expand_fields(self, tree: dict):
+        for field_name, subtree in tree.items():
+            if field_name in self.expandable_fields:
+                source = self.fields[field_name].source
+                model_field = self.Meta.model._meta.get_field(source)
+                self.fields[field_name] = self.expandable_fields[field_name](
+                    source=None if source == field_name else source,
+                    many=model_field.many_to_many or model_field.one_to_many,
+                    read_only=True,
+                    expand=subtree,
+                )
+            else:
+                nested_serializer(self.fields[field_name]).expand_fields(subtree)
+
+    def unknown_expansions(self, tree: dict, prefix: str = "") -> list:
+        unknown = []
+        for field_name, subtree in tree.items():
+            path = f"{prefix}{field_name}"
+            if field_name in self.expandable_fields:
+                nested = self.expandable_fields[field_name]()
+            elif subtree and field_name in self.fields:
+                nested = nested_serializer(self.fields[field_name])
+            else:
+                nested = None
+            if not isinstance(nested, BaseModelSerializer):
+                unknown.append(path)
+            elif subtree:
+                unknown.extend(nested.unknown_expansions(subtree, f"{path}."))
+        return unknown
+
+    def restrict_fields(self, tree: dict):
+        for field_name in set(self.fields.keys()) - set(tree):
+            self.fields.pop(field_name)
+        for field_name, subtree in tree.items():
+            if subtree:
+                nested_serializer(self.fields[field_name]).restrict_fields(subtree)
+
+    def remove_fields(self, tree: dict):
+        for field_name, subtree in tree.items():
+            if subtree:
+                nested_serializer(self.fields[field_name]).remove_fields(subtree)
+            else:
                 self.fields.pop(field_name)
+
+    def unknown_fields(self, tree: dict, prefix: str = "") -> list:
+        unknown = []
+        for field_name, subtree in tree.items():
+            path = f"{prefix}{field_name}"
+            if field_name not in self.fields:
+                unknown.append(path)
+                continue
+            if subtree:
+                nested = nested_serializer(self.fields[field_name])
+                if isinstance(nested, BaseModelSerializer):
+                    unknown.extend(nested.unknown_fields(subtree, f"{path}."))
+                else:
+                    unknown.append(path)
+        return unknown
@@ -0,0 +1,130 @@
+import json
+import os
+from collections import Counter
+from pathlib import Path
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from base.queries import normalize_sql
+
+UPDATE_BASELINES = os.environ.get("QUERY_BASELINE_UPDATE") == "1"
+
+
+class QueryBaselineMixin:
+    """
+    Compara a quantidade e o formato das consultas SQL executadas por um
+    endpoint com uma baseline versionada em JSON. O teste falha quando o número
+    de consultas aumenta ou, com explain=True no PostgreSQL, quando uma consulta
+    passa a fazer Seq Scan em uma tabela que antes era lida por índice. As
+    baselines são gravadas por banco (o SQL gerado muda entre eles) e o teste
+    falha quando não há baseline para o banco em uso.
+
+    Para regravar as baselines: QUERY_BASELINE_UPDATE=1 python manage.py test
+    """
+
+    query_baseline_path: Path = None
+
+    def load_query_baselines(self) -> dict:
+        if self.query_baseline_path.exists():
+            return json.loads(self.query_baseline_path.read_text())
+        return {}
+
+    def save_query_baseline(self, name: str, entry: dict):
+        baselines = self.load_query_baselines()
+        current = baselines.get(name, {})
+        current.pop("queries", None)
+        for key in ("shapes", "plans"):
+            current.setdefault(key, {}).update(entry.get(key, {}))
+        baselines[name] = current
+        self.query_baseline_path.write_text(
+            json.dumps(baselines, indent=2, sort_keys=True, ensure_ascii=False) + "\n"
+        )
+
+    def assertQueryBaseline(self, name: str, func, explain: bool = False):
+        with CaptureQueriesContext(connection) as context:
+            result = func()
+
+        statements = [query["sql"] for query in context.captured_queries]
+        vendor = connection.vendor
+        entry = {"shapes": {vendor: [normalize_sql(sql) for sql in statements]}}
+        if explain and vendor == "postgresql":
+            entry["plans"] = {vendor: self.explain_seq_scans(statements)}
+
+        if UPDATE_BASELINES:
+            self.save_query_baseline(name, entry)
+            return result
+
+        baseline = self.load_query_baselines().get(name)
+        if baseline is None:
+            self.fail(self.missing_baseline_message(name, vendor))
+
+        baseline_shapes = baseline.get("shapes", {}).get(vendor)
+        if baseline_shapes is None:
+            self.fail(self.missing_baseline_message(name, vendor))
+        shapes = entry["shapes"][vendor]
+        if len(shapes) > len(baseline_shapes):
+            self.fail(
+                f"'{name}' executou {len(shapes)} consultas, "
+                f"a baseline permite {len(baseline_shapes)}.\n"
+                + self.format_shape_diff(baseline_shapes, shapes)
+            )
+
+        if "plans" in entry:
+            baseline_plans = baseline.get("plans", {}).get(vendor)
+            if baseline_plans is None:
+                self.fail(self.missing_baseline_message(name, vendor, "planos"))
+            self.assert_no_new_seq_scans(name, baseline_plans, entry["plans"][vendor])
+
+        return result
+
+    def missing_baseline_message(
+        self, name: str, vendor: str, what: str = "consultas"
+    ) -> str:
+        return (
+            f"Sem baseline de {what} para '{name}' no banco '{vendor}'. "
+            "Rode os testes com QUERY_BASELINE_UPDATE=1 nesse banco para gravá-la."
+        )
+
+    def format_shape_diff(self, expected: list, actual: list) -> str:
+        expected_counter, actual_counter = Counter(expected), Counter(actual)
+        lines = []
+        for shape, total in actual_counter.items():
+            extra = total - expected_counter.get(shape, 0)
+            if extra > 0:
+                lines.append(f"  +{extra}x {shape}")
+        for shape, total in expected_counter.items():
+            missing = total - actual_counter.get(shape, 0)
+            if missing > 0:
+                lines.append(f"  -{missing}x {shape}")
+        return "\n".join(lines)
+
+    def explain_seq_scans(self, statements: list) -> dict:
+        plans = {}
+        with connection.cursor() as cursor:
+            for sql in statements:
+                if not sql.lstrip().upper().startswith("SELECT"):
+                    continue
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                plans[normalize_sql(sql)] = sorted(
+                    set(self.collect_seq_scans(plan[0]["Plan"]))
+                )
+        return plans
+
+    def collect_seq_scans(self, node: dict):
+        if node.get("Node Type") == "Seq Scan":
+            yield node["Relation Name"]
+        for child in node.get("Plans", []):
+            yield from self.collect_seq_scans(child)
+
+    def assert_no_new_seq_scans(self, name: str, expected: dict, actual: dict):
+        for shape, relations in actual.items():
+            new_scans = set(relations) - set(expected.get(shape, []))
+            if new_scans:
+                self.fail(
+                    f"'{name}' passou a fazer Seq Scan em {sorted(new_scans)}:\n"
+                    f"  {shape}"
+                )
@@ -0,0 +1,311 @@
+import json
+import tempfile
+from pathlib import Path
+from unittest import skipUnless
+from unittest.mock import patch
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.redis import RedisCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from base.queries import normalize_sql
+from base.routers import (
+    ReplicaRouter,
+    check_replica_pin_cache,
+    choose_replica,
+    is_pinned_to_primary,
+    replica_reads,
+)
+from base.testing import QueryBaselineMixin
+from base.throttling import TokenBucket, check_throttle_costs
+from core.api.serializers import ProdutorRuralSerializer
+from core.models import ProdutorRural
+from core.tests.base import BaseCoreTestCase, CoreTestMixin, gerar_cpf
+from users.models import User
+
+
+class NormalizeSqlTestCase(SimpleTestCase):
+    def test_normaliza_literais_e_listas(self):
+        self.assertEqual(
+            normalize_sql(
+                "SELECT * FROM t WHERE a = 'x'  AND b IN (1, 2, 3) AND c = %s"
+            ),
+            "SELECT * FROM t WHERE a = ? AND b IN (...) AND c = ?",
+        )
+
+    def test_normaliza_savepoint(self):
+        self.assertEqual(normalize_sql('SAVEPOINT "s123_x1"'), "SAVEPOINT ?")
+
+
+class QueryBaselineMixinTestCase(QueryBaselineMixin, TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.query_baseline_path = Path(directory.name) / "baselines.json"
+
+    def gravar(self, baseline: dict):
+        self.query_baseline_path.write_text(json.dumps({"consulta": baseline}))
+
+    def consultar(self):
+        return User.objects.count()
+
+    def test_falha_sem_baseline_do_banco_em_uso(self):
+        self.gravar({"shapes": {"outro": ["SELECT ?"]}})
+
+        with self.assertRaisesMessage(
+            AssertionError, f"no banco '{connection.vendor}'"
+        ):
+            self.assertQueryBaseline("consulta", self.consultar)
+
+    def test_falha_sem_planos_do_banco_em_uso(self):
+        with patch.object(self, "explain_seq_scans", return_value={}):
+            with patch.object(connection, "vendor", "postgresql"):
+                self.gravar({"shapes": {"postgresql": ["SELECT ?"]}, "plans": {}})
+                with self.assertRaisesMessage(AssertionError, "Sem baseline de planos"):
+                    self.assertQueryBaseline("consulta", self.consultar, explain=True)
+
+    def test_falha_com_mais_consultas_que_a_baseline(self):
+        self.gravar({"shapes": {connection.vendor: []}})
+
+        with self.assertRaisesMessage(AssertionError, "a baseline permite 0"):
+            self.assertQueryBaseline("consulta", self.consultar)
+
+
+@override_settings(DATABASE_REPLICAS={"replica_1": 1, "replica_2": 3})
+class ReplicaRouterTestCase(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        patcher = patch("base.routers.replica_health.is_healthy", return_value=True)
+        self.is_healthy = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_leitura_fora_do_contexto_vai_para_o_primario(self):
+        self.assertIsNone(self.router.db_for_read(ProdutorRural))
+
+    def test_leitura_no_contexto_vai_para_replica_por_peso(self):
+        with replica_reads(), patch("base.routers.random.choices") as choices:
+            choices.return_value = ["replica_2"]
+            self.assertEqual(self.router.db_for_read(ProdutorRural), "replica_2")
+        choices.assert_called_once_with(("replica_1", "replica_2"), weights=(1, 3))
+
+    def test_replica_indisponivel_e_ignorada(self):
+        self.is_healthy.side_effect = lambda alias: alias == "replica_1"
+        self.assertEqual(choose_replica(), "replica_1")
+
+        self.is_healthy.side_effect = lambda alias: False
+        self.assertIsNone(choose_replica())
+
+    def test_leitura_depois_de_escrita_vai_para_o_primario(self):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_write(ProdutorRural), DEFAULT_DB_ALIAS)
+            self.assertIsNone(self.router.db_for_read(ProdutorRural))
+
+    def test_replicas_nao_recebem_migracoes(self):
+        self.assertFalse(self.router.allow_migrate("replica_1", "core"))
+        self.assertIsNone(self.router.allow_migrate(DEFAULT_DB_ALIAS, "core"))
+
+
+class CheckReplicaPinCacheTestCase(SimpleTestCase):
+    def test_sem_replicas(self):
+        with override_settings(DATABASE_REPLICAS={}):
+            self.assertEqual(check_replica_pin_cache(), [])
+
+    @override_settings(DATABASE_REPLICAS={"replica_1": 1})
+    def test_replicas_exigem_cache_compartilhado(self):
+        with override_settings(
+            CACHES={
+                "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+            }
+        ):
+            self.assertEqual(
+                [error.id for error in check_replica_pin_cache()], ["base.E003"]
+            )
+        with override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.redis.RedisCache",
+                    "LOCATION": "redis://localhost:6379/0",
+                }
+            }
+        ):
+            self.assertEqual(check_replica_pin_cache(), [])
+
+
+class ReplicaReadViewTestCase(CoreTestMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="email@email.com", password="x")
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("core:produtor-rural-list")
+
+    @override_settings(DATABASE_REPLICAS={"replica_1": 1})
+    def test_list_le_da_replica_ate_o_cliente_escrever(self):
+        with patch("base.routers.choose_replica", return_value=None) as choose:
+            self.client.get(self.url)
+            self.assertTrue(choose.called)
+
+            self.client.post(self.url, self.create_produtor_rural_data(), format="json")
+            self.assertTrue(is_pinned_to_primary(f"user:{self.user.pk}"))
+
+            choose.reset_mock()
+            self.client.get(self.url)
+            self.assertFalse(choose.called)
+
+
+@skipUnless(settings.DATABASE_REPLICAS, "Nenhuma réplica configurada")
+class LocalReplicaTestCase(TestCase):
+    """
+    Executado quando DATABASE_REPLICA_URLS aponta para aliases locais, ex:
+    DATABASE_REPLICA_URLS=sqlite:///r1.sqlite3,sqlite:///r2.sqlite3
+    """
+
+    databases = "__all__"
+
+    def test_leitura_com_replicas_locais(self):
+        with replica_reads():
+            queryset = ProdutorRural.objects.all()
+            self.assertIn(queryset.db, settings.DATABASE_REPLICAS)
+            self.assertEqual(list(queryset), [])
+        self.assertEqual(ProdutorRural.objects.all().db, DEFAULT_DB_ALIAS)
+
+
+class ReadYourWritesMiddlewareTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_escrita_anonima_fixa_cliente_no_primario(self):
+        self.client.post(reverse("users:token_obtain_pair"), {})
+        self.assertTrue(is_pinned_to_primary("ip:127.0.0.1"))
+
+
+class TokenBucketTestCase(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.bucket = TokenBucket()
+
+    @patch("base.throttling.time.time")
+    def test_consome_e_recarrega(self, time_mock):
+        time_mock.return_value = 1000.0
+        self.assertEqual(self.bucket.consume("teste", 2, 1.0), (True, 0.0))
+        self.assertEqual(self.bucket.consume("teste", 2, 1.0), (True, 0.0))
+        self.assertEqual(self.bucket.consume("teste", 2, 1.0), (False, 1.0))
+
+        time_mock.return_value = 1001.5
+        self.assertEqual(self.bucket.consume("teste", 2, 1.0, cost=1), (True, 0.0))
+        allowed, wait = self.bucket.consume("teste", 2, 1.0, cost=2)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 1.5)
+
+    def test_custo_maior_que_capacidade(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.bucket.consume("teste", 2, 1.0, cost=3)
+
+    @skipUnless(settings.REDIS_URL, "REDIS_URL não configurada")
+    def test_consome_no_redis(self):
+        self.assertIsInstance(cache, RedisCache)
+        cache.delete("teste-redis")
+        self.assertTrue(self.bucket.consume("teste-redis", 1, 0.5)[0])
+        allowed, wait = self.bucket.consume("teste-redis", 1, 0.5)
+        self.assertFalse(allowed)
+        self.assertGreater(wait, 1.9)
+
+
+class CheckThrottleCostsTestCase(SimpleTestCase):
+    def test_configuracao_valida(self):
+        self.assertEqual(check_throttle_costs(), [])
+
+    @override_settings(
+        REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": {
+                **settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"],
+                "dashboard": "2/min",
+            },
+        }
+    )
+    def test_custo_maior_que_capacidade(self):
+        errors = check_throttle_costs()
+
+        self.assertEqual([error.id for error in errors], ["base.E002"])
+        self.assertIn("capacidade 2 do escopo 'dashboard'", errors[0].msg)
+
+
+class TokenBucketThrottleTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="email@email.com", password="x")
+        self.client.force_authenticate(user=self.user)
+
+    @override_settings(
+        REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": {"dashboard": "4/min"},
+        }
+    )
+    def test_limite_por_usuario_com_custo_e_retry_after(self):
+        graphics = reverse("core:fazenda-graphics")
+        distribuicoes = reverse("core:fazenda-distribuicoes")
+
+        self.assertEqual(self.client.get(graphics).status_code, status.HTTP_200_OK)
+        # Custa 3 tokens, esgotando o bucket do usuário
+        self.assertEqual(self.client.get(distribuicoes).status_code, status.HTTP_200_OK)
+        response = self.client.get(graphics)
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "15")
+
+        outro = User.objects.create_user(email="outro@email.com", password="x")
+        self.client.force_authenticate(user=outro)
+        self.assertEqual(self.client.get(graphics).status_code, status.HTTP_200_OK)
+
+
+class UniqueBatchListSerializerTestCase(BaseCoreTestCase):
+    def setUp(self):
+        self.data = self.create_produtor_rural_data()
+
+    def registros(self, quantidade: int) -> list:
+        return [
+            {**self.data, "cpf": gerar_cpf(numero)}
+            for numero in range(123000001, 123000001 + quantidade)
+        ]
+
+    def test_uma_consulta_de_unicidade_por_campo(self):
+        def consultas(registros) -> int:
+            serializer = ProdutorRuralSerializer(data=registros, many=True)
+            with CaptureQueriesContext(connection) as queries:
+                self.assertTrue(serializer.is_valid(), serializer.errors)
+            return sum('"cpf" IN' in query["sql"] for query in queries)
+
+        self.assertEqual(consultas(self.registros(2)), 1)
+        self.assertEqual(consultas(self.registros(10)), 1)
+
+    def test_mesmas_mensagens_do_unique_validator(self):
+        existente = self.create_produtor_rural(cpf=gerar_cpf(123000002))
+        registros = self.registros(3) + [self.registros(1)[0]]
+        esperado = ProdutorRuralSerializer(data={**self.data, "cpf": existente.cpf})
+        esperado.is_valid()
+
+        serializer = ProdutorRuralSerializer(data=registros, many=True)
+
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(
+            serializer.errors,
+            [{}, {"cpf": esperado.errors["cpf"]}, {}, {"cpf": esperado.errors["cpf"]}],
+        )
+
+    def test_erros_de_validacao_e_unicidade_juntos(self):
+        self.create_produtor_rural(cpf=gerar_cpf(123000001))
+        registros = [*self.registros(1), {**self.data, "cpf": "123"}]
+
+        serializer = ProdutorRuralSerializer(data=registros, many=True)
+
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual([set(erro) for erro in serializer.errors], [{"cpf"}, {"cpf"}])
@@ -0,0 +1,203 @@
+import math
+import threading
+import time
+
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from django.core.checks import Error
+from django.core.exceptions import ImproperlyConfigured
+from django.urls import URLResolver, get_resolver
+
+# Recarrega o bucket, consome o custo e calcula a espera em uma única chamada
+# ao Redis. O horário vem do próprio Redis para não depender do relógio de
+# cada worker. Retorna {permitido, segundos_de_espera}.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call("TIME")
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    wait = (cost - tokens) / rate
+end
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "ts", tostring(now))
+redis.call("PEXPIRE", KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(wait)}
+"""
+
+
+class TokenBucket:
+    """
+    Bucket com `capacity` tokens recarregados a `rate` tokens por segundo,
+    guardado no cache compartilhado entre os processos.
+
+    Com o RedisCache a operação é atômica (script Lua, um round trip). Nos
+    demais backends o bucket é atualizado com get/set sob um lock local, o que
+    só é atômico dentro do processo e serve para desenvolvimento e testes.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, cache_alias: str = None):
+        self.cache = caches[cache_alias or settings.THROTTLE_CACHE_ALIAS]
+        self._script = None
+
+    def consume(self, key: str, capacity: int, rate: float, cost: int = 1):
+        """Retorna (permitido, segundos até haver tokens suficientes)."""
+        if cost > capacity:
+            # Verificado na inicialização por check_throttle_costs
+            raise ImproperlyConfigured(
+                f"Custo {cost} maior que a capacidade {capacity} do bucket"
+            )
+        if isinstance(self.cache, RedisCache):
+            return self._consume_redis(key, capacity, rate, cost)
+        return self._consume_local(key, capacity, rate, cost)
+
+    def _consume_redis(self, key, capacity, rate, cost):
+        key = self.cache.make_and_validate_key(key)
+        client = self.cache._cache.get_client(key, write=True)
+        if self._script is None:
+            # EVALSHA com fallback para EVAL na primeira execução
+            self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+        allowed, wait = self._script(
+            keys=[key], args=[capacity, rate, cost], client=client
+        )
+        return bool(allowed), float(wait)
+
+    def _consume_local(self, key, capacity, rate, cost):
+        with self._lock:
+            now = time.time()
+            tokens, ts = self.cache.get(key, (capacity, now))
+            tokens = min(capacity, tokens + max(0.0, now - ts) * rate)
+            allowed = tokens >= cost
+            wait = 0.0
+            if allowed:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / rate
+            self.cache.set(key, (tokens, now), math.ceil(capacity / rate))
+        return allowed, wait
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Throttle por usuário (ou IP, se anônimo) e por endpoint. A view define
+    `throttle_scope` e, opcionalmente, `throttle_cost` (inteiro ou dicionário
+    por método HTTP). A taxa do escopo vem de DEFAULT_THROTTLE_RATES no formato
+    do DRF ("30/min"): até 30 tokens de rajada, recarregados em um minuto.
+    O Retry-After é preenchido pelo DRF a partir de wait().
+    """
+
+    bucket_class = TokenBucket
+    cache_key = "throttle:{scope}:{ident}"
+
+    def __init__(self):
+        self._wait = None
+
+    def get_scope(self, view) -> str:
+        return getattr(view, "throttle_scope", None) or type(view).__name__
+
+    def get_rate(self, scope: str):
+        rates = api_settings.DEFAULT_THROTTLE_RATES
+        if scope not in rates:
+            raise ImproperlyConfigured(
+                f"Defina DEFAULT_THROTTLE_RATES['{scope}'] para o TokenBucketThrottle"
+            )
+        rate = rates[scope]
+        if rate is None:
+            return None
+        num, period = rate.split("/")
+        seconds = {"s": 1, "m": 60, "h": 3600, "d": 86400}[period[0]]
+        return int(num), int(num) / seconds
+
+    def get_cost(self, request, view) -> int:
+        cost = getattr(view, "throttle_cost", 1)
+        if isinstance(cost, dict):
+            return cost.get(request.method, 1)
+        return cost
+
+    @staticmethod
+    def get_costs(view) -> list:
+        cost = getattr(view, "throttle_cost", 1)
+        return list(cost.values()) if isinstance(cost, dict) else [cost]
+
+    def get_ident(self, request):
+        if request.user and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        return f"ip:{super().get_ident(request)}"
+
+    def allow_request(self, request, view) -> bool:
+        scope = self.get_scope(view)
+        rate = self.get_rate(scope)
+        if rate is None:
+            return True
+        capacity, refill = rate
+        key = self.cache_key.format(scope=scope, ident=self.get_ident(request))
+        allowed, self._wait = self.bucket_class().consume(
+            key, capacity, refill, self.get_cost(request, view)
+        )
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+def _iter_views(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _iter_views(pattern.url_patterns)
+        else:
+            yield pattern.callback
+
+
+def check_throttle_costs(app_configs=None, **kwargs) -> list:
+    """
+    System check: um throttle_cost maior que a capacidade do escopo nunca
+    seria atendido, então a configuração é rejeitada na inicialização.
+    """
+    errors = []
+    seen = set()
+    for callback in _iter_views(get_resolver().url_patterns):
+        view_class = getattr(callback, "cls", None)
+        if view_class is None:
+            continue
+        view = view_class(**getattr(callback, "initkwargs", {}))
+        for throttle_class in view.throttle_classes:
+            if not issubclass(throttle_class, TokenBucketThrottle):
+                continue
+            throttle = throttle_class()
+            scope = throttle.get_scope(view)
+            cost = max(throttle.get_costs(view))
+            # Um ViewSet aparece em mais de uma rota
+            if (view_class, scope, cost) in seen:
+                continue
+            seen.add((view_class, scope, cost))
+            try:
+                rate = throttle.get_rate(scope)
+            except ImproperlyConfigured as error:
+                errors.append(Error(str(error), obj=view_class, id="base.E001"))
+                continue
+            if rate is not None and cost > rate[0]:
+                errors.append(
+                    Error(
+                        f"throttle_cost {cost} maior que a capacidade {rate[0]} "
+                        f"do escopo '{scope}'",
+                        hint=f"Aumente DEFAULT_THROTTLE_RATES['{scope}'] ou o custo",
+                        obj=view_class,
+                        id="base.E002",
+                    )
+                )
+    return errors
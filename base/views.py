@@ -0,0 +1,221 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import BasePermission
+
+from django.conf import settings
+from django.http import HttpResponse
+
+from base.cache import (
+    RESULT_CACHE_SCOPES,
+    get_generations,
+    get_result,
+    record_result_cache,
+    result_cache_key,
+    set_result,
+)
+from base.planner import plan_queryset
+from base.routers import client_identity, is_pinned_to_primary, replica_reads
+from base.serializers import parse_fieldset
+
+
+class ReplicaReadMixin:
+    """
+    Mixin para views do DRF que podem ler de réplicas. Em ViewSets apenas as
+    ações de replica_actions usam réplicas; em APIViews, os métodos seguros.
+    """
+
+    replica_actions = ("list", "retrieve")
+
+    def use_replica(self, request) -> bool:
+        action = getattr(self, "action", None)
+        if action is not None:
+            allowed = action in self.replica_actions
+        else:
+            allowed = request.method in ("GET", "HEAD")
+        return allowed and not is_pinned_to_primary(client_identity(request))
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Decidido depois da autenticação para saber quem é o cliente
+        if self.use_replica(request):
+            self._replica_reads = replica_reads()
+            self._replica_reads.__enter__()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        replica_context = getattr(self, "_replica_reads", None)
+        if replica_context is not None:
+            self._replica_reads = None
+            replica_context.__exit__(None, None, None)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ResultCacheMixin:
+    """
+    Mixin para ViewSets que guarda o JSON das ações de result_cache_actions.
+    A chave combina ação, kwargs da URL, query params normalizados, media type,
+    get_result_cache_vary() e a geração de cada modelo de result_cache_models,
+    que é incrementada a cada escrita (base.cache.track_generations e
+    GenerationQuerySetMixin); nada precisa ser apagado ao gravar.
+
+    A busca no cache acontece depois da autenticação, das permissões e do
+    throttling. Views com permissões por objeto não usam o cache no retrieve,
+    e views cujo queryset depende do usuário devem incluí-lo em
+    get_result_cache_vary(). Respostas calculadas no cache leem do primário,
+    já que uma réplica atrasada gravaria dados antigos sob a geração nova.
+    """
+
+    result_cache_actions = ("list", "retrieve")
+    result_cache_models = ()
+    result_cache_scope = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.result_cache_models:
+            RESULT_CACHE_SCOPES.add(cls.get_result_cache_scope())
+
+    @classmethod
+    def get_result_cache_scope(cls) -> str:
+        return cls.result_cache_scope or cls.__name__
+
+    def get_result_cache_vary(self, request) -> str:
+        return ""
+
+    def has_object_permission_checks(self) -> bool:
+        return any(
+            type(permission).has_object_permission
+            is not BasePermission.has_object_permission
+            for permission in self.get_permissions()
+        )
+
+    def use_result_cache(self, request) -> bool:
+        action = getattr(self, "action", None)
+        return (
+            settings.RESULT_CACHE_ENABLED
+            and bool(self.result_cache_models)
+            and action in self.result_cache_actions
+            and request.method == "GET"
+            and getattr(request, "accepted_renderer", None) is not None
+            and request.accepted_renderer.format == "json"
+            and not (action == "retrieve" and self.has_object_permission_checks())
+        )
+
+    def use_replica(self, request) -> bool:
+        return not self.use_result_cache(request) and super().use_replica(request)
+
+    def get_result_cache_key(self, request) -> str:
+        return result_cache_key(
+            (
+                self.get_result_cache_scope(),
+                self.action,
+                sorted(self.kwargs.items()),
+                sorted(
+                    (param, tuple(values))
+                    for param, values in request.query_params.lists()
+                ),
+                request.accepted_media_type,
+                self.get_result_cache_vary(request),
+                get_generations(self.result_cache_models),
+            )
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if not self.use_result_cache(request):
+            return handler(request, *args, **kwargs)
+        scope = self.get_result_cache_scope()
+        renderer = request.accepted_renderer
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f"{content_type}; charset={renderer.charset}"
+
+        key = self.get_result_cache_key(request)
+        content = get_result(key)
+        if content is not None:
+            record_result_cache(scope, "hit")
+            response = HttpResponse(content, content_type=content_type)
+            response["X-Result-Cache"] = "HIT"
+            return response
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            content = renderer.render(
+                response.data,
+                request.accepted_media_type,
+                self.get_renderer_context(),
+            )
+            stored = set_result(key, content)
+            record_result_cache(scope, "miss" if stored else "skip")
+            # Já renderizado: o Response não renderiza o conteúdo de novo
+            response.content = content
+            response["Content-Type"] = content_type
+            response["X-Result-Cache"] = "MISS"
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+
+FIELDSET_PARAMS = (
+    ("expand", "expand"),
+    ("fields", "fields"),
+    ("exclude", "exclude_fields"),
+)
+
+
+class SparseFieldsetMixin:
+    """
+    Mixin para ViewSets que aceitam ?fields=, ?exclude= e ?expand= (com
+    caminhos aninhados, ex: fazenda.nome) nas ações de sparse_fieldset_actions.
+    O queryset é planejado a partir do serializer resultante: campos removidos
+    deixam de ser consultados (joins e prefetches descartados, colunas
+    restritas com only()) e relações expandidas viram select_related/Prefetch,
+    mantendo o número de consultas constante por página.
+    """
+
+    sparse_fieldset_actions = ("list", "retrieve")
+
+    def get_fieldset(self) -> dict:
+        if not hasattr(self, "_fieldset"):
+            self._fieldset = {}
+            if getattr(self, "action", None) in self.sparse_fieldset_actions:
+                for param, kwarg in FIELDSET_PARAMS:
+                    tree = parse_fieldset(self.request.query_params.get(param, ""))
+                    if tree:
+                        self._fieldset[kwarg] = tree
+                self.validate_fieldset(self._fieldset)
+        return self._fieldset
+
+    def validate_fieldset(self, fieldset: dict):
+        serializer_class = self.get_serializer_class()
+        errors = {}
+        if "fields" in fieldset and "exclude_fields" in fieldset:
+            # O serializer ignora exclude quando fields é informado
+            raise ValidationError(
+                {"exclude": ["Informe fields ou exclude, não os dois"]}
+            )
+        unknown = serializer_class().unknown_expansions(fieldset.get("expand", {}))
+        if unknown:
+            errors["expand"] = [f"Relação inválida: {path}" for path in unknown]
+        else:
+            # fields e exclude podem referenciar campos das relações expandidas
+            serializer = serializer_class(expand=fieldset.get("expand"))
+            for param, kwarg in FIELDSET_PARAMS[1:]:
+                unknown = serializer.unknown_fields(fieldset.get(kwarg, {}))
+                if unknown:
+                    errors[param] = [f"Campo inválido: {path}" for path in unknown]
+        if errors:
+            raise ValidationError(errors)
+
+    def get_serializer(self, *args, **kwargs):
+        for kwarg, tree in self.get_fieldset().items():
+            kwargs.setdefault(kwarg, tree)
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        fieldset = self.get_fieldset()
+        return plan_queryset(
+            super().get_queryset(),
+            self.get_serializer(),
+            restrict_columns="fields" in fieldset or "exclude_fields" in fieldset,
+        )
@@ -3,6 +3,10 @@ ASGI config for brain_agriculture project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+O stream de Server-Sent Events do dashboard (/api/v1/graphics/stream/) mantém
+a conexão aberta e precisa ser servido por aqui, ex:
+    uvicorn brain_agriculture.asgi:application
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
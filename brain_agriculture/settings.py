@@ -10,9 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import sys
 from datetime import timedelta
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
 from decouple import Csv, config
 from dj_database_url import parse
 
@@ -33,8 +35,15 @@ ALLOWED_HOSTS = config("ALLOWED_HOSTS", default=[], cast=Csv())
 
 # Application definition
 
+# Comandos do manage.py (workers, cron) não servem HTTP e não precisam
+# carregar ferramentas de desenvolvimento como a debug toolbar
+MANAGE_COMMAND = (
+    sys.argv[1] if Path(sys.argv[0]).name == "manage.py" and len(sys.argv) > 1 else None
+)
+
 INSTALLED_APPS = [
-    "django.contrib.admin",
+    # O autodiscover do admin é feito no urls.py, apenas quando as URLs são carregadas
+    "django.contrib.admin.apps.SimpleAdminConfig",
     "django.contrib.auth",
     "django.contrib.contenttypes",
     "django.contrib.sessions",
@@ -47,6 +56,8 @@ INSTALLED_APPS = [
     # apps
     "core",
     "users",
+    "monitoring",
+    "jobs",
 ]
 
 MIDDLEWARE = [
@@ -58,6 +69,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "base.middleware.ReadYourWritesMiddleware",
 ]
 
 ROOT_URLCONF = "brain_agriculture.urls"
@@ -88,6 +100,71 @@ DATABASES = {
     "default": config("DATABASE_URL", cast=parse),
 }
 
+# Réplicas de leitura: DATABASE_REPLICA_URLS e DATABASE_REPLICA_WEIGHTS são listas
+# separadas por vírgula na mesma ordem. Viram os aliases replica_1, replica_2...
+DATABASE_REPLICAS = {}
+_replica_weights = config("DATABASE_REPLICA_WEIGHTS", default="", cast=Csv(int))
+for _indice, _url in enumerate(config("DATABASE_REPLICA_URLS", default="", cast=Csv())):
+    _alias = f"replica_{_indice + 1}"
+    DATABASES[_alias] = {**parse(_url), "TEST": {"MIRROR": "default"}}
+    DATABASE_REPLICAS[_alias] = (
+        _replica_weights[_indice] if _indice < len(_replica_weights) else 1
+    )
+
+DATABASE_ROUTERS = ["base.routers.ReplicaRouter"]
+
+# Tempo em que um cliente lê do primário depois de escrever
+READ_YOUR_WRITES_SECONDS = config("READ_YOUR_WRITES_SECONDS", default=5, cast=int)
+REPLICA_HEALTH_CHECK_SECONDS = config(
+    "REPLICA_HEALTH_CHECK_SECONDS", default=10, cast=int
+)
+REPLICA_MAX_LAG_SECONDS = config("REPLICA_MAX_LAG_SECONDS", default=5, cast=int)
+
+# Cache compartilhado entre os processos (throttling, dashboard). Sem REDIS_URL
+# cada processo tem o seu cache em memória.
+REDIS_URL = config("REDIS_URL", default="")
+
+# Cache de resultados das listagens (base.views.ResultCacheMixin). Fica em um
+# alias próprio para que o descarte por LRU (MAX_ENTRIES no cache em memória,
+# maxmemory-policy allkeys-lru no Redis) não atinja as demais chaves.
+RESULT_CACHE_ENABLED = config("RESULT_CACHE_ENABLED", default=False, cast=bool)
+RESULT_CACHE_ALIAS = "results"
+RESULT_CACHE_TIMEOUT = config("RESULT_CACHE_TIMEOUT", default=600, cast=int)
+RESULT_CACHE_MAX_ENTRIES = config("RESULT_CACHE_MAX_ENTRIES", default=1000, cast=int)
+RESULT_CACHE_MAX_ENTRY_BYTES = config(
+    "RESULT_CACHE_MAX_ENTRY_BYTES", default=256 * 1024, cast=int
+)
+RESULT_CACHE_REDIS_URL = config("RESULT_CACHE_REDIS_URL", default=REDIS_URL)
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+if RESULT_CACHE_REDIS_URL:
+    CACHES[RESULT_CACHE_ALIAS] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": RESULT_CACHE_REDIS_URL,
+        "KEY_PREFIX": "results",
+        "TIMEOUT": RESULT_CACHE_TIMEOUT,
+    }
+else:
+    CACHES[RESULT_CACHE_ALIAS] = {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "results",
+        "TIMEOUT": RESULT_CACHE_TIMEOUT,
+        "OPTIONS": {"MAX_ENTRIES": RESULT_CACHE_MAX_ENTRIES},
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -142,16 +219,127 @@ REST_FRAMEWORK = {
         "rest_framework_simplejwt.authentication.JWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ),
+    # Taxas dos escopos do base.throttling.TokenBucketThrottle: "N/período" é
+    # uma rajada de até N tokens recarregada ao longo do período
+    "DEFAULT_THROTTLE_RATES": {
+        "dashboard": config("THROTTLE_DASHBOARD_RATE", default="60/min"),
+        "change-feed": config("THROTTLE_CHANGE_FEED_RATE", default="120/min"),
+        "validacao-lote": config("THROTTLE_BATCH_VALIDATION_RATE", default="20/min"),
+    },
 }
 
+THROTTLE_CACHE_ALIAS = config("THROTTLE_CACHE_ALIAS", default="default")
+
 CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOWED_ORIGINS = config("CORS_ALLOWED_ORIGINS", default=[], cast=Csv())
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
 
 
 CSRF_COOKIE_SECURE = config("CSRF_COOKIE_SECURE", cast=bool)
 CSRF_TRUSTED_ORIGINS = config("CSRF_TRUSTED_ORIGINS", default=[], cast=Csv())
 
-if DEBUG:
+# Respostas gravadas por Idempotency-Key na criação de produtores
+IDEMPOTENCY_KEY_TTL_SECONDS = config(
+    "IDEMPOTENCY_KEY_TTL_SECONDS", default=86400, cast=int
+)
+
+# Registros por lote na validação de arquivos (/produtores-rurais/validar/)
+BATCH_VALIDATION_CHUNK_SIZE = config(
+    "BATCH_VALIDATION_CHUNK_SIZE", default=500, cast=int
+)
+
+# Dashboard
+DASHBOARD_CACHE_SECONDS = config("DASHBOARD_CACHE_SECONDS", default=300, cast=int)
+DASHBOARD_DEFAULT_BINS = config("DASHBOARD_DEFAULT_BINS", default=10, cast=int)
+
+# Dashboard ao vivo via SSE (/api/v1/graphics/stream/, servido pelo asgi.py)
+LIVE_DASHBOARD_INTERVAL_SECONDS = config(
+    "LIVE_DASHBOARD_INTERVAL_SECONDS", default=2.0, cast=float
+)
+LIVE_DASHBOARD_QUEUE_SIZE = config("LIVE_DASHBOARD_QUEUE_SIZE", default=10, cast=int)
+LIVE_DASHBOARD_KEEPALIVE_SECONDS = config(
+    "LIVE_DASHBOARD_KEEPALIVE_SECONDS", default=15, cast=int
+)
+# Validade do ticket de uso único que abre o stream
+LIVE_DASHBOARD_TICKET_SECONDS = config(
+    "LIVE_DASHBOARD_TICKET_SECONDS", default=30, cast=int
+)
+
+# Snapshots analíticos (python manage.py export_analytics_snapshot)
+ANALYTICS_SNAPSHOT_DIR = config(
+    "ANALYTICS_SNAPSHOT_DIR", default=str(BASE_DIR / "snapshots")
+)
+ANALYTICS_SNAPSHOT_BATCH_SIZE = config(
+    "ANALYTICS_SNAPSHOT_BATCH_SIZE", default=5000, cast=int
+)
+
+# Log de alterações para sincronização incremental (/api/v1/changes/)
+CHANGE_FEED_PAGE_SIZE = config("CHANGE_FEED_PAGE_SIZE", default=500, cast=int)
+CHANGE_FEED_MAX_PAGE_SIZE = config("CHANGE_FEED_MAX_PAGE_SIZE", default=5000, cast=int)
+CHANGE_FEED_RETENTION_DAYS = config("CHANGE_FEED_RETENTION_DAYS", default=30, cast=int)
+
+# Produtores e fazendas excluídos logicamente são movidos para as tabelas de
+# arquivo pelo job core.archive_deleted_rows depois deste prazo
+ARCHIVE_AFTER_DAYS = config("ARCHIVE_AFTER_DAYS", default=90, cast=int)
+ARCHIVE_BATCH_SIZE = config("ARCHIVE_BATCH_SIZE", default=1000, cast=int)
+
+# Fila de jobs (python manage.py run_jobs_worker)
+JOBS_RETRY_BACKOFF_SECONDS = config("JOBS_RETRY_BACKOFF_SECONDS", default=30, cast=int)
+JOBS_RETRY_BACKOFF_MAX_SECONDS = config(
+    "JOBS_RETRY_BACKOFF_MAX_SECONDS", default=3600, cast=int
+)
+# O worker renova o heartbeat do job em execução a cada JOBS_HEARTBEAT_SECONDS;
+# jobs sem heartbeat há JOBS_STALE_TIMEOUT_SECONDS voltam para a fila
+JOBS_HEARTBEAT_SECONDS = config("JOBS_HEARTBEAT_SECONDS", default=30, cast=int)
+JOBS_STALE_TIMEOUT_SECONDS = config("JOBS_STALE_TIMEOUT_SECONDS", default=300, cast=int)
+
+# Detector de N+1 para desenvolvimento e homologação (não usar em produção)
+NPLUSONE_DETECTOR_ENABLED = config(
+    "NPLUSONE_DETECTOR_ENABLED", default=DEBUG, cast=bool
+)
+NPLUSONE_THRESHOLD = config("NPLUSONE_THRESHOLD", default=5, cast=int)
+
+if NPLUSONE_DETECTOR_ENABLED:
+    MIDDLEWARE += [
+        "monitoring.middleware.NPlusOneDetectorMiddleware",
+    ]
+
+# Agregação das consultas SQL por view e fingerprint, com log das consultas
+# lentas (monitoring.middleware.QueryObserverMiddleware). Cada processo publica
+# seu snapshot no cache a cada QUERY_STATS_SNAPSHOT_SECONDS. Desligada por
+# padrão; os deploys de produção ligam com QUERY_OBSERVER_ENABLED=True.
+QUERY_OBSERVER_ENABLED = config("QUERY_OBSERVER_ENABLED", default=False, cast=bool)
+SLOW_QUERY_THRESHOLD_MS = config("SLOW_QUERY_THRESHOLD_MS", default=200, cast=float)
+QUERY_STATS_MAX_ENTRIES = config("QUERY_STATS_MAX_ENTRIES", default=2000, cast=int)
+QUERY_STATS_SNAPSHOT_SECONDS = config(
+    "QUERY_STATS_SNAPSHOT_SECONDS", default=60, cast=int
+)
+
+if QUERY_OBSERVER_ENABLED:
+    MIDDLEWARE += [
+        "monitoring.middleware.QueryObserverMiddleware",
+    ]
+
+# Perfis por requisição (monitoring.middleware.ProfilingMiddleware): admins
+# pedem com o cabeçalho X-Profile: 1 e PROFILING_SAMPLE_RATE sorteia uma fração
+# das demais requisições. Os últimos PROFILING_MAX_PROFILES ficam em disco.
+PROFILING_ENABLED = config("PROFILING_ENABLED", default=True, cast=bool)
+PROFILING_SAMPLE_RATE = config("PROFILING_SAMPLE_RATE", default=0.0, cast=float)
+PROFILING_DIR = config("PROFILING_DIR", default=str(BASE_DIR / "profiles"))
+PROFILING_MAX_PROFILES = config("PROFILING_MAX_PROFILES", default=50, cast=int)
+
+if PROFILING_ENABLED:
+    MIDDLEWARE += [
+        "monitoring.middleware.ProfilingMiddleware",
+    ]
+
+DEBUG_TOOLBAR_ENABLED = config(
+    "DEBUG_TOOLBAR_ENABLED",
+    default=DEBUG and MANAGE_COMMAND in (None, "runserver"),
+    cast=bool,
+)
+
+if DEBUG_TOOLBAR_ENABLED:
     INSTALLED_APPS += [
         "debug_toolbar",
     ]
@@ -164,6 +352,7 @@ if DEBUG:
         "127.0.0.1",
     ]
 
+if DEBUG:
     SIMPLE_JWT = {
         "ACCESS_TOKEN_LIFETIME": timedelta(minutes=120),
         "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
@@ -17,14 +17,22 @@ Including another URLconf
 
 from django.conf import settings
 from django.contrib import admin
+from django.contrib.staticfiles.urls import staticfiles_urlpatterns
 from django.urls import include, path
 
+# Com SimpleAdminConfig os admin.py só são importados quando há rotas a servir
+admin.autodiscover()
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/v1/", include("core.urls")),
     path("api/v1/", include("users.urls")),
+    path("api/v1/", include("jobs.urls")),
+    path("api/v1/monitoring/", include("monitoring.urls")),
 ]
-if settings.DEBUG:
+# Com DEBUG, serve os arquivos estáticos também fora do runserver (uvicorn)
+urlpatterns += staticfiles_urlpatterns()
+if settings.DEBUG_TOOLBAR_ENABLED:
     import debug_toolbar
 
     urlpatterns += [
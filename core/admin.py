@@ -1,11 +1,100 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.utils.translation import gettext_lazy as _
 
+from base.paginators import EstimatedCountPaginator
 from core.models import Cidade, Cultura, Estado, Fazenda, ProdutorRural
 
-# Register your models here.
 
-admin.site.register(ProdutorRural)
-admin.site.register(Fazenda)
-admin.site.register(Cultura)
-admin.site.register(Estado)
-admin.site.register(Cidade)
+class ScalableModelAdmin(admin.ModelAdmin):
+    """
+    Changelist que não depende do tamanho da tabela: sem COUNT(*) do total,
+    contagem estimada quando não há filtros e ordenação pela chave primária.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ("-pk",)
+
+
+class EstadoAdmin(admin.ModelAdmin):
+    list_display = ("nome", "sigla")
+    search_fields = ("^nome", "=sigla")
+    ordering = ("nome",)
+
+
+class CidadeAdmin(ScalableModelAdmin):
+    list_display = ("nome", "estado")
+    list_select_related = ("estado",)
+    # istartswith usa o índice UPPER(nome) text_pattern_ops no PostgreSQL
+    search_fields = ("^nome",)
+    autocomplete_fields = ("estado",)
+
+
+class CulturaAdmin(admin.ModelAdmin):
+    list_display = ("nome",)
+    search_fields = ("^nome",)
+    ordering = ("nome",)
+
+
+class CulturaActionForm(ActionForm):
+    cultura = forms.ModelChoiceField(
+        queryset=Cultura.objects.order_by("nome"), required=False, label=_("Cultura")
+    )
+
+
+class FazendaAdmin(ScalableModelAdmin):
+    list_display = ("nome", "cidade", "area_total_hectares", "atualizado_em")
+    list_select_related = ("cidade",)
+    search_fields = ("^nome",)
+    autocomplete_fields = ("cidade", "culturas_plantadas")
+    action_form = CulturaActionForm
+    actions = ("adicionar_cultura", "remover_cultura")
+
+    def get_cultura(self, request):
+        cultura = Cultura.objects.filter(pk=request.POST.get("cultura") or None).first()
+        if cultura is None:
+            self.message_user(request, _("Selecione uma cultura."), messages.ERROR)
+        return cultura
+
+    @admin.action(description=_("Adicionar cultura às fazendas selecionadas"))
+    def adicionar_cultura(self, request, queryset):
+        cultura = self.get_cultura(request)
+        if cultura is not None:
+            total = queryset.adicionar_cultura(cultura)
+            self.message_user(request, f"{cultura} adicionada a {total} fazenda(s).")
+
+    @admin.action(description=_("Remover cultura das fazendas selecionadas"))
+    def remover_cultura(self, request, queryset):
+        cultura = self.get_cultura(request)
+        if cultura is not None:
+            total = queryset.remover_cultura(cultura)
+            self.message_user(request, f"{cultura} removida de {total} fazenda(s).")
+
+
+class ProdutorRuralAdmin(ScalableModelAdmin):
+    list_display = ("nome", "cpf_cnpj", "tipo", "fazenda")
+    list_select_related = ("fazenda",)
+    search_fields = ("^nome",)
+    autocomplete_fields = ("fazenda",)
+
+    @admin.display(description=_("CPF/CNPJ"), ordering="identificador")
+    def cpf_cnpj(self, produtor):
+        return produtor.format_exibicao()
+
+    def get_search_results(self, request, queryset, search_term):
+        # CPF/CNPJ, com ou sem pontuação, usa o índice de prefixo do identificador
+        identificador = ProdutorRural.format_identificador_save_class(
+            search_term.strip()
+        )
+        if identificador.isdigit():
+            return queryset.filter(identificador__startswith=identificador), False
+        return super().get_search_results(request, queryset, search_term)
+
+
+admin.site.register(ProdutorRural, ProdutorRuralAdmin)
+admin.site.register(Fazenda, FazendaAdmin)
+admin.site.register(Cultura, CulturaAdmin)
+admin.site.register(Estado, EstadoAdmin)
+admin.site.register(Cidade, CidadeAdmin)
@@ -1,15 +1,54 @@
+from rest_framework import serializers
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import transaction
 
-from base.serializers import BaseModelSerializer
-from core.models import Fazenda, ProdutorRural
+from base.serializers import BaseModelSerializer, UniqueBatchListSerializer
+from core.exports import FORMATOS
+from core.managers import DISTRIBUICAO_CAMPOS, DISTRIBUICAO_GRUPOS, SERIE_INTERVALOS
+from core.models import (
+    Cidade,
+    Cultura,
+    Estado,
+    Fazenda,
+    ProdutorRural,
+    TotalDiario,
+)
 from core.validators import (
     AreaHectaresValidationError,
     CnpAndCnpjValidationError,
     CnpjOrCpfRequiredDRFValidationError,
+    erros_de_constraint,
 )
 
 
+class EstadoSerializer(BaseModelSerializer):
+    class Meta:
+        model = Estado
+        fields = ("id", "nome", "sigla")
+
+
+class CidadeSerializer(BaseModelSerializer):
+    expandable_fields = {"estado": EstadoSerializer}
+
+    class Meta:
+        model = Cidade
+        fields = ("id", "nome", "estado")
+
+
+class CulturaSerializer(BaseModelSerializer):
+    class Meta:
+        model = Cultura
+        fields = ("id", "nome")
+
+
 class FazendaSerializer(BaseModelSerializer):
+    expandable_fields = {
+        "cidade": CidadeSerializer,
+        "culturas_plantadas": CulturaSerializer,
+    }
+
     class Meta:
         model = Fazenda
         fields = (
@@ -39,11 +78,22 @@ class ProdutorRuralSerializer(BaseModelSerializer):
     class Meta:
         model = ProdutorRural
         fields = ("id", "nome", "cnpj", "cpf", "fazenda")
+        # many=True verifica CPF/CNPJ com uma consulta por campo para a lista
+        list_serializer_class = UniqueBatchListSerializer
         extra_kwargs = {
             "cnpj": {"max_length": 18},
             "cpf": {"max_length": 14},
         }
 
+    def save(self, **kwargs):
+        # Violações das CheckConstraints que escapem da validação (ex.: duas
+        # requisições concorrentes) viram os mesmos erros de validação
+        try:
+            with erros_de_constraint():
+                return super().save(**kwargs)
+        except DjangoValidationError as error:
+            raise serializers.ValidationError(serializers.as_serializer_error(error))
+
     @transaction.atomic
     def create(self, validated_data: dict) -> ProdutorRural:
         fazenda_data = validated_data.pop("fazenda")
@@ -53,6 +103,7 @@ class ProdutorRuralSerializer(BaseModelSerializer):
         produtor_rural = ProdutorRural.objects.create(**validated_data, fazenda=fazenda)
         return produtor_rural
 
+    @transaction.atomic
     def update(self, instance: ProdutorRural, validated_data: dict) -> ProdutorRural:
         fazenda_data = validated_data.pop("fazenda", None)
         if fazenda_data:
@@ -115,3 +166,67 @@ class ProdutorRuralSerializer(BaseModelSerializer):
         if cnpj:
             data["cnpj"] = ProdutorRural.format_identificador_save_class(cnpj)
         return super().to_internal_value(data)
+
+
+class DistribuicaoQuerySerializer(serializers.Serializer):
+    campo = serializers.ChoiceField(choices=DISTRIBUICAO_CAMPOS, default="area_total")
+    por = serializers.ChoiceField(choices=list(DISTRIBUICAO_GRUPOS), default="estado")
+    quantidade_faixas = serializers.IntegerField(
+        min_value=1,
+        max_value=100,
+        default=lambda: settings.DASHBOARD_DEFAULT_BINS,
+    )
+
+
+class BuscaIdentificadorQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=18)
+    tipo = serializers.ChoiceField(
+        choices=ProdutorRural.TipoPessoa.choices, required=False
+    )
+    limite = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+    def validate_q(self, value: str) -> str:
+        # Aceita o formato de exibição (pontuação de CPF/CNPJ) ou só dígitos
+        digitos = ProdutorRural.format_identificador_save_class(value.strip())
+        if not digitos.isdigit() or len(digitos) > 14:
+            raise serializers.ValidationError("Informe parte de um CPF ou CNPJ")
+        return digitos
+
+
+class FiltroCulturasQuerySerializer(serializers.Serializer):
+    culturas = serializers.CharField(required=False)
+
+    def validate_culturas(self, value: str) -> list:
+        try:
+            ids = {int(pk) for pk in value.split(",") if pk.strip()}
+        except ValueError:
+            raise serializers.ValidationError(
+                "Informe os ids das culturas separados por vírgula"
+            )
+        culturas = list(Cultura.objects.filter(pk__in=ids))
+        if len(culturas) != len(ids):
+            raise serializers.ValidationError("Cultura inexistente")
+        return culturas
+
+
+class SerieTotaisQuerySerializer(serializers.Serializer):
+    dimensao = serializers.ChoiceField(
+        choices=TotalDiario.Dimensao.choices, default=TotalDiario.Dimensao.ESTADO
+    )
+    inicio = serializers.DateField(required=False)
+    fim = serializers.DateField(required=False)
+    intervalo = serializers.ChoiceField(
+        choices=["dia", *SERIE_INTERVALOS], default="dia"
+    )
+
+    def validate(self, attrs):
+        if "inicio" in attrs and "fim" in attrs and attrs["inicio"] > attrs["fim"]:
+            raise serializers.ValidationError(
+                {"fim": "A data final deve ser igual ou posterior à inicial"}
+            )
+        return attrs
+
+
+class AnalyticsSnapshotSerializer(serializers.Serializer):
+    formato = serializers.ChoiceField(choices=FORMATOS, default="parquet")
+    completo = serializers.BooleanField(default=False)
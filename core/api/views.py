@@ -1,51 +1,289 @@
-from rest_framework import viewsets
+from asgiref.sync import sync_to_async
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from django.db import models
-from django.db.models import Prefetch
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
 
-from core.api.serializers import ProdutorRuralSerializer
-from core.models import Cultura, Fazenda, ProdutorRural
+from base.throttling import TokenBucketThrottle
+from base.views import ReplicaReadMixin, ResultCacheMixin, SparseFieldsetMixin
+from core.api.serializers import (
+    AnalyticsSnapshotSerializer,
+    BuscaIdentificadorQuerySerializer,
+    DistribuicaoQuerySerializer,
+    FiltroCulturasQuerySerializer,
+    ProdutorRuralSerializer,
+    SerieTotaisQuerySerializer,
+)
+from core import live
+from core.batch import ValidacaoEmLote, formatar_ndjson
+from core.dashboard import dados_graficos, distribuicao_cacheada, pivo_cacheado
+from core.idempotency import IdempotentCreateMixin
+from core.models import (
+    Cidade,
+    Cultura,
+    Estado,
+    Fazenda,
+    ProdutorRural,
+    RegistroAlteracao,
+    TotalDiario,
+)
+from jobs.api.views import job_accepted_response
+from jobs.registry import enqueue
 
 
-class ProdutorRuralViewSet(viewsets.ModelViewSet):
+class ProdutorRuralViewSet(
+    IdempotentCreateMixin,
+    SparseFieldsetMixin,
+    ResultCacheMixin,
+    ReplicaReadMixin,
+    viewsets.ModelViewSet,
+):
+    # Joins e prefetches são planejados a partir dos campos do serializer
     queryset = ProdutorRural.objects.all()
     serializer_class = ProdutorRuralSerializer
+    # Os dados não dependem do usuário: páginas iguais são compartilhadas
+    result_cache_models = (ProdutorRural, Fazenda, Cidade, Estado, Cultura)
+    result_cache_scope = "produtores-rurais"
+    replica_actions = ("list", "retrieve", "busca")
+    sparse_fieldset_actions = ("list", "retrieve", "busca")
+    # Definidos na action validar; o @action só aceita atributos da classe
+    throttle_scope = None
+    throttle_cost = 1
 
-    def get_queryset(self):
-        prefetch_fazenda_culturas = Prefetch(
-            "fazenda__culturas_plantadas", queryset=Cultura.objects.all()
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action != "list":
+            return queryset
+        # ?culturas=1,2: fazendas com todas as culturas, pelo bitmask
+        query = FiltroCulturasQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        if query.validated_data.get("culturas"):
+            queryset = queryset.com_culturas(*query.validated_data["culturas"])
+        return queryset
+
+    @action(detail=False)
+    def busca(self, request):
+        """
+        Busca por prefixo do CPF/CNPJ, com ou sem pontuação. A consulta usa o
+        índice de identificador (LIKE 'prefixo%') e retorna em ordem do índice.
+        """
+        query = BuscaIdentificadorQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        produtores = self.get_queryset().filter(
+            identificador__startswith=query.validated_data["q"]
+        )
+        if "tipo" in query.validated_data:
+            produtores = produtores.filter(tipo=query.validated_data["tipo"])
+        produtores = produtores.order_by("identificador")[
+            : query.validated_data["limite"]
+        ]
+        return Response(self.get_serializer(produtores, many=True).data)
+
+    # Cada chamada valida o arquivo inteiro, em lotes com várias consultas
+    @action(
+        detail=False,
+        methods=["post"],
+        throttle_classes=[TokenBucketThrottle],
+        throttle_scope="validacao-lote",
+        throttle_cost=5,
+    )
+    def validar(self, request):
+        """
+        Valida sem gravar um arquivo NDJSON (um produtor por linha), lido sob
+        demanda. Responde em NDJSON com os erros de cada linha inválida e, por
+        último, o resumo com os totais.
+        """
+        resultados = ValidacaoEmLote(
+            request.stream or [], context=self.get_serializer_context()
         )
-        return (
-            super()
-            .get_queryset()
-            .select_related("fazenda")
-            .prefetch_related(prefetch_fazenda_culturas)
+        return StreamingHttpResponse(
+            formatar_ndjson(resultados), content_type="application/x-ndjson"
         )
 
 
-class FazendaGraphicsApiView(APIView):
+class FazendaGraphicsApiView(ReplicaReadMixin, APIView):
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = "dashboard"
+
     def get(self, request, format=None):
-        total_fazendas_por_estado = Fazenda.objects.total_fazendas_por_estado()
-        total_fazenda_culturas = Cultura.objects.annotate(
-            total=models.Count("fazendas")
-        ).values("nome", "total")
-        total_area_agricultavel = Fazenda.objects.aggregate(
-            total_agricultavel=models.Sum("area_agricultavel_hectares"),
-            total_vegetacao=models.Sum("area_vegetacao_hectares"),
-            total_hectares=models.Sum("area_total_hectares"),
-            total_fazendas=models.Count("id"),
-        )
-        total_hectares = total_area_agricultavel.pop("total_hectares")
-        total_fazendas = total_area_agricultavel.pop("total_fazendas")
+        return Response(dados_graficos())
+
+
+class FazendaGraphicsStreamTicketApiView(APIView):
+    """
+    Emite o ticket de uso único exigido por /graphics/stream/?ticket=. Cada
+    conexão ao stream passa por aqui e consome o throttle do dashboard.
+    """
+
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = "dashboard"
+
+    def post(self, request, format=None):
+        return Response(
+            {
+                "ticket": live.emitir_ticket(request.user),
+                "expira_em": settings.LIVE_DASHBOARD_TICKET_SECONDS,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+async def fazenda_graphics_stream(request):
+    """
+    Server-Sent Events com o snapshot dos gráficos seguido de deltas sempre que
+    produtores ou fazendas mudarem. Só funciona via ASGI: no WSGI o iterador
+    assíncrono seria consumido de forma síncrona, prendendo uma thread do
+    servidor por cliente enquanto a conexão durar.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(
+            "O stream exige um servidor ASGI (brain_agriculture.asgi).",
+            status=status.HTTP_501_NOT_IMPLEMENTED,
+        )
+    user = await sync_to_async(live.usar_ticket)(request.GET.get("ticket", ""))
+    if user is None:
+        return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+
+    fila = await live.broadcaster.subscribe()
+    return StreamingHttpResponse(
+        live.eventos(fila),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+class FazendaDistribuicaoApiView(ReplicaReadMixin, APIView):
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = "dashboard"
+    # Sem cache, os percentis custam bem mais que os gráficos
+    throttle_cost = 3
 
+    def get(self, request, format=None):
+        serializer = DistribuicaoQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
         return Response(
             {
-                "total_fazendas": total_fazendas,
-                "total_hectares": total_hectares,
-                "total_area_agricultavel": total_area_agricultavel,
-                "total_fazenda_culturas": total_fazenda_culturas,
-                "total_fazendas_por_estado": total_fazendas_por_estado,
+                **serializer.validated_data,
+                "grupos": distribuicao_cacheada(**serializer.validated_data),
             }
         )
+
+
+class FazendaPivoApiView(ReplicaReadMixin, APIView):
+    """
+    Total de fazendas e soma das áreas por estado × cultura, em formato
+    colunar (veja FazendaQuerySet.pivo_estado_cultura).
+    """
+
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = "dashboard"
+
+    def get(self, request, format=None):
+        return Response(pivo_cacheado())
+
+
+class FazendaSeriesApiView(ReplicaReadMixin, APIView):
+    """
+    Série histórica dos totais por estado ou por cultura, lida dos snapshots
+    diários (core.snapshot_daily_totals), opcionalmente reduzida a um ponto por
+    semana ou por mês.
+    """
+
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = "dashboard"
+
+    def get(self, request, format=None):
+        query = SerieTotaisQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        return Response(
+            {
+                **query.validated_data,
+                **TotalDiario.objects.serie(**query.validated_data),
+            }
+        )
+
+
+class AnalyticsSnapshotApiView(APIView):
+    """
+    Enfileira a exportação do snapshot analítico (core.export_analytics_snapshot)
+    e responde 202 com a URL para acompanhar o job.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, format=None):
+        serializer = AnalyticsSnapshotSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = enqueue(
+            "core.export_analytics_snapshot",
+            criado_por=request.user,
+            **serializer.validated_data,
+        )
+        return job_accepted_response(request, job)
+
+
+class ChangeFeedApiView(APIView):
+    """
+    Alterações desde o cursor informado em `since`, compactadas para a última
+    operação de cada objeto. Inclusões e alterações devem ser tratadas pelo
+    cliente como upsert. Quando o cursor já foi removido pela compactação o
+    cliente recebe 410 e precisa refazer a carga completa.
+    """
+
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = "change-feed"
+
+    def get(self, request, format=None):
+        try:
+            cursor = int(request.query_params.get("since", 0))
+            limite = int(
+                request.query_params.get("limit", settings.CHANGE_FEED_PAGE_SIZE)
+            )
+        except ValueError:
+            raise ValidationError(
+                {"detail": "Parâmetros since e limit devem ser inteiros"}
+            )
+        limite = max(1, min(limite, settings.CHANGE_FEED_MAX_PAGE_SIZE))
+
+        # Só leitura: os registros são numerados após o commit de cada escrita
+        if cursor and cursor < RegistroAlteracao.objects.marca_compactacao():
+            return Response(
+                {"detail": "Cursor expirado, refaça a sincronização completa"},
+                status=status.HTTP_410_GONE,
+            )
+
+        registros = RegistroAlteracao.objects.desde(cursor, limite + 1)
+        has_more = len(registros) > limite
+        registros = registros[:limite]
+        return Response(
+            {
+                "changes": self.compactar(registros),
+                "next_cursor": str(registros[-1].sequencia if registros else cursor),
+                "has_more": has_more,
+            }
+        )
+
+    @staticmethod
+    def compactar(registros: list) -> list:
+        ultimos = {}
+        for registro in registros:
+            chave = (registro.entidade, registro.objeto_id)
+            if registro.entidade == RegistroAlteracao.Entidade.FAZENDA_CULTURA:
+                chave += (registro.dados["cultura_id"],)
+            ultimos.pop(chave, None)
+            ultimos[chave] = registro
+        return [
+            {
+                "entidade": registro.entidade,
+                "id": registro.objeto_id,
+                "operacao": registro.operacao,
+                "dados": registro.dados,
+            }
+            for registro in ultimos.values()
+        ]
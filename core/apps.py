@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
+
+    def ready(self):
+        from base.routers import check_replica_pin_cache
+        from base.throttling import check_throttle_costs
+        from core import signals  # noqa: F401
+
+        checks.register(check_throttle_costs, checks.Tags.urls)
+        checks.register(check_replica_pin_cache, checks.Tags.caches)
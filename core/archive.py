@@ -0,0 +1,96 @@
+from collections import defaultdict
+
+from django.db import transaction
+
+from core.models import (
+    Fazenda,
+    FazendaArquivada,
+    ProdutorRural,
+    ProdutorRuralArquivado,
+)
+
+CAMPOS_PRODUTOR = [
+    "id",
+    "nome",
+    "cnpj",
+    "cpf",
+    "identificador",
+    "tipo",
+    "fazenda_id",
+    "atualizado_em",
+    "excluido_em",
+]
+CAMPOS_FAZENDA = [
+    "id",
+    "nome",
+    "cidade_id",
+    *Fazenda.AREA_FIELDS,
+    "atualizado_em",
+    "excluido_em",
+]
+
+
+def arquivar_em_lotes(queryset, arquivar_lote, tamanho_lote: int) -> int:
+    """
+    Move as linhas de `queryset` para a tabela de arquivo em lotes. Cada lote
+    é copiado e removido da tabela principal na mesma transação.
+    """
+    total = 0
+    while True:
+        with transaction.atomic():
+            lote = list(queryset.order_by("pk")[:tamanho_lote])
+            if not lote:
+                return total
+            arquivar_lote(lote)
+            queryset.model.todos.filter(
+                pk__in=[linha.pk for linha in lote]
+            ).hard_delete()
+        total += len(lote)
+
+
+def arquivar_produtores(antes_de, tamanho_lote: int) -> int:
+    def arquivar_lote(lote):
+        ProdutorRuralArquivado.objects.bulk_create(
+            ProdutorRuralArquivado(
+                **{campo: getattr(produtor, campo) for campo in CAMPOS_PRODUTOR}
+            )
+            for produtor in lote
+        )
+
+    queryset = ProdutorRural.todos.excluidos().filter(excluido_em__lt=antes_de)
+    return arquivar_em_lotes(queryset, arquivar_lote, tamanho_lote)
+
+
+def arquivar_fazendas(antes_de, tamanho_lote: int) -> int:
+    def arquivar_lote(lote):
+        culturas = defaultdict(list)
+        for fazenda_id, cultura_id in (
+            Fazenda.culturas_plantadas.through.objects.filter(
+                fazenda_id__in=[fazenda.pk for fazenda in lote]
+            )
+            .order_by("cultura_id")
+            .values_list("fazenda_id", "cultura_id")
+        ):
+            culturas[fazenda_id].append(cultura_id)
+        FazendaArquivada.objects.bulk_create(
+            FazendaArquivada(
+                **{campo: getattr(fazenda, campo) for campo in CAMPOS_FAZENDA},
+                culturas=culturas[fazenda.pk],
+            )
+            for fazenda in lote
+        )
+
+    # Fazendas ainda referenciadas por algum produtor (mesmo excluído) ficam
+    # para depois que o produtor for arquivado
+    queryset = Fazenda.todos.excluidos().filter(
+        excluido_em__lt=antes_de, produtorrural__isnull=True
+    )
+    return arquivar_em_lotes(queryset, arquivar_lote, tamanho_lote)
+
+
+def arquivar_excluidos(antes_de, tamanho_lote: int) -> dict:
+    # Produtores primeiro, liberando as fazendas excluídas junto com eles
+    return {
+        "produtores": arquivar_produtores(antes_de, tamanho_lote),
+        "fazendas": arquivar_fazendas(antes_de, tamanho_lote),
+    }
@@ -0,0 +1,118 @@
+import json
+from itertools import islice
+
+from django.conf import settings
+
+from base.serializers import InBulkLookup
+from core.api.serializers import ProdutorRuralSerializer
+from core.models import Cidade, Cultura
+
+JSON_INVALIDO = "Cada linha deve conter um objeto JSON"
+
+
+def ids_validos(valores) -> set:
+    ids = set()
+    for valor in valores:
+        try:
+            ids.add(int(valor))
+        except (TypeError, ValueError):
+            pass
+    return ids
+
+
+class ValidacaoEmLote:
+    """
+    Valida, sem gravar nada, produtores recebidos um por linha (NDJSON) com as
+    mesmas regras do ProdutorRuralSerializer.
+
+    As linhas são lidas sob demanda e validadas em lotes: cidades e culturas de
+    cada lote são carregadas com uma consulta por modelo e a unicidade de CPF e
+    CNPJ é verificada pelo UniqueBatchListSerializer, com uma consulta IN por
+    campo. CPFs/CNPJs repetidos no próprio arquivo, mesmo em lotes diferentes,
+    são reportados a partir da segunda ocorrência.
+
+    A iteração produz um dicionário por registro inválido e, por último, o
+    resumo com os totais.
+    """
+
+    def __init__(self, linhas, context: dict = None, tamanho_lote: int = None):
+        self.linhas = linhas
+        self.context = context or {}
+        self.tamanho_lote = tamanho_lote or settings.BATCH_VALIDATION_CHUNK_SIZE
+        # Valores únicos já vistos, compartilhados entre os lotes
+        self.vistos = {}
+
+    def __iter__(self):
+        total = invalidos = 0
+        registros = self.ler_registros()
+        while lote := list(islice(registros, self.tamanho_lote)):
+            for resultado in self.validar_lote(lote):
+                invalidos += 1
+                yield resultado
+            total += len(lote)
+        yield {"total": total, "validos": total - invalidos, "invalidos": invalidos}
+
+    def ler_registros(self):
+        for numero, linha in enumerate(self.linhas, start=1):
+            if not linha.strip():
+                continue
+            try:
+                registro = json.loads(linha)
+            except ValueError:
+                registro = None
+            yield numero, registro
+
+    def validar_lote(self, lote: list) -> list:
+        erros = {}
+        registros = []
+        for numero, registro in lote:
+            if isinstance(registro, dict):
+                registros.append((numero, registro))
+            else:
+                erros[numero] = {"non_field_errors": [JSON_INVALIDO]}
+
+        if registros:
+            serializer = self.get_serializer(registros)
+            serializer.is_valid()
+            for (numero, _), erro in zip(registros, serializer.errors):
+                if erro:
+                    erros[numero] = erro
+        return [{"linha": numero, "erros": erros[numero]} for numero in sorted(erros)]
+
+    @staticmethod
+    def carregar_relacionados(registros: list):
+        fazendas = [
+            registro["fazenda"]
+            for _, registro in registros
+            if isinstance(registro.get("fazenda"), dict)
+        ]
+        id_cidades = ids_validos(fazenda.get("cidade") for fazenda in fazendas)
+        id_culturas = ids_validos(
+            cultura
+            for fazenda in fazendas
+            if isinstance(fazenda.get("culturas_plantadas"), list)
+            for cultura in fazenda["culturas_plantadas"]
+        )
+        cidades = Cidade.objects.in_bulk(id_cidades) if id_cidades else {}
+        culturas = Cultura.objects.in_bulk(id_culturas) if id_culturas else {}
+        return cidades, culturas
+
+    def get_serializer(self, registros: list):
+        cidades, culturas = self.carregar_relacionados(registros)
+        serializer = ProdutorRuralSerializer(
+            data=[registro for _, registro in registros],
+            many=True,
+            context=self.context,
+        )
+        serializer.seen_values = self.vistos
+        fazenda = serializer.child.fields["fazenda"].fields
+        fazenda["cidade"].queryset = InBulkLookup(Cidade, cidades)
+        fazenda["culturas_plantadas"].child_relation.queryset = InBulkLookup(
+            Cultura, culturas
+        )
+        return serializer
+
+
+def formatar_ndjson(resultados):
+    for resultado in resultados:
+        yield json.dumps(resultado, ensure_ascii=False) + "\n"
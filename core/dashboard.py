@@ -0,0 +1,101 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
+
+from base.cache import get_generations
+from core.managers import DISTRIBUICAO_CAMPOS, DISTRIBUICAO_GRUPOS
+from core.models import Cidade, Cultura, Estado, Fazenda, TotalDiario
+
+DISTRIBUICAO_CACHE_KEY = (
+    "dashboard:distribuicao:{campo}:{por}:{quantidade_faixas}:{geracoes}"
+)
+PIVO_CACHE_KEY = "dashboard:pivo:{geracoes}"
+# Tabelas lidas pelas distribuições e pelo pivô
+MODELOS_DASHBOARD = [Fazenda, Cidade, Estado, Cultura]
+
+
+def geracoes_dashboard() -> str:
+    # A chave muda a cada escrita nas tabelas usadas pelo dashboard
+    return ":".join(map(str, get_generations(MODELOS_DASHBOARD)))
+
+
+def dados_graficos() -> dict:
+    total_fazendas_por_estado = Fazenda.objects.total_fazendas_por_estado()
+    total_fazenda_culturas = Fazenda.objects.total_fazendas_por_cultura()
+    total_area_agricultavel = Fazenda.objects.aggregate(
+        total_agricultavel=models.Sum("area_agricultavel_hectares"),
+        total_vegetacao=models.Sum("area_vegetacao_hectares"),
+        total_hectares=models.Sum("area_total_hectares"),
+        total_fazendas=models.Count("id"),
+    )
+    total_hectares = total_area_agricultavel.pop("total_hectares")
+    total_fazendas = total_area_agricultavel.pop("total_fazendas")
+
+    return {
+        "total_fazendas": total_fazendas,
+        "total_hectares": total_hectares,
+        "total_area_agricultavel": total_area_agricultavel,
+        "total_fazenda_culturas": total_fazenda_culturas,
+        "total_fazendas_por_estado": total_fazendas_por_estado,
+    }
+
+
+def calcular_distribuicao(campo: str, por: str, quantidade_faixas: int) -> list:
+    return Fazenda.objects.distribuicao(
+        campo=campo, por=por, quantidade_faixas=quantidade_faixas
+    )
+
+
+def distribuicao_cacheada(campo: str, por: str, quantidade_faixas: int) -> list:
+    chave = DISTRIBUICAO_CACHE_KEY.format(
+        campo=campo,
+        por=por,
+        quantidade_faixas=quantidade_faixas,
+        geracoes=geracoes_dashboard(),
+    )
+    return cache.get_or_set(
+        chave,
+        lambda: calcular_distribuicao(campo, por, quantidade_faixas),
+        settings.DASHBOARD_CACHE_SECONDS,
+    )
+
+
+def recalcular_distribuicoes(quantidade_faixas: int) -> int:
+    total = 0
+    geracoes = geracoes_dashboard()
+    for campo in DISTRIBUICAO_CAMPOS:
+        for por in DISTRIBUICAO_GRUPOS:
+            chave = DISTRIBUICAO_CACHE_KEY.format(
+                campo=campo,
+                por=por,
+                quantidade_faixas=quantidade_faixas,
+                geracoes=geracoes,
+            )
+            cache.set(
+                chave,
+                calcular_distribuicao(campo, por, quantidade_faixas),
+                settings.DASHBOARD_CACHE_SECONDS,
+            )
+            total += 1
+    return total
+
+
+def pivo_cacheado() -> dict:
+    return cache.get_or_set(
+        PIVO_CACHE_KEY.format(geracoes=geracoes_dashboard()),
+        Fazenda.objects.pivo_estado_cultura,
+        settings.DASHBOARD_CACHE_SECONDS,
+    )
+
+
+def gravar_totais_diarios(data) -> int:
+    """Grava (ou refaz) os totais do dia `data` por estado e por cultura."""
+    registros = [
+        TotalDiario(data=data, dimensao=dimensao, **totais)
+        for dimensao in TotalDiario.Dimensao.values
+        for totais in Fazenda.objects.totais_por(dimensao)
+    ]
+    with transaction.atomic():
+        TotalDiario.objects.filter(data=data).delete()
+        TotalDiario.objects.bulk_create(registros)
+    return len(registros)
@@ -0,0 +1,290 @@
+import json
+from collections import defaultdict
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+from core.models import (
+    Cidade,
+    Cultura,
+    Estado,
+    Fazenda,
+    ProdutorRural,
+    RegistroAlteracao,
+)
+
+Entidade = RegistroAlteracao.Entidade
+
+FORMATOS = ("parquet", "arrow")
+MANIFESTO = "manifesto.json"
+
+
+class AnalyticsSnapshotError(Exception):
+    pass
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as error:
+        raise AnalyticsSnapshotError(
+            "pyarrow é necessário para exportar snapshots analíticos"
+        ) from error
+    return pyarrow
+
+
+class AnalyticsSnapshot:
+    """
+    Exporta produtores, fazendas (com as culturas plantadas) e as tabelas de
+    referência para arquivos colunares, lendo o banco em lotes limitados.
+
+    Produtores e fazendas são incrementais: cada execução grava, em um novo
+    arquivo part-<timestamp>, as linhas com registros no log de alterações
+    (RegistroAlteracao) entre o cursor da execução anterior e a última
+    `sequencia`. O log segue a ordem de confirmação e também registra as
+    culturas de cada fazenda, então nenhuma transação confirmada tarde ou
+    alteração só das culturas fica de fora. Como as partes podem se sobrepor, o
+    estado atual de cada id é a linha da parte mais recente. Os excluídos
+    logicamente seguem com excluido_em preenchido; os removidos do banco viram
+    linhas só com id e excluido_em. O consumidor deve descartar os dois. Se a
+    compactação já removeu o trecho do log após o cursor, a exportação é
+    completa. As tabelas de referência são regravadas por completo.
+    """
+
+    def __init__(
+        self,
+        destino,
+        formato: str = "parquet",
+        completo: bool = False,
+        tamanho_lote: int = None,
+    ):
+        if formato not in FORMATOS:
+            raise AnalyticsSnapshotError(f"Formato inválido: {formato}")
+        self.pa = _import_pyarrow()
+        self.destino = Path(destino)
+        self.formato = formato
+        self.completo = completo
+        self.tamanho_lote = tamanho_lote or settings.ANALYTICS_SNAPSHOT_BATCH_SIZE
+        self.extensao = "parquet" if formato == "parquet" else "arrow"
+        # (cursor anterior, última sequência); cursor None exporta tudo
+        self.intervalo = (None, None)
+
+    def executar(self) -> dict:
+        self.destino.mkdir(parents=True, exist_ok=True)
+        manifesto = self.ler_manifesto()
+        inicio = timezone.now()
+        registros = RegistroAlteracao.objects
+        registros.sequenciar()
+        marca = registros.marca_compactacao()
+        ultima = registros.aggregate(ultima=models.Max("sequencia"))["ultima"]
+        ate = max(ultima or 0, marca)
+        desde = manifesto.get("cursor")
+        if self.completo or desde is None or desde < marca or desde > ate:
+            desde = None
+        self.intervalo = (desde, ate)
+
+        sufixo = inicio.strftime("%Y%m%dT%H%M%S%f")
+        linhas = {
+            "produtores": self.gravar(
+                f"produtores/part-{sufixo}",
+                self.schema_produtores(),
+                self.lotes_produtores(),
+            ),
+            "fazendas": self.gravar(
+                f"fazendas/part-{sufixo}",
+                self.schema_fazendas(),
+                self.lotes_fazendas(),
+            ),
+        }
+        for nome, schema, lotes in self.referencias():
+            linhas[nome] = self.gravar(f"referencias/{nome}", schema, lotes)
+
+        manifesto.pop("marca_dagua", None)
+        manifesto.update(
+            {
+                "cursor": ate,
+                "gerado_em": inicio.isoformat(),
+                "formato": self.formato,
+                "incremental": desde is not None,
+                "linhas": linhas,
+            }
+        )
+        (self.destino / MANIFESTO).write_text(json.dumps(manifesto, indent=2))
+        return manifesto
+
+    def alteracoes(self, *entidades):
+        """Registros do log no intervalo desta execução."""
+        desde, ate = self.intervalo
+        return RegistroAlteracao.objects.filter(
+            entidade__in=entidades, sequencia__gt=desde, sequencia__lte=ate
+        )
+
+    def alterados(self, model, *entidades):
+        queryset = model.todos.order_by("pk")
+        if self.intervalo[0] is None:
+            return queryset
+        return queryset.filter(pk__in=self.alteracoes(*entidades).values("objeto_id"))
+
+    def removidos(self, model, entidade) -> list:
+        """(id, removido_em) dos excluídos do banco no intervalo."""
+        if self.intervalo[0] is None:
+            return []
+        return list(
+            self.alteracoes(entidade)
+            .filter(operacao=RegistroAlteracao.Operacao.DELETE)
+            .exclude(objeto_id__in=model.todos.values("pk"))
+            .values("objeto_id")
+            .annotate(removido_em=models.Max("criado_em"))
+            .order_by("objeto_id")
+            .values_list("objeto_id", "removido_em")
+        )
+
+    def lapides(self, model, entidade, schema):
+        removidos = self.removidos(model, entidade)
+        for inicio in range(0, len(removidos), self.tamanho_lote):
+            lote = removidos[inicio : inicio + self.tamanho_lote]
+            colunas = {
+                campo.name: [[] if self.pa.types.is_list(campo.type) else None]
+                * len(lote)
+                for campo in schema
+            }
+            colunas["id"] = [pk for pk, _ in lote]
+            colunas["excluido_em"] = [removido_em for _, removido_em in lote]
+            yield colunas
+
+    def ler_manifesto(self) -> dict:
+        caminho = self.destino / MANIFESTO
+        if caminho.exists():
+            return json.loads(caminho.read_text())
+        return {}
+
+    def abrir_writer(self, caminho: Path, schema):
+        if self.formato == "parquet":
+            return self.pa.parquet.ParquetWriter(caminho, schema)
+        return self.pa.ipc.new_file(caminho, schema)
+
+    def gravar(self, nome: str, schema, lotes) -> int:
+        caminho = self.destino / f"{nome}.{self.extensao}"
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        writer = None
+        total = 0
+        try:
+            for lote in lotes:
+                if writer is None:
+                    writer = self.abrir_writer(caminho, schema)
+                writer.write_batch(self.pa.RecordBatch.from_pydict(lote, schema=schema))
+                total += len(lote[schema.names[0]])
+        finally:
+            if writer is not None:
+                writer.close()
+        return total
+
+    def ler_em_lotes(self, queryset, campos: list):
+        # iterator() usa cursor do lado do servidor no PostgreSQL
+        linhas = queryset.values_list(*campos).iterator(chunk_size=self.tamanho_lote)
+        while lote := list(islice(linhas, self.tamanho_lote)):
+            yield lote
+
+    @staticmethod
+    def colunas(lote: list, nomes: list) -> dict:
+        return {nome: list(valores) for nome, valores in zip(nomes, zip(*lote))}
+
+    def schema_produtores(self):
+        pa = self.pa
+        return pa.schema(
+            [
+                ("id", pa.int64()),
+                ("nome", pa.string()),
+                ("cpf", pa.string()),
+                ("cnpj", pa.string()),
+                ("fazenda_id", pa.int64()),
+                ("atualizado_em", pa.timestamp("us", tz="UTC")),
+                ("excluido_em", pa.timestamp("us", tz="UTC")),
+            ]
+        )
+
+    def lotes_produtores(self):
+        queryset = self.alterados(ProdutorRural, Entidade.PRODUTOR_RURAL)
+        campos = self.schema_produtores().names
+        for lote in self.ler_em_lotes(queryset, campos):
+            yield self.colunas(lote, campos)
+        yield from self.lapides(
+            ProdutorRural, Entidade.PRODUTOR_RURAL, self.schema_produtores()
+        )
+
+    def schema_fazendas(self):
+        pa = self.pa
+        area = pa.decimal128(10, 2)
+        return pa.schema(
+            [
+                ("id", pa.int64()),
+                ("nome", pa.string()),
+                ("cidade_id", pa.int64()),
+                ("estado_id", pa.int64()),
+                ("area_total_hectares", area),
+                ("area_agricultavel_hectares", area),
+                ("area_vegetacao_hectares", area),
+                ("atualizado_em", pa.timestamp("us", tz="UTC")),
+                ("excluido_em", pa.timestamp("us", tz="UTC")),
+                ("culturas", pa.list_(pa.int64())),
+            ]
+        )
+
+    def lotes_fazendas(self):
+        # Alterações só nas culturas não mudam atualizado_em, mas estão no log
+        queryset = self.alterados(Fazenda, Entidade.FAZENDA, Entidade.FAZENDA_CULTURA)
+        campos = [
+            "id",
+            "nome",
+            "cidade_id",
+            "cidade__estado_id",
+            *Fazenda.AREA_FIELDS,
+            "atualizado_em",
+            "excluido_em",
+        ]
+        nomes = self.schema_fazendas().names[:-1]
+        through = Fazenda.culturas_plantadas.through
+        for lote in self.ler_em_lotes(queryset, campos):
+            colunas = self.colunas(lote, nomes)
+            # Uma consulta por lote para as culturas de todas as fazendas do lote
+            culturas = defaultdict(list)
+            for fazenda_id, cultura_id in (
+                through.objects.filter(fazenda_id__in=colunas["id"])
+                .order_by("cultura_id")
+                .values_list("fazenda_id", "cultura_id")
+            ):
+                culturas[fazenda_id].append(cultura_id)
+            colunas["culturas"] = [culturas[pk] for pk in colunas["id"]]
+            yield colunas
+        yield from self.lapides(Fazenda, Entidade.FAZENDA, self.schema_fazendas())
+
+    def referencias(self):
+        pa = self.pa
+        tabelas = [
+            (
+                "estados",
+                Estado.objects.order_by("pk"),
+                [("id", pa.int64()), ("nome", pa.string()), ("sigla", pa.string())],
+            ),
+            (
+                "cidades",
+                Cidade.objects.order_by("pk"),
+                [("id", pa.int64()), ("nome", pa.string()), ("estado_id", pa.int64())],
+            ),
+            (
+                "culturas",
+                Cultura.objects.order_by("pk"),
+                [("id", pa.int64()), ("nome", pa.string())],
+            ),
+        ]
+        for nome, queryset, campos in tabelas:
+            schema = pa.schema(campos)
+            lotes = (
+                self.colunas(lote, schema.names)
+                for lote in self.ler_em_lotes(queryset, schema.names)
+            )
+            yield nome, schema, lotes
@@ -0,0 +1,101 @@
+import hashlib
+import json
+from datetime import timedelta
+
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from core.models import ChaveIdempotencia
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAY_HEADER = "Idempotent-Replayed"
+
+
+class IdempotentCreateMixin:
+    """
+    Mixin para ViewSets cujo create() aceita o cabeçalho Idempotency-Key.
+
+    A primeira requisição grava a resposta junto com a criação, na mesma
+    transação. Repetições com a mesma chave são respondidas com a resposta
+    gravada, sem validar o payload nem consultar as tabelas principais.
+    Requisições concorrentes com a mesma chave esperam no índice único até a
+    primeira terminar e então recebem a mesma resposta. Reutilizar a chave com
+    outro payload retorna 422.
+    """
+
+    def create(self, request, *args, **kwargs):
+        chave = request.headers.get(IDEMPOTENCY_HEADER)
+        if chave is None:
+            return super().create(request, *args, **kwargs)
+        if not chave or len(chave) > 255:
+            raise ValidationError(
+                {IDEMPOTENCY_HEADER: "Informe uma chave com até 255 caracteres"}
+            )
+
+        hash_requisicao = self.hash_requisicao(request)
+        registro = self.get_registro_idempotencia(request, chave)
+        if registro is not None:
+            return self.replay(registro, hash_requisicao)
+
+        agora = timezone.now()
+        ChaveIdempotencia.objects.filter(
+            usuario=request.user, chave=chave, expira_em__lte=agora
+        ).delete()
+        try:
+            with transaction.atomic():
+                registro = ChaveIdempotencia.objects.create(
+                    usuario=request.user,
+                    chave=chave,
+                    endpoint=request.path,
+                    hash_requisicao=hash_requisicao,
+                    expira_em=agora
+                    + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS),
+                )
+                response = super().create(request, *args, **kwargs)
+                registro.status_code = response.status_code
+                registro.resposta = response.data
+                registro.save(update_fields=["status_code", "resposta"])
+        except IntegrityError:
+            # Outra requisição com a mesma chave foi confirmada primeiro
+            registro = self.get_registro_idempotencia(request, chave)
+            if registro is None:
+                raise
+            return self.replay(registro, hash_requisicao)
+        return response
+
+    @staticmethod
+    def hash_requisicao(request) -> str:
+        conteudo = json.dumps(
+            [request.method, request.path, request.data],
+            sort_keys=True,
+            cls=DjangoJSONEncoder,
+        )
+        return hashlib.sha256(conteudo.encode()).hexdigest()
+
+    @staticmethod
+    def get_registro_idempotencia(request, chave: str):
+        return ChaveIdempotencia.objects.filter(
+            usuario=request.user, chave=chave, expira_em__gt=timezone.now()
+        ).first()
+
+    @staticmethod
+    def replay(registro: ChaveIdempotencia, hash_requisicao: str) -> Response:
+        if registro.hash_requisicao != hash_requisicao:
+            return Response(
+                {
+                    "detail": "Idempotency-Key já utilizada com outro conteúdo "
+                    "de requisição"
+                },
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        return Response(
+            registro.resposta,
+            status=registro.status_code,
+            headers={REPLAY_HEADER: "true"},
+        )
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import logging
+import secrets
+
+from asgiref.sync import sync_to_async
+from rest_framework.utils.encoders import JSONEncoder
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.db import models
+
+from core.dashboard import dados_graficos
+from core.models import RegistroAlteracao
+
+logger = logging.getLogger(__name__)
+
+TICKET_SALT = "core.live.stream"
+TICKET_USADO_KEY = "live:ticket:{}"
+
+
+def emitir_ticket(user) -> str:
+    """
+    Ticket assinado para abrir o stream: vale só para ele, por
+    LIVE_DASHBOARD_TICKET_SECONDS e uma única vez. O EventSource não envia
+    cabeçalhos, e o ticket evita colocar o token de acesso na URL.
+    """
+    return signing.dumps(
+        {"usuario": user.pk, "nonce": secrets.token_urlsafe(16)}, salt=TICKET_SALT
+    )
+
+
+def usar_ticket(ticket: str):
+    """Usuário ativo do ticket, ou None se for inválido, expirado ou já usado."""
+    try:
+        dados = signing.loads(
+            ticket, salt=TICKET_SALT, max_age=settings.LIVE_DASHBOARD_TICKET_SECONDS
+        )
+    except signing.BadSignature:
+        return None
+    if not cache.add(
+        TICKET_USADO_KEY.format(dados["nonce"]),
+        True,
+        settings.LIVE_DASHBOARD_TICKET_SECONDS,
+    ):
+        return None
+    return get_user_model().objects.filter(pk=dados["usuario"], is_active=True).first()
+
+
+def ultimo_cursor():
+    # Mesmo cursor do change feed: o pk não segue a ordem de confirmação
+    RegistroAlteracao.objects.sequenciar()
+    return RegistroAlteracao.objects.aggregate(cursor=models.Max("sequencia"))["cursor"]
+
+
+def dados_graficos_json() -> dict:
+    # Passa pelo encoder do DRF para converter querysets e Decimals
+    return json.loads(json.dumps(dados_graficos(), cls=JSONEncoder))
+
+
+class GraphicsBroadcaster:
+    """
+    Mantém uma única agregação dos gráficos por processo e a distribui para
+    todos os clientes conectados. A cada intervalo, se o log de alterações
+    andou, os gráficos são recalculados uma vez e apenas as chaves alteradas
+    são enviadas; alterações em massa no intervalo viram um único evento.
+
+    Cada cliente tem uma fila limitada. Se ela encher, os deltas pendentes
+    são descartados e substituídos pelo snapshot completo.
+    """
+
+    def __init__(self, intervalo: float = None, tamanho_fila: int = None):
+        self.intervalo = intervalo or settings.LIVE_DASHBOARD_INTERVAL_SECONDS
+        self.tamanho_fila = tamanho_fila or settings.LIVE_DASHBOARD_QUEUE_SIZE
+        self.clientes = set()
+        self.cursor = None
+        self.dados = None
+        self.task = None
+
+    async def subscribe(self) -> asyncio.Queue:
+        if self.dados is None:
+            await self.atualizar()
+        fila = asyncio.Queue(maxsize=self.tamanho_fila)
+        fila.put_nowait(self.snapshot())
+        self.clientes.add(fila)
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.run())
+        return fila
+
+    def unsubscribe(self, fila: asyncio.Queue):
+        self.clientes.discard(fila)
+        if not self.clientes and self.task is not None:
+            self.task.cancel()
+            self.task = None
+            # Sem clientes os dados ficam desatualizados
+            self.dados = None
+
+    async def run(self):
+        while self.clientes:
+            await asyncio.sleep(self.intervalo)
+            try:
+                await self.atualizar()
+            except Exception:
+                logger.exception("Falha ao atualizar o dashboard ao vivo")
+
+    async def atualizar(self):
+        cursor = await sync_to_async(ultimo_cursor)()
+        if self.dados is not None and cursor == self.cursor:
+            return
+        dados = await sync_to_async(dados_graficos_json)()
+        anteriores, self.dados, self.cursor = self.dados, dados, cursor
+        if anteriores is None:
+            return
+        delta = {
+            chave: valor
+            for chave, valor in dados.items()
+            if anteriores.get(chave) != valor
+        }
+        if delta:
+            self.publicar({"tipo": "delta", "cursor": cursor, "dados": delta})
+
+    def snapshot(self) -> dict:
+        return {"tipo": "snapshot", "cursor": self.cursor, "dados": self.dados}
+
+    def publicar(self, evento: dict):
+        for fila in self.clientes:
+            if fila.full():
+                while not fila.empty():
+                    fila.get_nowait()
+                fila.put_nowait(self.snapshot())
+            else:
+                fila.put_nowait(evento)
+
+
+broadcaster = GraphicsBroadcaster()
+
+
+def formatar_evento(evento: dict) -> str:
+    return (
+        f"event: {evento['tipo']}\n"
+        f"id: {evento['cursor'] or 0}\n"
+        f"data: {json.dumps(evento['dados'], separators=(',', ':'))}\n\n"
+    )
+
+
+async def eventos(fila: asyncio.Queue):
+    try:
+        while True:
+            try:
+                evento = await asyncio.wait_for(
+                    fila.get(), timeout=settings.LIVE_DASHBOARD_KEEPALIVE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield formatar_evento(evento)
+    finally:
+        broadcaster.unsubscribe(fila)
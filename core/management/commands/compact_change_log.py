@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import RegistroAlteracao
+
+
+class Command(BaseCommand):
+    help = "Remove registros antigos do log de alterações"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None)
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        dias = options["days"] or settings.CHANGE_FEED_RETENTION_DAYS
+        total = RegistroAlteracao.objects.compactar(
+            timezone.now() - timedelta(days=dias), options["batch_size"]
+        )
+        self.stdout.write(f"{total} registro(s) removido(s).")
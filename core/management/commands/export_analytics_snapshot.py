@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.exports import FORMATOS, AnalyticsSnapshot, AnalyticsSnapshotError
+
+
+class Command(BaseCommand):
+    help = "Exporta produtores, fazendas e referências para arquivos Parquet/Arrow"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", default=None)
+        parser.add_argument("--format", choices=FORMATOS, default="parquet")
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Ignora a marca d'água e exporta todas as linhas",
+        )
+        parser.add_argument("--batch-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        try:
+            manifesto = AnalyticsSnapshot(
+                options["output"] or settings.ANALYTICS_SNAPSHOT_DIR,
+                formato=options["format"],
+                completo=options["full"],
+                tamanho_lote=options["batch_size"],
+            ).executar()
+        except AnalyticsSnapshotError as error:
+            raise CommandError(str(error))
+
+        for tabela, total in manifesto["linhas"].items():
+            self.stdout.write(f"{tabela}: {total} linha(s)")
@@ -1,4 +1,41 @@
-from django.db import models
+import threading
+from itertools import islice
+
+from django.db import IntegrityError, connections, models, router, transaction
+from django.db.models.functions import Cast, Least, NullIf, Trunc
+from django.db.models.lookups import Exact
+from django.utils import timezone
+
+from base.cache import GenerationQuerySetMixin
+from base.functions import PercentileCont, WidthBucket
+from base.models import SoftDeleteManager, SoftDeleteQuerySet
+
+
+DISTRIBUICAO_GRUPOS = {
+    "estado": "cidade__estado__sigla",
+    "cultura": "culturas_plantadas__nome",
+}
+DISTRIBUICAO_CAMPOS = ("area_total", "razao_agricultavel_vegetacao")
+DISTRIBUICAO_PERCENTIS = (0.25, 0.5, 0.75, 0.9)
+# Reduções da série de totais diários para o Trunc do banco
+SERIE_INTERVALOS = {"semana": "week", "mes": "month"}
+
+
+def filtrar_por_culturas(queryset, culturas, prefixo: str = ""):
+    """
+    Filtra as fazendas que têm todas as `culturas`. Culturas com bit são
+    testadas no bitmask da própria fazenda; as demais, pela tabela M2M.
+    """
+    mascara = 0
+    for cultura in culturas:
+        if cultura.bit is None:
+            queryset = queryset.filter(**{f"{prefixo}culturas_plantadas": cultura})
+        mascara |= cultura.mascara
+    if mascara:
+        queryset = queryset.filter(
+            FazendaQuerySet.filtro_bits(mascara, f"{prefixo}culturas_bitmask")
+        )
+    return queryset
 
 
 class EstadoManager(models.Manager):
@@ -6,11 +43,445 @@ class EstadoManager(models.Manager):
         return self.get(sigla=sigla)
 
 
-class FazendaQuerySet(models.QuerySet):
+class ProdutorRuralQuerySet(GenerationQuerySetMixin, SoftDeleteQuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create não chama save(), que mantém identificador e tipo
+        objs = list(objs)
+        for produtor in objs:
+            produtor.limpar_documentos()
+            produtor.preencher_identificador()
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def com_culturas(self, *culturas):
+        """Produtores cuja fazenda tem todas as culturas informadas."""
+        return filtrar_por_culturas(self, culturas, prefixo="fazenda__")
+
+
+class FazendaQuerySet(GenerationQuerySetMixin, SoftDeleteQuerySet):
+    # Subfaixas por faixa usadas para aproximar percentis fora do PostgreSQL
+    SUBFAIXAS = 64
+    TAMANHO_LOTE = 2000
+
+    def adicionar_cultura(self, cultura) -> int:
+        """
+        Vincula a cultura às fazendas do queryset em lotes. Os vínculos são
+        registrados no log de alterações pelo m2m_changed e atualizado_em é
+        atualizado com um UPDATE por lote.
+        """
+        ids = self.exclude(culturas_plantadas=cultura).values_list("pk", flat=True)
+        return self._alterar_culturas_em_lotes(ids, cultura.fazendas.add)
+
+    def remover_cultura(self, cultura) -> int:
+        ids = self.filter(culturas_plantadas=cultura).values_list("pk", flat=True)
+        return self._alterar_culturas_em_lotes(ids, cultura.fazendas.remove)
+
+    def _alterar_culturas_em_lotes(self, ids, alterar) -> int:
+        total = 0
+        with transaction.atomic():
+            ids = iter(list(ids))
+            while lote := list(islice(ids, self.TAMANHO_LOTE)):
+                alterar(*lote)
+                self.model.objects.filter(pk__in=lote).update(
+                    atualizado_em=timezone.now()
+                )
+                total += len(lote)
+        return total
+
     def total_fazendas_por_estado(self):
         return self.values("cidade__estado__nome").annotate(total=models.Count("id"))
 
-    def total_fazendas_por_cultura(self):
-        return self.values("culturas_plantadas__nome").annotate(
-            total=models.Count("id")
+    @property
+    def culturas(self):
+        return self.model.culturas_plantadas.field.related_model.objects
+
+    @staticmethod
+    def filtro_bits(mascara: int, campo: str = "culturas_bitmask"):
+        return Exact(models.F(campo).bitand(mascara), mascara)
+
+    def com_culturas(self, *culturas):
+        """Fazendas com todas as culturas informadas."""
+        return filtrar_por_culturas(self, culturas)
+
+    def recalcular_culturas_bitmask(self) -> int:
+        """Refaz o bitmask das fazendas do queryset a partir da tabela M2M."""
+        with transaction.atomic():
+            total = self.update(culturas_bitmask=0)
+            for cultura in self.culturas.exclude(bit=None):
+                self.filter(culturas_plantadas=cultura).update(
+                    culturas_bitmask=models.F("culturas_bitmask").bitor(cultura.mascara)
+                )
+        return total
+
+    def total_fazendas_por_cultura(self) -> list:
+        """
+        Total de fazendas de cada cultura. As culturas com bit são contadas em
+        uma única varredura da tabela de fazendas.
+        """
+        culturas = list(self.culturas.order_by("pk"))
+        com_bit = [cultura for cultura in culturas if cultura.bit is not None]
+        sem_bit = [cultura for cultura in culturas if cultura.bit is None]
+        totais = {}
+        if com_bit:
+            totais = self.aggregate(
+                **{
+                    f"cultura_{cultura.pk}": models.Count(
+                        "pk", filter=self.filtro_bits(cultura.mascara)
+                    )
+                    for cultura in com_bit
+                }
+            )
+        if sem_bit:
+            totais.update(
+                (f"cultura_{linha['culturas_plantadas']}", linha["total"])
+                for linha in self.filter(culturas_plantadas__in=sem_bit)
+                .values("culturas_plantadas")
+                .annotate(total=models.Count("pk"))
+                .order_by()
+            )
+        return [
+            {"nome": cultura.nome, "total": totais.get(f"cultura_{cultura.pk}", 0)}
+            for cultura in culturas
+        ]
+
+    def metricas_totais(self) -> dict:
+        return {
+            "fazendas": models.Count("pk"),
+            **{campo: models.Sum(campo) for campo in self.model.AREA_FIELDS},
+        }
+
+    def totais_por(self, por: str) -> list:
+        """Total de fazendas e soma das áreas por estado ou por cultura."""
+        queryset = self
+        if por == "cultura":
+            queryset = queryset.filter(culturas_plantadas__isnull=False)
+        return list(
+            queryset.values(chave=models.F(DISTRIBUICAO_GRUPOS[por]))
+            .annotate(**self.metricas_totais())
+            .order_by("chave")
+        )
+
+    def pivo_estado_cultura(self) -> dict:
+        """
+        Matriz estado × cultura com o total de fazendas e a soma das áreas,
+        calculada em uma única consulta agrupada. O resultado é colunar: siglas
+        dos estados em `linhas`, culturas em `colunas` e, para cada métrica, uma
+        lista por estado com um valor por cultura (0 quando não há fazendas).
+        """
+        metricas = self.metricas_totais()
+        grupos = list(
+            self.filter(culturas_plantadas__isnull=False)
+            .values(
+                estado=models.F("cidade__estado__sigla"),
+                cultura=models.F("culturas_plantadas__nome"),
+            )
+            .annotate(**metricas)
+            .order_by()
+        )
+        linhas = sorted({grupo["estado"] for grupo in grupos})
+        colunas = sorted({grupo["cultura"] for grupo in grupos})
+        posicao_linha = {chave: posicao for posicao, chave in enumerate(linhas)}
+        posicao_coluna = {chave: posicao for posicao, chave in enumerate(colunas)}
+        valores = {
+            metrica: [[0] * len(colunas) for _ in linhas] for metrica in metricas
+        }
+        for grupo in grupos:
+            linha = posicao_linha[grupo["estado"]]
+            coluna = posicao_coluna[grupo["cultura"]]
+            valores["fazendas"][linha][coluna] = grupo["fazendas"]
+            for campo in self.model.AREA_FIELDS:
+                valores[campo][linha][coluna] = float(grupo[campo])
+        return {"linhas": linhas, "colunas": colunas, "valores": valores}
+
+    @staticmethod
+    def valor_distribuicao(campo: str):
+        if campo == "area_total":
+            return Cast("area_total_hectares", models.FloatField())
+        if campo == "razao_agricultavel_vegetacao":
+            # Fazendas sem área de vegetação ficam fora da distribuição
+            return Cast("area_agricultavel_hectares", models.FloatField()) / NullIf(
+                Cast("area_vegetacao_hectares", models.FloatField()), 0.0
+            )
+        raise ValueError(f"Campo de distribuição inválido: {campo}")
+
+    def distribuicao(
+        self, campo: str = "area_total", por: str = "estado", quantidade_faixas=10
+    ) -> list:
+        """
+        Histograma (faixas de mesma largura, comuns a todos os grupos) e
+        percentis de `campo` para cada estado ou cultura. No PostgreSQL tudo é
+        calculado no banco com WIDTH_BUCKET e PERCENTILE_CONT; nos demais
+        bancos os valores são lidos uma única vez em lotes e agrupados com
+        NumPy, com percentis aproximados pelas subfaixas do histograma.
+        """
+        queryset = (
+            self.annotate(
+                valor=self.valor_distribuicao(campo),
+                grupo=models.F(DISTRIBUICAO_GRUPOS[por]),
+            )
+            .filter(valor__isnull=False, grupo__isnull=False)
+            .order_by()
+        )
+        limites = queryset.aggregate(
+            minimo=models.Min("valor"), maximo=models.Max("valor")
+        )
+        if limites["minimo"] is None:
+            return []
+        minimo, maximo = limites["minimo"], limites["maximo"]
+        if maximo <= minimo:
+            maximo = minimo + 1
+        largura = (maximo - minimo) / quantidade_faixas
+        bordas = [minimo + largura * indice for indice in range(quantidade_faixas)]
+        bordas.append(maximo)
+
+        if connections[self.db].vendor == "postgresql":
+            grupos = queryset._distribuicao_no_banco(minimo, maximo, quantidade_faixas)
+        else:
+            grupos = queryset._distribuicao_em_lotes(minimo, maximo, quantidade_faixas)
+        return [
+            {
+                "grupo": grupo,
+                "total": dados["total"],
+                "histograma": {"limites": bordas, "contagens": dados["contagens"]},
+                "percentis": dados["percentis"],
+            }
+            for grupo, dados in sorted(grupos.items())
+        ]
+
+    def _distribuicao_no_banco(self, minimo, maximo, quantidade_faixas) -> dict:
+        faixa = Least(
+            WidthBucket(models.F("valor"), minimo, maximo, quantidade_faixas),
+            models.Value(quantidade_faixas),
+        )
+        percentis = {
+            f"p{round(percentil * 100)}": PercentileCont("valor", percentil)
+            for percentil in DISTRIBUICAO_PERCENTIS
+        }
+        grupos = {}
+        for linha in self.values("grupo").annotate(
+            total=models.Count("id"), **percentis
+        ):
+            grupos[linha.pop("grupo")] = {
+                "total": linha.pop("total"),
+                "contagens": [0] * quantidade_faixas,
+                "percentis": linha,
+            }
+        histograma = (
+            self.annotate(faixa=faixa)
+            .values("grupo", "faixa")
+            .annotate(total=models.Count("id"))
+        )
+        for linha in histograma:
+            grupos[linha["grupo"]]["contagens"][linha["faixa"] - 1] = linha["total"]
+        return grupos
+
+    def _distribuicao_em_lotes(self, minimo, maximo, quantidade_faixas) -> dict:
+        import numpy as np
+
+        total_subfaixas = quantidade_faixas * self.SUBFAIXAS
+        largura_subfaixa = (maximo - minimo) / total_subfaixas
+        indices_grupos = {}
+        contagens = np.zeros((0, total_subfaixas), dtype=np.int64)
+
+        linhas = self.values_list("grupo", "valor").iterator(
+            chunk_size=self.TAMANHO_LOTE
+        )
+        while lote := list(islice(linhas, self.TAMANHO_LOTE)):
+            nomes, valores = zip(*lote)
+            grupos = np.fromiter(
+                (
+                    indices_grupos.setdefault(nome, len(indices_grupos))
+                    for nome in nomes
+                ),
+                dtype=np.intp,
+                count=len(nomes),
+            )
+            if len(indices_grupos) > contagens.shape[0]:
+                contagens = np.pad(
+                    contagens, ((0, len(indices_grupos) - contagens.shape[0]), (0, 0))
+                )
+            subfaixas = np.clip(
+                ((np.asarray(valores, dtype=float) - minimo) // largura_subfaixa),
+                0,
+                total_subfaixas - 1,
+            ).astype(np.intp)
+            np.add.at(contagens, (grupos, subfaixas), 1)
+
+        resultado = {}
+        for nome, indice in indices_grupos.items():
+            contagens_grupo = contagens[indice]
+            acumulado = np.cumsum(contagens_grupo)
+            total = int(acumulado[-1])
+            percentis = {}
+            for percentil in DISTRIBUICAO_PERCENTIS:
+                alvo = percentil * total
+                subfaixa = int(np.searchsorted(acumulado, alvo))
+                anterior = acumulado[subfaixa - 1] if subfaixa else 0
+                fracao = (alvo - anterior) / contagens_grupo[subfaixa]
+                percentis[f"p{round(percentil * 100)}"] = float(
+                    minimo + (subfaixa + fracao) * largura_subfaixa
+                )
+            resultado[nome] = {
+                "total": total,
+                "contagens": contagens_grupo.reshape(quantidade_faixas, self.SUBFAIXAS)
+                .sum(axis=1)
+                .tolist(),
+                "percentis": percentis,
+            }
+        return resultado
+
+
+ProdutorRuralManager = SoftDeleteManager.from_queryset(ProdutorRuralQuerySet)
+FazendaManager = SoftDeleteManager.from_queryset(FazendaQuerySet)
+
+
+class RegistroAlteracaoQuerySet(models.QuerySet):
+    # Chave do pg_advisory_xact_lock que serializa sequenciar()
+    SEQUENCIADOR_LOCK = 73_210_001
+    # Serializa sequenciar() entre as threads do processo
+    _sequenciador = threading.Lock()
+
+    def desde(self, cursor: int, limite: int) -> list:
+        return list(self.filter(sequencia__gt=cursor).order_by("sequencia")[:limite])
+
+    def sequenciar(self, tamanho_lote: int = 1000) -> int:
+        """
+        Numera em `sequencia`, na ordem do pk, os registros já confirmados que
+        ainda não têm número. O pk é reservado no INSERT, então uma transação
+        longa pode confirmar um registro com pk menor que o de outro já lido
+        pelo cliente. Como a numeração é serializada pelo lock e só enxerga
+        registros confirmados, quem confirmar depois recebe um número maior
+        que qualquer cursor já entregue.
+
+        Chamado após o commit das escritas (core.signals), pela compactação e
+        pelo dashboard ao vivo, nunca pelas leituras do change feed.
+        """
+        alias = router.db_for_write(self.model)
+        # Pelo índice parcial registro_sem_sequencia; quase sempre não há nada
+        if not self.using(alias).filter(sequencia__isnull=True).exists():
+            return 0
+        total = 0
+        conflitos = 0
+        with self._sequenciador:
+            while True:
+                try:
+                    numerados = self._sequenciar_lote(alias, tamanho_lote)
+                except IntegrityError:
+                    # Sem o advisory lock (SQLite) outro processo pode ter
+                    # numerado o mesmo lote antes; relê os pendentes
+                    conflitos += 1
+                    if connections[alias].vendor == "postgresql" or conflitos > 3:
+                        raise
+                    continue
+                total += numerados
+                if numerados < tamanho_lote:
+                    return total
+
+    def _sequenciar_lote(self, alias: str, tamanho_lote: int) -> int:
+        connection = connections[alias]
+        with transaction.atomic(using=alias):
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT pg_advisory_xact_lock(%s)", [self.SEQUENCIADOR_LOCK]
+                    )
+            queryset = self.using(alias)
+            pendentes = list(
+                queryset.filter(sequencia__isnull=True)
+                .order_by("pk")
+                .only("pk")[:tamanho_lote]
+            )
+            if not pendentes:
+                return 0
+            ultima = queryset.aggregate(ultima=models.Max("sequencia"))["ultima"]
+            for numero, registro in enumerate(pendentes, start=(ultima or 0) + 1):
+                registro.sequencia = numero
+            queryset.bulk_update(pendentes, ["sequencia"])
+        return len(pendentes)
+
+    def compactar(self, antes_de, tamanho_lote: int = 10000) -> int:
+        """
+        Remove em lotes os registros até o último sequenciado antes de
+        `antes_de` e grava essa sequência como marca da compactação: cursores
+        anteriores a ela não podem mais ser atendidos.
+        """
+        self.sequenciar()
+        limite = self.filter(criado_em__lt=antes_de, sequencia__isnull=False).aggregate(
+            limite=models.Max("sequencia")
+        )["limite"]
+        if limite is None:
+            return 0
+        total = 0
+        while True:
+            ids = list(
+                self.filter(sequencia__lte=limite)
+                .order_by("sequencia")
+                .values_list("pk", flat=True)[:tamanho_lote]
+            )
+            if not ids:
+                break
+            total += self.filter(pk__in=ids).delete()[0]
+        self.model.compactacoes().create(sequencia=limite)
+        return total
+
+    def marca_compactacao(self) -> int:
+        """Maior sequência já removida pela compactação (0 se nenhuma)."""
+        return (
+            self.model.compactacoes().aggregate(marca=models.Max("sequencia"))["marca"]
+            or 0
+        )
+
+
+class TotalDiarioQuerySet(models.QuerySet):
+    def no_intervalo(self, inicio=None, fim=None, intervalo: str = "dia"):
+        """
+        Registros entre `inicio` e `fim`. Em "semana" e "mes" cada período é
+        representado pelo seu último dia com snapshot, já que os totais são
+        estoques e não somam entre dias.
+        """
+        queryset = self
+        if inicio is not None:
+            queryset = queryset.filter(data__gte=inicio)
+        if fim is not None:
+            queryset = queryset.filter(data__lte=fim)
+        if intervalo != "dia":
+            ultimos_dias = (
+                queryset.annotate(
+                    periodo=Trunc(
+                        "data",
+                        SERIE_INTERVALOS[intervalo],
+                        output_field=models.DateField(),
+                    )
+                )
+                .values("periodo")
+                .annotate(ultimo_dia=models.Max("data"))
+                .values("ultimo_dia")
+            )
+            queryset = queryset.filter(data__in=ultimos_dias)
+        return queryset
+
+    def serie(self, dimensao: str, inicio=None, fim=None, intervalo="dia") -> dict:
+        """
+        Série colunar da dimensão: `datas`, `chaves` (siglas ou culturas) e,
+        para cada métrica, uma lista por chave com um valor por data (None nos
+        dias em que a chave não aparece).
+        """
+        registros = list(
+            self.filter(dimensao=dimensao)
+            .no_intervalo(inicio, fim, intervalo)
+            .order_by("data", "chave")
         )
+        datas = sorted({registro.data for registro in registros})
+        chaves = sorted({registro.chave for registro in registros})
+        posicao_data = {data: posicao for posicao, data in enumerate(datas)}
+        posicao_chave = {chave: posicao for posicao, chave in enumerate(chaves)}
+        metricas = ["fazendas", *self.model.AREA_FIELDS]
+        valores = {
+            metrica: [[None] * len(datas) for _ in chaves] for metrica in metricas
+        }
+        for registro in registros:
+            linha = posicao_chave[registro.chave]
+            coluna = posicao_data[registro.data]
+            valores["fazendas"][linha][coluna] = registro.fazendas
+            for campo in self.model.AREA_FIELDS:
+                valores[campo][linha][coluna] = float(getattr(registro, campo))
+        return {"datas": datas, "chaves": chaves, "valores": valores}
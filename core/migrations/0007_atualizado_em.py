@@ -0,0 +1,27 @@
+# Generated by Django 5.0.2 on 2026-10-19 12:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_alter_produtorrural_options_alter_produtorrural_cnpj_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="fazenda",
+            name="atualizado_em",
+            field=models.DateTimeField(
+                auto_now=True, db_index=True, verbose_name="Atualizado em"
+            ),
+        ),
+        migrations.AddField(
+            model_name="produtorrural",
+            name="atualizado_em",
+            field=models.DateTimeField(
+                auto_now=True, db_index=True, verbose_name="Atualizado em"
+            ),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.0.2 on 2026-10-19 12:46
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_atualizado_em"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RegistroAlteracao",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "entidade",
+                    models.CharField(
+                        choices=[
+                            ("produtor_rural", "Produtor Rural"),
+                            ("fazenda", "Fazenda"),
+                            ("fazenda_cultura", "Cultura da fazenda"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("objeto_id", models.BigIntegerField()),
+                (
+                    "operacao",
+                    models.CharField(
+                        choices=[
+                            ("I", "Inclusão"),
+                            ("U", "Alteração"),
+                            ("D", "Exclusão"),
+                        ],
+                        max_length=1,
+                    ),
+                ),
+                (
+                    "dados",
+                    models.JSONField(
+                        blank=True,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        null=True,
+                    ),
+                ),
+                ("criado_em", models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                "verbose_name": "Registro de alteração",
+                "verbose_name_plural": "Registros de alteração",
+            },
+        ),
+    ]
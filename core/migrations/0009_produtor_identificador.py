@@ -0,0 +1,91 @@
+# Generated by Django 5.0.2 on 2026-10-19 16:02
+
+from django.db import migrations, models
+
+
+def verifica_documentos(apps, schema_editor):
+    # O identificador passa a ser obrigatório e único, então produtores sem CPF
+    # e sem CNPJ precisam ser corrigidos antes
+    ProdutorRural = apps.get_model("core", "ProdutorRural")
+    sem_documento = models.Q(cpf__isnull=True) | models.Q(cpf="")
+    sem_documento &= models.Q(cnpj__isnull=True) | models.Q(cnpj="")
+    invalidos = list(
+        ProdutorRural.objects.filter(sem_documento)
+        .order_by("pk")
+        .values_list("pk", flat=True)[:20]
+    )
+    if invalidos:
+        raise ValueError(
+            f"Produtores sem CPF e sem CNPJ: corrija os registros {invalidos} de "
+            f"{ProdutorRural._meta.db_table} antes de aplicar a migração"
+        )
+
+
+def preenche_identificador(apps, schema_editor):
+    ProdutorRural = apps.get_model("core", "ProdutorRural")
+    produtores = ProdutorRural.objects.only("cpf", "cnpj")
+    for produtor in produtores.iterator(chunk_size=2000):
+        produtor.identificador = produtor.cnpj or produtor.cpf
+        produtor.tipo = "J" if produtor.cnpj else "F"
+        produtor.save(update_fields=["identificador", "tipo"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_registro_alteracao"),
+    ]
+
+    operations = [
+        migrations.RunPython(verifica_documentos, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name="produtorrural",
+            name="identificador",
+            field=models.CharField(
+                editable=False,
+                max_length=14,
+                null=True,
+                verbose_name="Identificador",
+            ),
+        ),
+        migrations.AddField(
+            model_name="produtorrural",
+            name="tipo",
+            field=models.CharField(
+                choices=[("F", "Física"), ("J", "Jurídica")],
+                editable=False,
+                max_length=1,
+                null=True,
+                verbose_name="Tipo de Produtor Rural",
+            ),
+        ),
+        migrations.RunPython(preenche_identificador, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="produtorrural",
+            name="identificador",
+            field=models.CharField(
+                editable=False,
+                max_length=14,
+                unique=True,
+                verbose_name="Identificador",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="produtorrural",
+            name="tipo",
+            field=models.CharField(
+                choices=[("F", "Física"), ("J", "Jurídica")],
+                editable=False,
+                max_length=1,
+                verbose_name="Tipo de Produtor Rural",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="produtorrural",
+            index=models.Index(
+                fields=["identificador"],
+                name="produtor_identificador_prefixo",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.0.2 on 2026-10-19 13:02
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_produtor_identificador"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChaveIdempotencia",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("chave", models.CharField(max_length=255)),
+                ("endpoint", models.CharField(max_length=255)),
+                ("hash_requisicao", models.CharField(max_length=64)),
+                ("status_code", models.PositiveSmallIntegerField(null=True)),
+                (
+                    "resposta",
+                    models.JSONField(
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        null=True,
+                    ),
+                ),
+                ("criado_em", models.DateTimeField(auto_now_add=True)),
+                ("expira_em", models.DateTimeField(db_index=True)),
+                (
+                    "usuario",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Chave de idempotência",
+                "verbose_name_plural": "Chaves de idempotência",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="chaveidempotencia",
+            constraint=models.UniqueConstraint(
+                fields=("usuario", "chave"), name="chave_idempotencia_unica"
+            ),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.2 on 2026-10-19 17:10
+
+from django.db import migrations
+
+# Índices para a busca por prefixo do admin (istartswith gera
+# UPPER("nome"::text) LIKE UPPER('prefixo%')). Expressões com operator class
+# não são suportadas pelo SQLite, então só são criados no PostgreSQL.
+TABELAS = ("core_cidade", "core_fazenda", "core_produtorrural")
+
+
+def cria_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for tabela in TABELAS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{tabela}_nome_upper_prefixo" '
+            f'ON "{tabela}" ((UPPER("nome"::text)) text_pattern_ops)'
+        )
+
+
+def remove_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for tabela in TABELAS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{tabela}_nome_upper_prefixo"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_chave_idempotencia"),
+    ]
+
+    operations = [
+        migrations.RunPython(cria_indices, remove_indices),
+    ]
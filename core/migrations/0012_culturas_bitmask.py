@@ -0,0 +1,40 @@
+# Generated by Django 5.0.2 on 2026-10-19 13:07
+
+from django.db import migrations, models
+
+
+def preenche_culturas_bitmask(apps, schema_editor):
+    Cultura = apps.get_model("core", "Cultura")
+    Fazenda = apps.get_model("core", "Fazenda")
+    # Um bit por cultura existente, na ordem de criação (até 63)
+    for bit, cultura in enumerate(Cultura.objects.order_by("pk")[:63]):
+        cultura.bit = bit
+        cultura.save(update_fields=["bit"])
+        Fazenda.objects.filter(culturas_plantadas=cultura).update(
+            culturas_bitmask=models.F("culturas_bitmask").bitor(1 << bit)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0011_indices_busca_admin"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cultura",
+            name="bit",
+            field=models.PositiveSmallIntegerField(
+                blank=True, editable=False, null=True, unique=True, verbose_name="Bit"
+            ),
+        ),
+        migrations.AddField(
+            model_name="fazenda",
+            name="culturas_bitmask",
+            field=models.BigIntegerField(
+                default=0, editable=False, verbose_name="Culturas plantadas (bitmask)"
+            ),
+        ),
+        migrations.RunPython(preenche_culturas_bitmask, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,172 @@
+# Generated by Django 5.0.2 on 2026-10-19 13:12
+
+import core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0012_culturas_bitmask"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FazendaArquivada",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("nome", models.CharField(max_length=100)),
+                ("cidade_id", models.BigIntegerField()),
+                (
+                    "area_total_hectares",
+                    models.DecimalField(decimal_places=2, max_digits=10),
+                ),
+                (
+                    "area_agricultavel_hectares",
+                    models.DecimalField(decimal_places=2, max_digits=10),
+                ),
+                (
+                    "area_vegetacao_hectares",
+                    models.DecimalField(decimal_places=2, max_digits=10),
+                ),
+                ("culturas", models.JSONField(default=list)),
+                ("atualizado_em", models.DateTimeField()),
+                ("excluido_em", models.DateTimeField()),
+                ("arquivado_em", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "Fazenda arquivada",
+                "verbose_name_plural": "Fazendas arquivadas",
+            },
+        ),
+        migrations.CreateModel(
+            name="ProdutorRuralArquivado",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("nome", models.CharField(max_length=100)),
+                ("cnpj", models.CharField(max_length=14, null=True)),
+                ("cpf", models.CharField(max_length=11, null=True)),
+                ("identificador", models.CharField(db_index=True, max_length=14)),
+                (
+                    "tipo",
+                    models.CharField(
+                        choices=[("F", "Física"), ("J", "Jurídica")], max_length=1
+                    ),
+                ),
+                ("fazenda_id", models.BigIntegerField()),
+                ("atualizado_em", models.DateTimeField()),
+                ("excluido_em", models.DateTimeField()),
+                ("arquivado_em", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "Produtor Rural arquivado",
+                "verbose_name_plural": "Produtores Rurais arquivados",
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name="produtorrural",
+            name="produtor_identificador_prefixo",
+        ),
+        migrations.AddField(
+            model_name="fazenda",
+            name="excluido_em",
+            field=models.DateTimeField(
+                blank=True, editable=False, null=True, verbose_name="Excluído em"
+            ),
+        ),
+        migrations.AddField(
+            model_name="produtorrural",
+            name="excluido_em",
+            field=models.DateTimeField(
+                blank=True, editable=False, null=True, verbose_name="Excluído em"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="produtorrural",
+            name="cnpj",
+            field=models.CharField(
+                blank=True,
+                default=None,
+                max_length=14,
+                null=True,
+                validators=[core.validators.validate_cnpj],
+                verbose_name="CNPJ",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="produtorrural",
+            name="cpf",
+            field=models.CharField(
+                blank=True,
+                default=None,
+                max_length=11,
+                null=True,
+                validators=[core.validators.validate_cpf],
+                verbose_name="CPF",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="produtorrural",
+            name="identificador",
+            field=models.CharField(
+                editable=False, max_length=14, verbose_name="Identificador"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="fazenda",
+            index=models.Index(
+                condition=models.Q(("excluido_em__isnull", True)),
+                fields=["cidade"],
+                name="fazenda_ativa_cidade",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="fazenda",
+            index=models.Index(
+                condition=models.Q(("excluido_em__isnull", False)),
+                fields=["excluido_em"],
+                name="fazenda_excluida_em",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="produtorrural",
+            index=models.Index(
+                condition=models.Q(("excluido_em__isnull", True)),
+                fields=["identificador"],
+                name="produtor_identificador_prefixo",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="produtorrural",
+            index=models.Index(
+                condition=models.Q(("excluido_em__isnull", False)),
+                fields=["excluido_em"],
+                name="produtor_excluido_em",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="produtorrural",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("excluido_em__isnull", True)),
+                fields=("cpf",),
+                name="produtor_cpf_ativo_unico",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="produtorrural",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("excluido_em__isnull", True)),
+                fields=("cnpj",),
+                name="produtor_cnpj_ativo_unico",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="produtorrural",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("excluido_em__isnull", True)),
+                fields=("identificador",),
+                name="produtor_identificador_ativo_unico",
+            ),
+        ),
+    ]
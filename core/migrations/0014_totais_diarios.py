@@ -0,0 +1,59 @@
+# Generated by Django 5.0.2 on 2026-10-19 13:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0013_exclusao_logica"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TotalDiario",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("data", models.DateField()),
+                (
+                    "dimensao",
+                    models.CharField(
+                        choices=[("estado", "Estado"), ("cultura", "Cultura")],
+                        max_length=10,
+                    ),
+                ),
+                ("chave", models.CharField(max_length=100)),
+                ("fazendas", models.PositiveIntegerField()),
+                (
+                    "area_total_hectares",
+                    models.DecimalField(decimal_places=2, max_digits=16),
+                ),
+                (
+                    "area_agricultavel_hectares",
+                    models.DecimalField(decimal_places=2, max_digits=16),
+                ),
+                (
+                    "area_vegetacao_hectares",
+                    models.DecimalField(decimal_places=2, max_digits=16),
+                ),
+            ],
+            options={
+                "verbose_name": "Total diário",
+                "verbose_name_plural": "Totais diários",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="totaldiario",
+            constraint=models.UniqueConstraint(
+                fields=("dimensao", "data", "chave"), name="total_diario_unico"
+            ),
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.0.2 on 2026-10-19 13:32
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+from base.operations import AddConstraintNotValid
+
+# Linhas existentes que violam as regras são reportadas antes de criar as
+# constraints. No PostgreSQL elas são criadas como NOT VALID e validadas em
+# seguida (base.operations.AddConstraintNotValid), por isso a migração não é
+# atômica.
+CONSTRAINTS = [
+    (
+        "fazenda",
+        models.CheckConstraint(
+            check=models.Q(
+                (
+                    "area_total_hectares__gte",
+                    django.db.models.expressions.CombinedExpression(
+                        models.F("area_agricultavel_hectares"),
+                        "+",
+                        models.F("area_vegetacao_hectares"),
+                    ),
+                )
+            ),
+            name="fazenda_areas_dentro_do_total",
+            violation_error_code="area_hectares_total_error",
+            violation_error_message=(
+                "A soma de área agrícultável e vegetação não pode ser maior que a "
+                "área total da fazenda"
+            ),
+        ),
+    ),
+    (
+        "produtorrural",
+        models.CheckConstraint(
+            check=models.Q(
+                ("cpf__isnull", True), ("cnpj__isnull", True), _connector="OR"
+            ),
+            name="produtor_cpf_e_cnpj_exclusivos",
+        ),
+    ),
+    (
+        "produtorrural",
+        models.CheckConstraint(
+            check=models.Q(
+                ("cpf__isnull", False), ("cnpj__isnull", False), _connector="OR"
+            ),
+            name="produtor_cpf_ou_cnpj_obrigatorio",
+        ),
+    ),
+]
+
+
+def documentos_vazios_para_nulo(apps, schema_editor):
+    ProdutorRural = apps.get_model("core", "ProdutorRural")
+    for campo in ("cpf", "cnpj"):
+        ProdutorRural._base_manager.filter(**{campo: ""}).update(**{campo: None})
+
+
+def verifica_linhas_existentes(model, constraint):
+    invalidos = list(
+        model._base_manager.exclude(constraint.check)
+        .order_by("pk")
+        .values_list("pk", flat=True)[:20]
+    )
+    if invalidos:
+        raise ValueError(
+            f"{constraint.name}: corrija os registros {invalidos} de "
+            f"{model._meta.db_table} antes de aplicar a migração"
+        )
+
+
+def verifica_constraints(apps, schema_editor):
+    for model_name, constraint in CONSTRAINTS:
+        verifica_linhas_existentes(apps.get_model("core", model_name), constraint)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("core", "0014_totais_diarios"),
+    ]
+
+    operations = [
+        migrations.RunPython(documentos_vazios_para_nulo, migrations.RunPython.noop),
+        migrations.RunPython(verifica_constraints, migrations.RunPython.noop),
+        *(
+            AddConstraintNotValid(model_name=model_name, constraint=constraint)
+            for model_name, constraint in CONSTRAINTS
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.0.2 on 2026-10-19 13:50
+
+from django.db import migrations, models
+
+
+def sequencia_inicial(apps, schema_editor):
+    # Os cursores já entregues são ids, então os registros existentes recebem a
+    # sequência igual ao id e a compactação anterior vira a marca inicial
+    RegistroAlteracao = apps.get_model("core", "RegistroAlteracao")
+    CompactacaoRegistros = apps.get_model("core", "CompactacaoRegistros")
+    RegistroAlteracao.objects.update(sequencia=models.F("pk"))
+    primeiro = RegistroAlteracao.objects.aggregate(primeiro=models.Min("pk"))[
+        "primeiro"
+    ]
+    if primeiro and primeiro > 1:
+        CompactacaoRegistros.objects.create(sequencia=primeiro - 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0015_check_constraints"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CompactacaoRegistros",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("sequencia", models.BigIntegerField()),
+                ("executado_em", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "Compactação do log de alterações",
+                "verbose_name_plural": "Compactações do log de alterações",
+            },
+        ),
+        migrations.AddField(
+            model_name="registroalteracao",
+            name="sequencia",
+            field=models.BigIntegerField(blank=True, null=True, unique=True),
+        ),
+        migrations.RunPython(sequencia_inicial, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="registroalteracao",
+            index=models.Index(
+                condition=models.Q(("sequencia__isnull", True)),
+                fields=["id"],
+                name="registro_sem_sequencia",
+            ),
+        ),
+    ]
@@ -1,12 +1,27 @@
 from decimal import Decimal
 
-from django.db import models
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, models, transaction
 from django.utils.translation import gettext_lazy as _
 
-from core.managers import EstadoManager, FazendaQuerySet
+from base.models import SoftDeleteModel
+from core.managers import (
+    EstadoManager,
+    FazendaManager,
+    FazendaQuerySet,
+    ProdutorRuralManager,
+    ProdutorRuralQuerySet,
+    RegistroAlteracaoQuerySet,
+    TotalDiarioQuerySet,
+)
 from core.validators import (
+    AREA_CONSTRAINT,
+    CPF_E_CNPJ_CONSTRAINT,
+    CPF_OU_CNPJ_CONSTRAINT,
     validate_cnpj,
     validate_cpf,
+    AreaHectaresValidationError,
     CnpjOrCpfRequiredValidationError,
     CnpAndCnpjValidationError,
 )
@@ -40,14 +55,53 @@ class Cultura(models.Model):
         "Café",
         "Cana de Açúcar",
     ]
+    # Bits disponíveis em Fazenda.culturas_bitmask (BIGINT com sinal)
+    TOTAL_BITS = 63
 
     nome = models.CharField(max_length=100, unique=True)
+    # Posição da cultura em Fazenda.culturas_bitmask. Culturas criadas depois
+    # de esgotados os bits ficam sem bit e são consultadas pela tabela M2M.
+    bit = models.PositiveSmallIntegerField(
+        _("Bit"), null=True, blank=True, unique=True, editable=False
+    )
 
     def __str__(self):
         return self.nome
 
+    def save(self, *args, **kwargs):
+        if not (self._state.adding and self.bit is None):
+            return super().save(*args, **kwargs)
+        # Duas criações simultâneas podem escolher o mesmo bit; quem perde a
+        # disputa no índice único tenta de novo com o próximo bit livre
+        for tentativa in range(self.TOTAL_BITS):
+            self.bit = self.proximo_bit_livre()
+            try:
+                with transaction.atomic(using=kwargs.get("using")):
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if (
+                    self.bit is None
+                    or not Cultura.objects.filter(bit=self.bit).exists()
+                ):
+                    raise
+        raise IntegrityError("Não foi possível reservar um bit para a cultura")
+
+    @classmethod
+    def proximo_bit_livre(cls):
+        ocupados = set(cls.objects.exclude(bit=None).values_list("bit", flat=True))
+        return next((bit for bit in range(cls.TOTAL_BITS) if bit not in ocupados), None)
+
+    @property
+    def mascara(self) -> int:
+        return 0 if self.bit is None else 1 << self.bit
+
 
-class Fazenda(models.Model):
+# Apenas registros ativos; os excluídos logicamente ficam em `todos`
+ATIVO = models.Q(excluido_em__isnull=True)
+EXCLUIDO = models.Q(excluido_em__isnull=False)
+
+
+class Fazenda(SoftDeleteModel):
     AREA_FIELDS = [
         "area_total_hectares",
         "area_agricultavel_hectares",
@@ -65,7 +119,43 @@ class Fazenda(models.Model):
         _("Área de vegetação em hectares"), max_digits=10, decimal_places=2
     )
     culturas_plantadas = models.ManyToManyField("Cultura", related_name="fazendas")
-    objects = FazendaQuerySet.as_manager()
+    # Cópia de culturas_plantadas com um bit por cultura (Cultura.bit), mantida
+    # pelo m2m_changed. Permite filtrar e contar por cultura sem join.
+    culturas_bitmask = models.BigIntegerField(
+        _("Culturas plantadas (bitmask)"), default=0, editable=False
+    )
+    # Alterado em todo save(), inclusive quando as culturas são editadas pelo
+    # serializer ou pelo admin. Escritas em lote devem atualizá-lo explicitamente.
+    atualizado_em = models.DateTimeField(
+        _("Atualizado em"), auto_now=True, db_index=True
+    )
+    objects = FazendaManager()
+    todos = FazendaQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # Mesma regra do FazendaSerializer.validate, garantida também para
+            # escritas em lote
+            models.CheckConstraint(
+                check=models.Q(
+                    area_total_hectares__gte=models.F("area_agricultavel_hectares")
+                    + models.F("area_vegetacao_hectares")
+                ),
+                name=AREA_CONSTRAINT,
+                violation_error_code=AreaHectaresValidationError.default_code,
+                violation_error_message=AreaHectaresValidationError.default_detail,
+            ),
+        ]
+        indexes = [
+            # Índices parciais: os agregados do dashboard só leem fazendas
+            # ativas e o arquivamento só lê as excluídas
+            models.Index(
+                fields=["cidade"], name="fazenda_ativa_cidade", condition=ATIVO
+            ),
+            models.Index(
+                fields=["excluido_em"], name="fazenda_excluida_em", condition=EXCLUIDO
+            ),
+        ]
 
     def __str__(self):
         return self.nome
@@ -81,12 +171,15 @@ class Fazenda(models.Model):
         )
 
 
-class ProdutorRural(models.Model):
+class ProdutorRural(SoftDeleteModel):
+    class TipoPessoa(models.TextChoices):
+        FISICA = "F", _("Física")
+        JURIDICA = "J", _("Jurídica")
+
     nome = models.CharField(max_length=100)
     cnpj = models.CharField(
         _("CNPJ"),
         max_length=14,
-        unique=True,
         null=True,
         blank=True,
         default=None,
@@ -95,34 +188,98 @@ class ProdutorRural(models.Model):
     cpf = models.CharField(
         _("CPF"),
         max_length=11,
-        unique=True,
         null=True,
         blank=True,
         default=None,
         validators=[validate_cpf],
     )
     fazenda = models.ForeignKey(Fazenda, on_delete=models.CASCADE)
-    # identificador = models.CharField(
-    #     _("Identificador"),
-    #     max_length=14,
-    #     unique=True,
-    # )
-    # tipo = models.CharField(
-    #     _("Tipo de Produtor Rural"),
-    #     max_length=1,
-    #     choices=[(PESSOA_FISICA, "Física"), (PESSOA_JURIDICA, "Jurídica")],
-    # )
-    #
+    atualizado_em = models.DateTimeField(
+        _("Atualizado em"), auto_now=True, db_index=True
+    )
+    objects = ProdutorRuralManager()
+    todos = ProdutorRuralQuerySet.as_manager()
+    # CPF ou CNPJ apenas com dígitos, mantido no save(), para busca por prefixo
+    identificador = models.CharField(_("Identificador"), max_length=14, editable=False)
+    tipo = models.CharField(
+        _("Tipo de Produtor Rural"),
+        max_length=1,
+        choices=TipoPessoa.choices,
+        editable=False,
+    )
+
     # localizacao = models.PointField()
     # limites = models.PolygonField()
 
     class Meta:
         verbose_name = _("Produtor Rural")
         verbose_name_plural = _("Produtores Rurais")
+        # CPF/CNPJ só são únicos entre os produtores ativos, para que um
+        # produtor excluído possa ser cadastrado novamente
+        constraints = [
+            models.UniqueConstraint(
+                fields=["cpf"], name="produtor_cpf_ativo_unico", condition=ATIVO
+            ),
+            models.UniqueConstraint(
+                fields=["cnpj"], name="produtor_cnpj_ativo_unico", condition=ATIVO
+            ),
+            models.UniqueConstraint(
+                fields=["identificador"],
+                name="produtor_identificador_ativo_unico",
+                condition=ATIVO,
+            ),
+            # As regras do clean(), garantidas também para escritas em lote.
+            # CPF/CNPJ vazios são gravados como NULL (limpar_documentos)
+            models.CheckConstraint(
+                check=models.Q(cpf__isnull=True) | models.Q(cnpj__isnull=True),
+                name=CPF_E_CNPJ_CONSTRAINT,
+            ),
+            models.CheckConstraint(
+                check=models.Q(cpf__isnull=False) | models.Q(cnpj__isnull=False),
+                name=CPF_OU_CNPJ_CONSTRAINT,
+            ),
+        ]
+        indexes = [
+            # varchar_pattern_ops permite LIKE 'prefixo%' usar o índice no
+            # PostgreSQL independente da collation (ignorado nos outros bancos)
+            models.Index(
+                fields=["identificador"],
+                name="produtor_identificador_prefixo",
+                opclasses=["varchar_pattern_ops"],
+                condition=ATIVO,
+            ),
+            models.Index(
+                fields=["excluido_em"], name="produtor_excluido_em", condition=EXCLUIDO
+            ),
+        ]
 
     def __str__(self):
         return self.nome
 
+    def save(self, *args, **kwargs):
+        self.limpar_documentos()
+        self.preencher_identificador()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"cpf", "cnpj"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "identificador", "tipo"}
+        super().save(*args, **kwargs)
+
+    def get_constraints(self):
+        # As CheckConstraints de CPF/CNPJ repetem o clean(), que já levanta os
+        # erros do core.validators no full_clean()
+        return [
+            (
+                model,
+                [
+                    constraint
+                    for constraint in constraints
+                    if constraint.name
+                    not in (CPF_E_CNPJ_CONSTRAINT, CPF_OU_CNPJ_CONSTRAINT)
+                ],
+            )
+            for model, constraints in super().get_constraints()
+        ]
+
     def clean(self):
         if self.cnpj and self.cpf:
             raise CnpAndCnpjValidationError()
@@ -130,6 +287,17 @@ class ProdutorRural(models.Model):
         if not self.cnpj and not self.cpf:
             raise CnpjOrCpfRequiredValidationError()
 
+    def limpar_documentos(self):
+        # Vazio conta como ausente, e as CheckConstraints só tratam NULL assim
+        self.cpf = self.cpf or None
+        self.cnpj = self.cnpj or None
+
+    def preencher_identificador(self):
+        self.identificador = self.format_identificador_save_class(
+            self.cnpj or self.cpf or ""
+        )
+        self.tipo = self.TipoPessoa.JURIDICA if self.cnpj else self.TipoPessoa.FISICA
+
     @staticmethod
     def format_identificador_save_class(identificador: str) -> str:
         return identificador.replace(".", "").replace("-", "").replace("/", "")
@@ -150,3 +318,180 @@ class ProdutorRural(models.Model):
 
     def format_cpf(self) -> str:
         return f"{self.cpf[:3]}.{self.cpf[3:6]}.{self.cpf[6:9]}-{self.cpf[9:]}"
+
+
+class RegistroAlteracao(models.Model):
+    """
+    Log de alterações (append-only) de produtores, fazendas e das culturas de
+    cada fazenda, gravado na mesma transação da alteração. A `sequencia`,
+    atribuída depois da confirmação por RegistroAlteracaoQuerySet.sequenciar,
+    é o cursor do endpoint de sincronização incremental.
+    """
+
+    class Entidade(models.TextChoices):
+        PRODUTOR_RURAL = "produtor_rural", _("Produtor Rural")
+        FAZENDA = "fazenda", _("Fazenda")
+        FAZENDA_CULTURA = "fazenda_cultura", _("Cultura da fazenda")
+
+    class Operacao(models.TextChoices):
+        INSERT = "I", _("Inclusão")
+        UPDATE = "U", _("Alteração")
+        DELETE = "D", _("Exclusão")
+
+    entidade = models.CharField(max_length=20, choices=Entidade.choices)
+    objeto_id = models.BigIntegerField()
+    operacao = models.CharField(max_length=1, choices=Operacao.choices)
+    dados = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    criado_em = models.DateTimeField(auto_now_add=True, db_index=True)
+    sequencia = models.BigIntegerField(null=True, blank=True, unique=True)
+    objects = RegistroAlteracaoQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _("Registro de alteração")
+        verbose_name_plural = _("Registros de alteração")
+        indexes = [
+            models.Index(
+                fields=["id"],
+                name="registro_sem_sequencia",
+                condition=models.Q(sequencia__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.entidade}:{self.objeto_id} {self.operacao}"
+
+    @staticmethod
+    def compactacoes():
+        return CompactacaoRegistros.objects
+
+    @staticmethod
+    def dados_instancia(instance: models.Model) -> dict:
+        return {
+            field.attname: field.value_from_object(instance)
+            for field in instance._meta.concrete_fields
+        }
+
+
+class CompactacaoRegistros(models.Model):
+    """Maior sequência do log de alterações removida em cada compactação."""
+
+    sequencia = models.BigIntegerField()
+    executado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Compactação do log de alterações")
+        verbose_name_plural = _("Compactações do log de alterações")
+
+    def __str__(self):
+        return f"{self.sequencia} ({self.executado_em})"
+
+
+class ChaveIdempotencia(models.Model):
+    """
+    Resposta gravada para um Idempotency-Key. É inserida na mesma transação da
+    criação, então uma requisição concorrente com a mesma chave fica bloqueada
+    no índice único até a primeira terminar.
+    """
+
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    chave = models.CharField(max_length=255)
+    endpoint = models.CharField(max_length=255)
+    hash_requisicao = models.CharField(max_length=64)
+    # Preenchidos ao fim da criação, ainda dentro da transação
+    status_code = models.PositiveSmallIntegerField(null=True)
+    resposta = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    expira_em = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name = _("Chave de idempotência")
+        verbose_name_plural = _("Chaves de idempotência")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["usuario", "chave"], name="chave_idempotencia_unica"
+            ),
+        ]
+
+    def __str__(self):
+        return self.chave
+
+
+class FazendaArquivada(models.Model):
+    """
+    Fazenda excluída logicamente e movida para fora da tabela principal pelo
+    job core.archive_deleted_rows. Mantém o id original.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    nome = models.CharField(max_length=100)
+    cidade_id = models.BigIntegerField()
+    area_total_hectares = models.DecimalField(max_digits=10, decimal_places=2)
+    area_agricultavel_hectares = models.DecimalField(max_digits=10, decimal_places=2)
+    area_vegetacao_hectares = models.DecimalField(max_digits=10, decimal_places=2)
+    culturas = models.JSONField(default=list)
+    atualizado_em = models.DateTimeField()
+    excluido_em = models.DateTimeField()
+    arquivado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Fazenda arquivada")
+        verbose_name_plural = _("Fazendas arquivadas")
+
+    def __str__(self):
+        return self.nome
+
+
+class ProdutorRuralArquivado(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    nome = models.CharField(max_length=100)
+    cnpj = models.CharField(max_length=14, null=True)
+    cpf = models.CharField(max_length=11, null=True)
+    identificador = models.CharField(max_length=14, db_index=True)
+    tipo = models.CharField(max_length=1, choices=ProdutorRural.TipoPessoa.choices)
+    fazenda_id = models.BigIntegerField()
+    atualizado_em = models.DateTimeField()
+    excluido_em = models.DateTimeField()
+    arquivado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Produtor Rural arquivado")
+        verbose_name_plural = _("Produtores Rurais arquivados")
+
+    def __str__(self):
+        return self.nome
+
+
+class TotalDiario(models.Model):
+    """
+    Série temporal dos totais do dashboard: um registro por dia, dimensão
+    (estado ou cultura) e chave (sigla do estado ou nome da cultura), gravado
+    pelo job core.snapshot_daily_totals.
+    """
+
+    AREA_FIELDS = Fazenda.AREA_FIELDS
+
+    class Dimensao(models.TextChoices):
+        ESTADO = "estado", _("Estado")
+        CULTURA = "cultura", _("Cultura")
+
+    data = models.DateField()
+    dimensao = models.CharField(max_length=10, choices=Dimensao.choices)
+    chave = models.CharField(max_length=100)
+    fazendas = models.PositiveIntegerField()
+    area_total_hectares = models.DecimalField(max_digits=16, decimal_places=2)
+    area_agricultavel_hectares = models.DecimalField(max_digits=16, decimal_places=2)
+    area_vegetacao_hectares = models.DecimalField(max_digits=16, decimal_places=2)
+    objects = TotalDiarioQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _("Total diário")
+        verbose_name_plural = _("Totais diários")
+        constraints = [
+            # Também atende às consultas por dimensão e intervalo de datas
+            models.UniqueConstraint(
+                fields=["dimensao", "data", "chave"], name="total_diario_unico"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.data} {self.dimensao}:{self.chave}"
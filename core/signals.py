@@ -0,0 +1,164 @@
+from django.db import models, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from base.cache import track_generations
+from base.models import post_soft_delete
+from core.models import (
+    Cidade,
+    Cultura,
+    Estado,
+    Fazenda,
+    ProdutorRural,
+    RegistroAlteracao,
+)
+
+ENTIDADES = {
+    ProdutorRural: RegistroAlteracao.Entidade.PRODUTOR_RURAL,
+    Fazenda: RegistroAlteracao.Entidade.FAZENDA,
+}
+
+# Gerações usadas nas chaves do cache de resultados da API
+track_generations(ProdutorRural, Fazenda, Cidade, Estado, Cultura)
+
+
+def sequenciar_apos_commit():
+    # Numera os registros na ordem de confirmação, fora das leituras do change
+    # feed. Uma falha aqui não desfaz a escrita: a próxima chamada numera os
+    # registros que ficaram pendentes.
+    transaction.on_commit(RegistroAlteracao.objects.sequenciar, robust=True)
+
+
+@receiver(post_save, sender=ProdutorRural)
+@receiver(post_save, sender=Fazenda)
+def registrar_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    RegistroAlteracao.objects.create(
+        entidade=ENTIDADES[sender],
+        objeto_id=instance.pk,
+        operacao=(
+            RegistroAlteracao.Operacao.INSERT
+            if created
+            else RegistroAlteracao.Operacao.UPDATE
+        ),
+        dados=RegistroAlteracao.dados_instancia(instance),
+    )
+    sequenciar_apos_commit()
+
+
+@receiver(post_delete, sender=ProdutorRural)
+@receiver(post_delete, sender=Fazenda)
+def registrar_delete(sender, instance, **kwargs):
+    if instance.excluido_em is not None:
+        # Já registrado na exclusão lógica (ex: arquivamento)
+        return
+    RegistroAlteracao.objects.create(
+        entidade=ENTIDADES[sender],
+        objeto_id=instance.pk,
+        operacao=RegistroAlteracao.Operacao.DELETE,
+    )
+    sequenciar_apos_commit()
+
+
+@receiver(post_soft_delete, sender=ProdutorRural)
+@receiver(post_soft_delete, sender=Fazenda)
+def registrar_exclusao_logica(sender, pks, **kwargs):
+    RegistroAlteracao.objects.bulk_create(
+        RegistroAlteracao(
+            entidade=ENTIDADES[sender],
+            objeto_id=pk,
+            operacao=RegistroAlteracao.Operacao.DELETE,
+        )
+        for pk in sorted(pks)
+    )
+    sequenciar_apos_commit()
+
+
+@receiver(m2m_changed, sender=Fazenda.culturas_plantadas.through)
+def registrar_culturas(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear":
+        # Guarda os vínculos atuais para registrar as exclusões no post_clear
+        relacionados = (
+            instance.fazendas if reverse else instance.culturas_plantadas
+        ).values_list("pk", flat=True)
+        instance._pks_removidos = set(relacionados)
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if action == "post_clear":
+        pk_set = getattr(instance, "_pks_removidos", set())
+    if not pk_set:
+        return
+
+    operacao = (
+        RegistroAlteracao.Operacao.INSERT
+        if action == "post_add"
+        else RegistroAlteracao.Operacao.DELETE
+    )
+    vinculos = (
+        [(fazenda_id, instance.pk) for fazenda_id in pk_set]
+        if reverse
+        else [(instance.pk, cultura_id) for cultura_id in pk_set]
+    )
+    RegistroAlteracao.objects.bulk_create(
+        RegistroAlteracao(
+            entidade=RegistroAlteracao.Entidade.FAZENDA_CULTURA,
+            objeto_id=fazenda_id,
+            operacao=operacao,
+            dados={"cultura_id": cultura_id},
+        )
+        for fazenda_id, cultura_id in sorted(vinculos)
+    )
+    sequenciar_apos_commit()
+
+
+@receiver(m2m_changed, sender=Fazenda.culturas_plantadas.through)
+def atualizar_culturas_bitmask(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    bitmask = models.F("culturas_bitmask")
+    if reverse:
+        # cultura.fazendas.add/remove/clear: um UPDATE para todas as fazendas
+        if instance.bit is None:
+            return
+        fazendas = Fazenda.todos.all()
+        if action == "post_add":
+            fazendas.filter(pk__in=pk_set).update(
+                culturas_bitmask=bitmask.bitor(instance.mascara)
+            )
+            return
+        if action == "post_remove":
+            fazendas = fazendas.filter(pk__in=pk_set)
+        fazendas.filter(Fazenda.objects.filtro_bits(instance.mascara)).update(
+            culturas_bitmask=bitmask.bitand(~instance.mascara)
+        )
+        return
+
+    if action == "post_clear":
+        instance.culturas_bitmask = 0
+        Fazenda.todos.filter(pk=instance.pk).update(culturas_bitmask=0)
+        return
+    mascara = 0
+    for bit in Cultura.objects.filter(pk__in=pk_set, bit__isnull=False).values_list(
+        "bit", flat=True
+    ):
+        mascara |= 1 << bit
+    if not mascara:
+        return
+    if action == "post_add":
+        instance.culturas_bitmask |= mascara
+        expressao = bitmask.bitor(mascara)
+    else:
+        instance.culturas_bitmask &= ~mascara
+        expressao = bitmask.bitand(~mascara)
+    Fazenda.todos.filter(pk=instance.pk).update(culturas_bitmask=expressao)
+
+
+@receiver(post_delete, sender=Cultura)
+def remover_bit_cultura(sender, instance, **kwargs):
+    # Os vínculos são removidos em cascata, sem m2m_changed
+    if instance.bit is not None:
+        Fazenda.todos.filter(Fazenda.objects.filtro_bits(instance.mascara)).update(
+            culturas_bitmask=models.F("culturas_bitmask").bitand(~instance.mascara)
+        )
@@ -0,0 +1,53 @@
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from core import dashboard
+from core.archive import arquivar_excluidos
+from core.exports import AnalyticsSnapshot
+from core.models import ChaveIdempotencia, RegistroAlteracao
+from jobs.registry import task
+
+
+@task("core.recompute_dashboard")
+def recompute_dashboard(quantidade_faixas: int = None) -> dict:
+    quantidade_faixas = quantidade_faixas or settings.DASHBOARD_DEFAULT_BINS
+    return {"distribuicoes": dashboard.recalcular_distribuicoes(quantidade_faixas)}
+
+
+@task("core.snapshot_daily_totals")
+def snapshot_daily_totals(data: str = None) -> dict:
+    data = date.fromisoformat(data) if data else timezone.localdate()
+    return {
+        "data": data.isoformat(),
+        "registros": dashboard.gravar_totais_diarios(data),
+    }
+
+
+@task("core.export_analytics_snapshot")
+def export_analytics_snapshot(formato: str = "parquet", completo: bool = False) -> dict:
+    return AnalyticsSnapshot(
+        settings.ANALYTICS_SNAPSHOT_DIR, formato=formato, completo=completo
+    ).executar()
+
+
+@task("core.compact_change_log")
+def compact_change_log(dias: int = None) -> dict:
+    dias = dias or settings.CHANGE_FEED_RETENTION_DAYS
+    total = RegistroAlteracao.objects.compactar(timezone.now() - timedelta(days=dias))
+    return {"removidos": total}
+
+
+@task("core.purge_idempotency_keys")
+def purge_idempotency_keys() -> dict:
+    total, _ = ChaveIdempotencia.objects.filter(expira_em__lte=timezone.now()).delete()
+    return {"removidos": total}
+
+
+@task("core.archive_deleted_rows")
+def archive_deleted_rows(dias: int = None) -> dict:
+    dias = dias or settings.ARCHIVE_AFTER_DAYS
+    return arquivar_excluidos(
+        timezone.now() - timedelta(days=dias), settings.ARCHIVE_BATCH_SIZE
+    )
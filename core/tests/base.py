@@ -2,6 +2,15 @@ from core.models import Cidade, Cultura, Estado, Fazenda, ProdutorRural
 from django.test import TestCase
 
 
+def gerar_cpf(numero: int) -> str:
+    """Gera um CPF válido a partir dos 9 primeiros dígitos de `numero`."""
+    digitos = [int(digito) for digito in f"{numero:09d}"[-9:]]
+    for tamanho in (9, 10):
+        valor = sum(d * (tamanho + 1 - i) for i, d in enumerate(digitos[:tamanho]))
+        digitos.append(((valor * 10) % 11) % 10)
+    return "".join(map(str, digitos))
+
+
 class CoreTestMixin:
     def create_cidade(self, estado, nome="Cidade Teste"):
         return Cidade.objects.create(nome=nome, estado=estado)
@@ -0,0 +1,121 @@
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import Fazenda, RegistroAlteracao
+from core.tests.base import CoreTestMixin, gerar_cpf
+from users.models import User
+
+
+class AdminTestCase(CoreTestMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="admin@email.com", password="x", is_admin=True
+        )
+        self.client.force_login(self.user)
+
+    def create_produtores(self, quantidade: int, inicio: int = 123456001):
+        return [
+            self.create_produtor_rural(nome=f"Produtor {numero}", cpf=gerar_cpf(numero))
+            for numero in range(inicio, inicio + quantidade)
+        ]
+
+    def contar_consultas(self, url: str, **params) -> int:
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelists_com_consultas_constantes(self):
+        urls = [
+            reverse("admin:core_produtorrural_changelist"),
+            reverse("admin:core_fazenda_changelist"),
+            reverse("admin:core_cidade_changelist"),
+        ]
+        self.create_produtores(1)
+        antes = [self.contar_consultas(url) for url in urls]
+
+        self.create_produtores(4, inicio=123456101)
+
+        self.assertEqual([self.contar_consultas(url) for url in urls], antes)
+
+    def test_change_form_fazenda_usa_autocomplete(self):
+        fazenda = self.create_produtores(1)[0].fazenda
+        for numero in range(20):
+            self.create_cidade(fazenda.cidade.estado, nome=f"Cidade {numero}")
+
+        response = self.client.get(
+            reverse("admin:core_fazenda_change", args=[fazenda.pk])
+        )
+
+        self.assertContains(response, "admin-autocomplete")
+        self.assertNotContains(response, "Cidade 19")
+
+    def test_autocomplete_cidade(self):
+        estado = self.create_estado()
+        self.create_cidade(estado, nome="São Paulo")
+        self.create_cidade(estado, nome="Santos")
+        response = self.client.get(
+            reverse("admin:autocomplete"),
+            {
+                "app_label": "core",
+                "model_name": "fazenda",
+                "field_name": "cidade",
+                "term": "sã",
+            },
+        )
+
+        self.assertEqual(
+            [item["text"] for item in response.json()["results"]], ["São Paulo"]
+        )
+
+    def test_busca_produtor_por_cpf_formatado(self):
+        produtor = self.create_produtores(2)[0]
+        response = self.client.get(
+            reverse("admin:core_produtorrural_changelist"),
+            {"q": produtor.format_cpf()[:11]},
+        )
+
+        self.assertEqual(list(response.context["cl"].result_list), [produtor])
+
+    def test_acoes_de_cultura_em_lote(self):
+        fazendas = [produtor.fazenda for produtor in self.create_produtores(3)]
+        soja = self.create_cultura("Soja")
+        fazendas[0].culturas_plantadas.add(soja)
+        cursor = RegistroAlteracao.objects.order_by("pk").last().pk
+        url = reverse("admin:core_fazenda_changelist")
+        data = {
+            "action": "adicionar_cultura",
+            "cultura": soja.pk,
+            ACTION_CHECKBOX_NAME: [fazenda.pk for fazenda in fazendas],
+        }
+
+        response = self.client.post(url, data, follow=True)
+
+        self.assertContains(response, "Soja adicionada a 2 fazenda(s).")
+        self.assertEqual(Fazenda.objects.filter(culturas_plantadas=soja).count(), 3)
+        registros = RegistroAlteracao.objects.filter(pk__gt=cursor)
+        self.assertEqual(
+            sorted(registros.values_list("objeto_id", "operacao")),
+            [(fazendas[1].pk, "I"), (fazendas[2].pk, "I")],
+        )
+        self.assertGreater(
+            Fazenda.objects.get(pk=fazendas[1].pk).atualizado_em,
+            fazendas[1].atualizado_em,
+        )
+
+        data["action"] = "remover_cultura"
+        self.client.post(url, data)
+        self.assertFalse(Fazenda.objects.filter(culturas_plantadas=soja).exists())
+
+    def test_acao_sem_cultura(self):
+        fazenda = self.create_produtores(1)[0].fazenda
+        response = self.client.post(
+            reverse("admin:core_fazenda_changelist"),
+            {"action": "adicionar_cultura", ACTION_CHECKBOX_NAME: [fazenda.pk]},
+            follow=True,
+        )
+
+        self.assertContains(response, "Selecione uma cultura.")
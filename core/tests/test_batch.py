@@ -0,0 +1,126 @@
+import json
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+
+from core.api.serializers import ProdutorRuralSerializer
+from core.batch import JSON_INVALIDO, ValidacaoEmLote
+from core.models import Fazenda, ProdutorRural
+from core.tests.base import CoreTestMixin, gerar_cpf
+from users.models import User
+
+
+class ValidacaoEmLoteTestCase(CoreTestMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="email@email.com", password="x")
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("core:produtor-rural-validar")
+        self.data = self.create_produtor_rural_data()
+
+    def registro(self, **kwargs) -> dict:
+        return {**self.data, **kwargs}
+
+    def ndjson(self, registros: list) -> bytes:
+        return "\n".join(
+            registro if isinstance(registro, str) else json.dumps(registro)
+            for registro in registros
+        ).encode()
+
+    def validar(self, registros: list) -> list:
+        response = self.client.post(
+            self.url, self.ndjson(registros), content_type="application/x-ndjson"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        conteudo = b"".join(response.streaming_content).decode()
+        return [json.loads(linha) for linha in conteudo.splitlines()]
+
+    def test_reporta_erros_por_linha_sem_gravar(self):
+        existente = self.create_produtor_rural(cpf="52998224725")
+        fazenda_invalida = {
+            **self.data["fazenda"],
+            "area_agricultavel_hectares": 90.0,
+            "cidade": 999999,
+        }
+        registros = [
+            self.registro(),
+            self.registro(cpf="123"),
+            self.registro(cnpj="12345678000195"),
+            self.registro(cpf=existente.format_cpf()),
+            self.registro(),
+            "{nao e json",
+            self.registro(cpf=gerar_cpf(111222333), fazenda=fazenda_invalida),
+            self.registro(cpf=None, cnpj="12.345.678/0001-95"),
+        ]
+        total_fazendas = Fazenda.objects.count()
+
+        *erros, resumo = self.validar(registros)
+
+        self.assertEqual(resumo, {"total": 8, "validos": 2, "invalidos": 6})
+        erros = {erro["linha"]: erro["erros"] for erro in erros}
+        self.assertEqual(list(erros), [2, 3, 4, 5, 6, 7])
+        self.assertIn("cpf", erros[2])
+        self.assertIn("non_field_errors", erros[3])
+        self.assertEqual(erros[6], {"non_field_errors": [JSON_INVALIDO]})
+        self.assertEqual(set(erros[7]["fazenda"]), {"cidade"})
+        self.assertEqual(ProdutorRural.objects.count(), 1)
+        self.assertEqual(Fazenda.objects.count(), total_fazendas)
+
+    def test_mensagens_de_unicidade_iguais_as_do_serializer(self):
+        self.create_produtor_rural(cpf=self.data["cpf"])
+        serializer = ProdutorRuralSerializer(data=self.data)
+        serializer.is_valid()
+
+        *erros, _ = self.validar([self.data])
+
+        self.assertEqual(erros[0]["erros"], {"cpf": serializer.errors["cpf"]})
+
+    def test_duplicatas_no_arquivo(self):
+        *erros, resumo = self.validar([self.registro(), self.registro()])
+
+        self.assertEqual(resumo["invalidos"], 1)
+        self.assertEqual(erros[0]["linha"], 2)
+        self.assertIn("cpf", erros[0]["erros"])
+
+    def test_consultas_por_lote(self):
+        def registros(quantidade):
+            return [
+                json.dumps(self.registro(cpf=gerar_cpf(numero)))
+                for numero in range(123000001, 123000001 + quantidade)
+            ]
+
+        # cidades, culturas e CPFs existentes: uma consulta por lote cada
+        with self.assertNumQueries(3):
+            list(ValidacaoEmLote(registros(5)))
+        with self.assertNumQueries(6):
+            list(ValidacaoEmLote(registros(20), tamanho_lote=10))
+
+    def test_corpo_vazio(self):
+        self.assertEqual(self.validar([]), [{"total": 0, "validos": 0, "invalidos": 0}])
+
+    @override_settings(
+        REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": {
+                **settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"],
+                "validacao-lote": "10/min",
+            },
+        }
+    )
+    def test_throttle_proprio_com_custo_por_arquivo(self):
+        self.validar([self.registro()])
+        self.validar([self.registro()])
+        response = self.client.post(
+            self.url, self.ndjson([]), content_type="application/x-ndjson"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # A listagem do mesmo viewset não é limitada
+        lista = self.client.get(reverse("core:produtor-rural-list"))
+        self.assertEqual(lista.status_code, status.HTTP_200_OK)
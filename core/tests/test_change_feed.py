@@ -0,0 +1,184 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import skipIf
+from unittest.mock import patch
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.urls import reverse
+from django.utils import timezone
+
+from core.managers import RegistroAlteracaoQuerySet
+from core.models import RegistroAlteracao
+from core.tests.base import CoreTestMixin
+from users.models import User
+
+Entidade = RegistroAlteracao.Entidade
+Operacao = RegistroAlteracao.Operacao
+
+
+class ChangeFeedTestCase(CoreTestMixin, APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="email@email.com", password="x")
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("core:change-feed")
+
+    def get_changes(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_registra_alteracoes_na_mesma_transacao(self):
+        url = reverse("core:produtor-rural-list")
+        self.client.post(url, self.create_produtor_rural_data(), format="json")
+
+        operacoes = list(
+            RegistroAlteracao.objects.order_by("pk").values_list("entidade", "operacao")
+        )
+        self.assertEqual(
+            operacoes,
+            [
+                (Entidade.FAZENDA, Operacao.INSERT),
+                (Entidade.FAZENDA_CULTURA, Operacao.INSERT),
+                (Entidade.FAZENDA_CULTURA, Operacao.INSERT),
+                (Entidade.PRODUTOR_RURAL, Operacao.INSERT),
+            ],
+        )
+
+    def test_changes_compacta_e_pagina_com_cursor(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            produtor = self.create_produtor_rural()
+        inicial = self.get_changes()
+        cursor = inicial["next_cursor"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            produtor.nome = "Nome 1"
+            produtor.save()
+            produtor.nome = "Nome 2"
+            produtor.save()
+            produtor.fazenda.culturas_plantadas.clear()
+
+        data = self.get_changes(since=cursor)
+        produtores = [c for c in data["changes"] if c["entidade"] == "produtor_rural"]
+        self.assertEqual(len(produtores), 1)
+        self.assertEqual(produtores[0]["dados"]["nome"], "Nome 2")
+        culturas = [c for c in data["changes"] if c["entidade"] == "fazenda_cultura"]
+        self.assertEqual({c["operacao"] for c in culturas}, {Operacao.DELETE})
+        self.assertEqual(len(culturas), 2)
+        self.assertFalse(data["has_more"])
+
+        self.assertEqual(self.get_changes(since=data["next_cursor"])["changes"], [])
+
+    def test_changes_limit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_produtor_rural()
+        data = self.get_changes(limit=2)
+
+        self.assertTrue(data["has_more"])
+        self.assertEqual(len(data["changes"]), 2)
+
+    def test_delete_registrado(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            produtor = self.create_produtor_rural()
+        pk = produtor.pk
+        cursor = self.get_changes()["next_cursor"]
+        with self.captureOnCommitCallbacks(execute=True):
+            produtor.delete()
+
+        changes = self.get_changes(since=cursor)["changes"]
+        self.assertEqual(
+            changes,
+            [
+                {
+                    "entidade": "produtor_rural",
+                    "id": pk,
+                    "operacao": "D",
+                    "dados": None,
+                }
+            ],
+        )
+
+    def test_cursor_compactado_retorna_410(self):
+        self.create_produtor_rural()
+        RegistroAlteracao.objects.update(criado_em=timezone.now() - timedelta(days=60))
+        self.create_produtor_rural(cpf="52998224725")
+        stdout = StringIO()
+
+        call_command("compact_change_log", days=30, stdout=stdout)
+
+        self.assertIn("4 registro(s) removido(s).", stdout.getvalue())
+        response = self.client.get(self.url, {"since": 1})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+    def test_cursor_compactado_retorna_410_com_log_vazio(self):
+        self.create_produtor_rural()
+        cursor = self.get_changes()["next_cursor"]
+        RegistroAlteracao.objects.update(criado_em=timezone.now() - timedelta(days=60))
+
+        RegistroAlteracao.objects.compactar(timezone.now() - timedelta(days=30))
+
+        self.assertFalse(RegistroAlteracao.objects.exists())
+        response = self.client.get(self.url, {"since": 1})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+        # Quem já tinha lido tudo continua do mesmo cursor
+        self.assertEqual(self.get_changes(since=cursor)["changes"], [])
+
+    def test_registro_confirmado_depois_entra_apos_o_cursor(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            produtor = self.create_produtor_rural()
+        cursor = self.get_changes()["next_cursor"]
+        # Simula uma transação longa: o id foi reservado antes dos já lidos,
+        # mas o registro só fica visível depois
+        primeiro = RegistroAlteracao.objects.order_by("pk").first().pk
+        RegistroAlteracao.objects.filter(pk=primeiro).delete()
+        RegistroAlteracao.objects.create(
+            pk=primeiro,
+            entidade=Entidade.PRODUTOR_RURAL,
+            objeto_id=produtor.pk,
+            operacao=Operacao.UPDATE,
+        )
+        RegistroAlteracao.objects.sequenciar()
+
+        changes = self.get_changes(since=cursor)["changes"]
+
+        self.assertEqual(
+            [(change["id"], change["operacao"]) for change in changes],
+            [(produtor.pk, Operacao.UPDATE)],
+        )
+
+    def test_leitura_nao_numera_registros(self):
+        self.create_produtor_rural()
+
+        # Sem o commit, os registros ainda não têm sequência e não aparecem
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_changes()["changes"], [])
+        self.assertTrue(
+            RegistroAlteracao.objects.filter(sequencia__isnull=True).exists()
+        )
+
+    @skipIf(connection.vendor == "postgresql", "Serializado pelo advisory lock")
+    def test_sequenciar_refaz_o_lote_em_conflito(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_produtor_rural()
+        RegistroAlteracao.objects.update(sequencia=None)
+        original = RegistroAlteracaoQuerySet._sequenciar_lote
+        chamadas = []
+
+        def lote_concorrente(queryset, alias, tamanho_lote):
+            chamadas.append(tamanho_lote)
+            if len(chamadas) == 1:
+                raise IntegrityError("UNIQUE constraint failed")
+            return original(queryset, alias, tamanho_lote)
+
+        with patch.object(
+            RegistroAlteracaoQuerySet, "_sequenciar_lote", lote_concorrente
+        ):
+            self.assertEqual(RegistroAlteracao.objects.sequenciar(), 4)
+        self.assertEqual(len(chamadas), 2)
+
+    def test_since_invalido(self):
+        response = self.client.get(self.url, {"since": "abc"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,137 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+from django.urls import reverse
+
+from core import validators
+from core.api.serializers import ProdutorRuralSerializer
+from core.models import Fazenda, ProdutorRural
+from core.tests.base import BaseCoreTestCase, CoreTestMixin
+from users.models import User
+
+
+class CheckConstraintsTestCase(BaseCoreTestCase):
+    def setUp(self):
+        self.produtor = self.create_produtor_rural()
+
+    def test_area_maior_que_total_em_update(self):
+        with self.assertRaises(validators.AreaHectaresValidationError):
+            with validators.erros_de_constraint(), transaction.atomic():
+                Fazenda.objects.update(area_vegetacao_hectares=1000)
+
+    def test_cpf_e_cnpj_em_update(self):
+        with self.assertRaises(validators.CnpAndCnpjValidationError):
+            with validators.erros_de_constraint(), transaction.atomic():
+                ProdutorRural.objects.update(cnpj="40993392000151")
+
+    def test_documento_vazio_vira_nulo_no_bulk_create(self):
+        produtor = ProdutorRural(
+            nome="Produtor", cpf="", cnpj="", fazenda=self.produtor.fazenda
+        )
+        with self.assertRaises(validators.CnpjOrCpfRequiredValidationError):
+            with validators.erros_de_constraint(), transaction.atomic():
+                ProdutorRural.objects.bulk_create([produtor])
+
+        produtor = ProdutorRural(
+            nome="Produtor", cpf="52998224725", cnpj="", fazenda=self.produtor.fazenda
+        )
+        ProdutorRural.objects.bulk_create([produtor])
+        self.assertIsNone(ProdutorRural.objects.get(cpf="52998224725").cnpj)
+
+    def test_outros_erros_de_integridade_nao_sao_convertidos(self):
+        # CPF duplicado: a mensagem do IntegrityError varia com o banco
+        with self.assertRaises(IntegrityError):
+            with validators.erros_de_constraint(), transaction.atomic():
+                self.create_produtor_rural()
+
+    def test_nome_da_constraint_pelo_diagnostico_do_postgresql(self):
+        error = IntegrityError(
+            f"violates check constraint {validators.AREA_CONSTRAINT}"
+        )
+        # psycopg2 expõe o nome da constraint em diag
+        causa = Exception()
+        causa.diag = SimpleNamespace(constraint_name=validators.CPF_E_CNPJ_CONSTRAINT)
+        error.__cause__ = causa
+
+        self.assertEqual(
+            validators.nome_da_constraint(error), validators.CPF_E_CNPJ_CONSTRAINT
+        )
+        self.assertIsInstance(
+            validators.erro_de_constraint(error), validators.CnpAndCnpjValidationError
+        )
+
+    def test_nome_da_constraint_exato_na_mensagem_do_sqlite(self):
+        prefixo = "fazenda_areas"
+        with patch.dict(validators.CONSTRAINT_ERRORS, {prefixo: ValueError}):
+            self.assertEqual(
+                validators.nome_da_constraint(
+                    IntegrityError(
+                        f"CHECK constraint failed: {validators.AREA_CONSTRAINT}"
+                    )
+                ),
+                validators.AREA_CONSTRAINT,
+            )
+            self.assertEqual(
+                validators.nome_da_constraint(
+                    IntegrityError(f"CHECK constraint failed: {prefixo}")
+                ),
+                prefixo,
+            )
+        self.assertIsNone(
+            validators.nome_da_constraint(IntegrityError("CHECK constraint failed"))
+        )
+
+    def test_full_clean_da_fazenda_usa_a_mensagem_do_validator(self):
+        fazenda = self.produtor.fazenda
+        fazenda.area_vegetacao_hectares = 1000
+
+        with self.assertRaises(DjangoValidationError) as contexto:
+            fazenda.full_clean()
+
+        self.assertEqual(
+            contexto.exception.messages,
+            [validators.AreaHectaresValidationError.default_detail],
+        )
+
+    def test_full_clean_do_produtor_nao_duplica_erros(self):
+        produtor = ProdutorRural(
+            nome="Produtor",
+            cpf="52998224725",
+            cnpj="40993392000151",
+            fazenda=self.produtor.fazenda,
+        )
+
+        with self.assertRaises(DjangoValidationError) as contexto:
+            produtor.full_clean()
+
+        self.assertEqual(
+            contexto.exception.messages,
+            [validators.CnpAndCnpjValidationError().message],
+        )
+
+
+class CheckConstraintsApiTestCase(CoreTestMixin, APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(
+            user=User.objects.create_user(email="email@email.com", password="x")
+        )
+
+    @patch.object(ProdutorRuralSerializer, "validate", lambda self, attrs: attrs)
+    def test_violacao_no_banco_vira_erro_de_validacao(self):
+        data = self.create_produtor_rural_data(cnpj="40993392000151")
+
+        response = self.client.post(
+            reverse("core:produtor-rural-list"), data, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data["non_field_errors"],
+            [validators.CnpAndCnpjValidationError().message],
+        )
+        self.assertFalse(ProdutorRural.objects.exists())
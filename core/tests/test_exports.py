@@ -0,0 +1,197 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from core.exports import AnalyticsSnapshot
+from core.models import Fazenda, ProdutorRural, RegistroAlteracao
+from core.tests.base import BaseCoreTestCase, gerar_cpf
+from jobs.models import Job
+from users.models import User
+
+
+class AnalyticsSnapshotTestCase(BaseCoreTestCase):
+    def setUp(self):
+        self.destino = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.destino)
+        self.produtores = [
+            self.create_produtor_rural(nome=f"Produtor {numero}", cpf=gerar_cpf(numero))
+            for numero in range(123456001, 123456004)
+        ]
+
+    def ler_partes(self, tabela: str):
+        return pq.read_table(self.destino / tabela).to_pylist()
+
+    def test_snapshot_completo(self):
+        stdout = StringIO()
+        call_command(
+            "export_analytics_snapshot",
+            output=str(self.destino),
+            batch_size=2,
+            stdout=stdout,
+        )
+
+        self.assertIn("produtores: 3 linha(s)", stdout.getvalue())
+        fazendas = self.ler_partes("fazendas")
+        self.assertEqual(len(fazendas), 3)
+        self.assertEqual(fazendas[0]["area_total_hectares"], Decimal("100.00"))
+        fazenda = self.produtores[0].fazenda
+        self.assertEqual(
+            sorted(fazendas[0]["culturas"]),
+            sorted(fazenda.culturas_plantadas.values_list("id", flat=True)),
+        )
+        schema = pq.read_schema(next((self.destino / "fazendas").iterdir()))
+        self.assertEqual(schema.field("area_total_hectares").type, pa.decimal128(10, 2))
+        self.assertTrue((self.destino / "referencias" / "culturas.parquet").exists())
+
+    def test_snapshot_incremental_exporta_apenas_alteracoes(self):
+        AnalyticsSnapshot(self.destino).executar()
+        ProdutorRural.objects.update(atualizado_em=timezone.now() - timedelta(days=1))
+        Fazenda.objects.update(atualizado_em=timezone.now() - timedelta(days=1))
+        produtor = self.produtores[1]
+        produtor.nome = "Produtor Alterado"
+        produtor.save()
+
+        manifesto = AnalyticsSnapshot(self.destino).executar()
+
+        self.assertTrue(manifesto["incremental"])
+        self.assertEqual(manifesto["linhas"]["produtores"], 1)
+        self.assertEqual(manifesto["linhas"]["fazendas"], 0)
+        self.assertEqual(len(list((self.destino / "produtores").iterdir())), 2)
+
+    def test_snapshot_incremental_exporta_exclusoes(self):
+        AnalyticsSnapshot(self.destino).executar()
+        ProdutorRural.objects.update(atualizado_em=timezone.now() - timedelta(days=1))
+        Fazenda.objects.update(atualizado_em=timezone.now() - timedelta(days=1))
+        produtor = self.produtores[0]
+        produtor.delete()
+
+        manifesto = AnalyticsSnapshot(self.destino).executar()
+
+        self.assertEqual(manifesto["linhas"]["produtores"], 1)
+        self.assertEqual(manifesto["linhas"]["fazendas"], 0)
+        excluidos = [
+            linha for linha in self.ler_partes("produtores") if linha["excluido_em"]
+        ]
+        self.assertEqual(len(excluidos), 1)
+        self.assertEqual(excluidos[0]["id"], produtor.pk)
+
+        produtor.fazenda.delete()
+        AnalyticsSnapshot(self.destino).executar()
+        fazendas = [
+            linha for linha in self.ler_partes("fazendas") if linha["excluido_em"]
+        ]
+        self.assertEqual([linha["id"] for linha in fazendas], [produtor.fazenda_id])
+
+    def test_snapshot_incremental_exporta_culturas_e_confirmacoes_tardias(self):
+        AnalyticsSnapshot(self.destino).executar()
+        # Só as culturas mudam: atualizado_em da fazenda fica igual
+        fazenda = self.produtores[0].fazenda
+        fazenda.culturas_plantadas.add(self.create_cultura("Milho"))
+        # Registro com pk menor que os já exportados, confirmado depois
+        primeiro = RegistroAlteracao.objects.order_by("pk").first().pk
+        RegistroAlteracao.objects.filter(pk=primeiro).delete()
+        RegistroAlteracao.objects.create(
+            pk=primeiro,
+            entidade=RegistroAlteracao.Entidade.PRODUTOR_RURAL,
+            objeto_id=self.produtores[2].pk,
+            operacao=RegistroAlteracao.Operacao.UPDATE,
+        )
+
+        manifesto = AnalyticsSnapshot(self.destino).executar()
+
+        self.assertTrue(manifesto["incremental"])
+        self.assertEqual(manifesto["linhas"]["fazendas"], 1)
+        self.assertEqual(manifesto["linhas"]["produtores"], 1)
+        partes = sorted((self.destino / "fazendas").iterdir())
+        (linha,) = pq.read_table(partes[-1]).to_pylist()
+        self.assertEqual(len(linha["culturas"]), 3)
+        partes = sorted((self.destino / "produtores").iterdir())
+        (linha,) = pq.read_table(partes[-1]).to_pylist()
+        self.assertEqual(linha["id"], self.produtores[2].pk)
+
+    def test_snapshot_incremental_exporta_removidos_do_banco(self):
+        AnalyticsSnapshot(self.destino).executar()
+        produtor = self.produtores[1]
+        pk = produtor.pk
+        produtor.hard_delete()
+
+        manifesto = AnalyticsSnapshot(self.destino).executar()
+
+        self.assertEqual(manifesto["linhas"]["produtores"], 1)
+        partes = sorted((self.destino / "produtores").iterdir())
+        (linha,) = pq.read_table(partes[-1]).to_pylist()
+        self.assertEqual(linha["id"], pk)
+        self.assertIsNotNone(linha["excluido_em"])
+        self.assertIsNone(linha["nome"])
+
+    def test_log_compactado_apos_o_cursor_exporta_tudo(self):
+        AnalyticsSnapshot(self.destino).executar()
+        self.produtores[0].save()
+        # A alteração após o cursor foi removida do log antes de ser exportada
+        RegistroAlteracao.objects.compactar(timezone.now() + timedelta(seconds=1))
+
+        manifesto = AnalyticsSnapshot(self.destino).executar()
+
+        self.assertFalse(manifesto["incremental"])
+        self.assertEqual(manifesto["linhas"]["produtores"], 3)
+        self.assertEqual(
+            manifesto["cursor"], RegistroAlteracao.objects.marca_compactacao()
+        )
+
+    def test_snapshot_arrow(self):
+        AnalyticsSnapshot(self.destino, formato="arrow").executar()
+
+        arquivo = next((self.destino / "produtores").iterdir())
+        with pa.ipc.open_file(arquivo) as reader:
+            self.assertEqual(reader.read_all().num_rows, 3)
+
+
+class AnalyticsSnapshotApiViewTestCase(APITestCase):
+    def setUp(self):
+        self.url = reverse("core:analytics-snapshot")
+        self.admin = User.objects.create_user(
+            email="admin@email.com", password="x", is_admin=True
+        )
+
+    def test_enfileira_exportacao(self):
+        self.client.force_authenticate(user=self.admin)
+
+        response = self.client.post(self.url, {"formato": "arrow"}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job = Job.objects.get(pk=response.data["id"])
+        self.assertEqual(job.nome, "core.export_analytics_snapshot")
+        self.assertEqual(job.argumentos, {"formato": "arrow", "completo": False})
+        self.assertEqual(job.criado_por, self.admin)
+        self.assertEqual(
+            response["Location"], reverse("jobs:job-detail", kwargs={"pk": job.pk})
+        )
+
+    def test_formato_invalido(self):
+        self.client.force_authenticate(user=self.admin)
+
+        response = self.client.post(self.url, {"formato": "csv"}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Job.objects.exists())
+
+    def test_apenas_admin(self):
+        self.client.force_authenticate(
+            user=User.objects.create_user(email="email@email.com", password="x")
+        )
+
+        response = self.client.post(self.url, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -5,9 +5,14 @@ from rest_framework.response import Response
 from rest_framework.test import APITestCase
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError
 from django.urls import reverse
 
 from core.api.serializers import FazendaSerializer
+from core.dashboard import distribuicao_cacheada, pivo_cacheado
+from core.models import Cultura, Fazenda
+from core.tasks import recompute_dashboard
 from core.validators import AreaHectaresValidationError
 
 from .base import BaseCoreTestCase, CoreTestMixin
@@ -49,11 +54,11 @@ class FazendaGraphicsApiViewTests(APITestCase, CoreTestMixin):
         self.assertIn("total_fazenda_culturas", response.data)
         self.assertIn("total_fazendas_por_estado", response.data)
 
-    @patch("core.api.views.Fazenda.objects.total_fazendas_por_estado")
-    @patch("core.api.views.Cultura.objects.annotate")
-    @patch("core.api.views.Fazenda.objects.aggregate")
+    @patch("core.dashboard.Fazenda.objects.total_fazendas_por_estado")
+    @patch("core.dashboard.Fazenda.objects.total_fazendas_por_cultura")
+    @patch("core.dashboard.Fazenda.objects.aggregate")
     def test_check_fazenda_graphics_values(
-        self, mock_aggregate, mock_annotate, mock_total_fazendas_por_estado
+        self, mock_aggregate, mock_total_por_cultura, mock_total_fazendas_por_estado
     ):
         mock_aggregate.return_value = {
             "total_agricultavel": 1000,
@@ -61,7 +66,7 @@ class FazendaGraphicsApiViewTests(APITestCase, CoreTestMixin):
             "total_hectares": 1500,
             "total_fazendas": 10,
         }
-        mock_annotate.return_value.values.return_value = [
+        mock_total_por_cultura.return_value = [
             {"nome": "Café", "total": 5},
             {"nome": "Milho", "total": 3},
         ]
@@ -116,3 +121,217 @@ class FazendaSerializerTestCase(BaseCoreTestCase):
             ValidationError, AreaHectaresValidationError.default_detail
         ):
             serializer.is_valid(raise_exception=True)
+
+
+class FazendaDistribuicaoTestCase(BaseCoreTestCase):
+    def setUp(self):
+        cache.clear()
+        sp = self.create_cidade(self.create_estado("São Paulo", "SP"))
+        mg = self.create_cidade(self.create_estado("Minas Gerais", "MG"))
+        soja = self.create_cultura("Soja")
+        areas = [(sp, 100, 50, 50), (sp, 200, 150, 0), (sp, 300, 100, 100)]
+        areas += [(mg, 1000, 500, 250)]
+        for cidade, total, agricultavel, vegetacao in areas:
+            fazenda = Fazenda.objects.create(
+                nome="Fazenda",
+                cidade=cidade,
+                area_total_hectares=total,
+                area_agricultavel_hectares=agricultavel,
+                area_vegetacao_hectares=vegetacao,
+            )
+            fazenda.culturas_plantadas.set([soja])
+
+    def test_distribuicao_area_total_por_estado(self):
+        grupos = Fazenda.objects.distribuicao(quantidade_faixas=9)
+
+        self.assertEqual([grupo["grupo"] for grupo in grupos], ["MG", "SP"])
+        mg, sp = grupos
+        self.assertEqual(sp["total"], 3)
+        self.assertEqual(sp["histograma"]["contagens"][:4], [1, 1, 1, 0])
+        self.assertEqual(mg["histograma"]["contagens"][-1], 1)
+        self.assertEqual(sp["histograma"]["limites"][0], 100)
+        self.assertEqual(sp["histograma"]["limites"][-1], 1000)
+        self.assertAlmostEqual(sp["percentis"]["p50"], 200, delta=15)
+        self.assertAlmostEqual(mg["percentis"]["p90"], 1000, delta=15)
+
+    def test_distribuicao_razao_ignora_fazendas_sem_vegetacao(self):
+        grupos = Fazenda.objects.distribuicao(
+            campo="razao_agricultavel_vegetacao", por="cultura"
+        )
+
+        self.assertEqual(len(grupos), 1)
+        self.assertEqual(grupos[0]["grupo"], "Soja")
+        self.assertEqual(grupos[0]["total"], 3)
+        self.assertEqual(sum(grupos[0]["histograma"]["contagens"]), 3)
+
+    def test_distribuicao_sem_fazendas(self):
+        self.assertEqual(Fazenda.objects.none().distribuicao(), [])
+
+    def test_distribuicao_cacheada(self):
+        distribuicao_cacheada("area_total", "estado", 10)
+
+        with self.assertNumQueries(0):
+            grupos = distribuicao_cacheada("area_total", "estado", 10)
+        self.assertEqual(len(grupos), 2)
+
+    def test_distribuicao_cacheada_invalidada_por_escrita(self):
+        antes = distribuicao_cacheada("area_total", "estado", 10)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Fazenda.objects.first().delete()
+
+        depois = distribuicao_cacheada("area_total", "estado", 10)
+        self.assertEqual(
+            sum(grupo["total"] for grupo in depois),
+            sum(grupo["total"] for grupo in antes) - 1,
+        )
+
+    def test_recompute_dashboard_task(self):
+        self.assertEqual(recompute_dashboard(), {"distribuicoes": 4})
+        with self.assertNumQueries(0):
+            distribuicao_cacheada("razao_agricultavel_vegetacao", "cultura", 10)
+
+
+class FazendaPivoTestCase(CoreTestMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        sp = self.create_cidade(self.create_estado("São Paulo", "SP"))
+        mg = self.create_cidade(self.create_estado("Minas Gerais", "MG"))
+        soja = self.create_cultura("Soja")
+        cafe = self.create_cultura("Café")
+        self.fazenda = self.create_fazenda(sp, [soja])
+        self.create_fazenda(sp, [soja, cafe])
+        self.create_fazenda(mg, [cafe])
+        self.create_fazenda(mg)
+
+    def test_pivo_estado_cultura(self):
+        with self.assertNumQueries(1):
+            pivo = Fazenda.objects.pivo_estado_cultura()
+
+        self.assertEqual(pivo["linhas"], ["MG", "SP"])
+        self.assertEqual(pivo["colunas"], ["Café", "Soja"])
+        self.assertEqual(pivo["valores"]["fazendas"], [[1, 0], [1, 2]])
+        self.assertEqual(
+            pivo["valores"]["area_agricultavel_hectares"], [[80.0, 0], [80.0, 160.0]]
+        )
+
+    def test_pivo_cacheado_por_geracao(self):
+        pivo_cacheado()
+        with self.assertNumQueries(0):
+            pivo_cacheado()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.fazenda.delete()
+
+        self.assertEqual(pivo_cacheado()["valores"]["fazendas"], [[1, 0], [1, 1]])
+
+    def test_pivo_api(self):
+        url = reverse("core:fazenda-pivo")
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        user = User.objects.create_user(email="email@email.com", password="x")
+        self.client.force_authenticate(user=user)
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, Fazenda.objects.pivo_estado_cultura())
+
+
+class CulturasBitmaskTestCase(BaseCoreTestCase):
+    def setUp(self):
+        self.cidade = self.create_cidade(self.create_estado())
+        self.soja = self.create_cultura("Soja")
+        self.milho = self.create_cultura("Milho")
+        self.cafe = self.create_cultura("Café")
+
+    def bitmask(self, fazenda) -> int:
+        return Fazenda.objects.get(pk=fazenda.pk).culturas_bitmask
+
+    def test_culturas_recebem_bits_distintos(self):
+        bits = list(Cultura.objects.values_list("bit", flat=True))
+        self.assertNotIn(None, bits)
+        self.assertEqual(len(set(bits)), len(bits))
+
+    def test_bit_disputado_tenta_o_proximo_livre(self):
+        # Simula outra transação que reservou o mesmo bit antes do INSERT
+        livre = Cultura.proximo_bit_livre()
+        with patch.object(
+            Cultura,
+            "proximo_bit_livre",
+            side_effect=[self.soja.bit, livre],
+        ):
+            trigo = Cultura.objects.create(nome="Trigo")
+
+        self.assertEqual(trigo.bit, livre)
+
+    def test_nome_duplicado_nao_tenta_outro_bit(self):
+        with self.assertRaises(IntegrityError):
+            Cultura.objects.create(nome="Soja")
+
+    def test_bitmask_sincronizado_com_m2m(self):
+        fazenda = self.create_fazenda(self.cidade, [self.soja, self.milho])
+        self.assertEqual(self.bitmask(fazenda), self.soja.mascara | self.milho.mascara)
+        self.assertEqual(fazenda.culturas_bitmask, self.bitmask(fazenda))
+
+        fazenda.culturas_plantadas.set([self.milho, self.cafe])
+        self.assertEqual(self.bitmask(fazenda), self.milho.mascara | self.cafe.mascara)
+
+        fazenda.culturas_plantadas.clear()
+        self.assertEqual(self.bitmask(fazenda), 0)
+
+    def test_bitmask_sincronizado_pelo_lado_da_cultura(self):
+        fazendas = [self.create_fazenda(self.cidade, [self.milho]) for _ in range(3)]
+
+        Fazenda.objects.filter(pk__in=[f.pk for f in fazendas]).adicionar_cultura(
+            self.soja
+        )
+        self.assertEqual(Fazenda.objects.com_culturas(self.soja, self.milho).count(), 3)
+
+        self.soja.fazendas.remove(fazendas[0])
+        self.assertEqual(self.bitmask(fazendas[0]), self.milho.mascara)
+
+        self.milho.delete()
+        self.assertEqual(self.bitmask(fazendas[1]), self.soja.mascara)
+
+    def test_com_culturas_e_totais_sem_join(self):
+        self.create_fazenda(self.cidade, [self.soja, self.milho])
+        self.create_fazenda(self.cidade, [self.soja])
+        self.create_fazenda(self.cidade, [self.cafe])
+
+        with self.assertNumQueries(1) as consultas:
+            total = Fazenda.objects.com_culturas(self.soja, self.milho).count()
+        self.assertEqual(total, 1)
+        self.assertNotIn("culturas_plantadas", consultas.captured_queries[0]["sql"])
+
+        totais = {
+            linha["nome"]: linha["total"]
+            for linha in Fazenda.objects.total_fazendas_por_cultura()
+        }
+        self.assertEqual(totais["Soja"], 2)
+        self.assertEqual(totais["Milho"], 1)
+        self.assertEqual(totais["Café"], 1)
+        self.assertEqual(totais["Algodão"], 0)
+
+    def test_culturas_sem_bit_usam_m2m(self):
+        trigo = self.create_cultura("Trigo")
+        Cultura.objects.filter(pk=trigo.pk).update(bit=None)
+        trigo.refresh_from_db()
+        fazenda = self.create_fazenda(self.cidade, [trigo, self.soja])
+        self.create_fazenda(self.cidade, [self.soja])
+
+        self.assertEqual(self.bitmask(fazenda), self.soja.mascara)
+        self.assertEqual(list(Fazenda.objects.com_culturas(trigo)), [fazenda])
+        totais = {
+            linha["nome"]: linha["total"]
+            for linha in Fazenda.objects.total_fazendas_por_cultura()
+        }
+        self.assertEqual(totais["Trigo"], 1)
+        self.assertEqual(totais["Soja"], 2)
+
+    def test_recalcular_culturas_bitmask(self):
+        fazenda = self.create_fazenda(self.cidade, [self.soja, self.cafe])
+        Fazenda.objects.update(culturas_bitmask=0)
+
+        Fazenda.objects.recalcular_culturas_bitmask()
+
+        self.assertEqual(self.bitmask(fazenda), self.soja.mascara | self.cafe.mascara)
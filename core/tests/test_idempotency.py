@@ -0,0 +1,104 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from django.urls import reverse
+from django.utils import timezone
+
+from core.idempotency import IdempotentCreateMixin
+from core.models import ChaveIdempotencia, ProdutorRural
+from core.tasks import purge_idempotency_keys
+from core.tests.base import CoreTestMixin
+from users.models import User
+
+
+class IdempotencyKeyTestCase(CoreTestMixin, APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="email@email.com", password="x")
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("core:produtor-rural-list")
+        self.data = self.create_produtor_rural_data()
+
+    def post(self, data=None, chave="chave-1"):
+        return self.client.post(
+            self.url, data or self.data, format="json", HTTP_IDEMPOTENCY_KEY=chave
+        )
+
+    def test_repeticao_responde_com_resposta_gravada(self):
+        primeira = self.post()
+        with self.assertNumQueries(1):
+            repeticao = self.post()
+
+        self.assertEqual(primeira.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(repeticao.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(repeticao.json(), primeira.json())
+        self.assertEqual(repeticao["Idempotent-Replayed"], "true")
+        self.assertEqual(ProdutorRural.objects.count(), 1)
+
+    def test_chave_reutilizada_com_outro_payload(self):
+        self.post()
+        response = self.post(data={**self.data, "nome": "Outro nome"})
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(ProdutorRural.objects.count(), 1)
+
+    def test_erro_de_validacao_nao_grava_chave(self):
+        response = self.post(data={**self.data, "cpf": "123"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ChaveIdempotencia.objects.exists())
+        self.assertEqual(self.post().status_code, status.HTTP_201_CREATED)
+
+    def test_chave_expirada_pode_ser_reutilizada(self):
+        self.post()
+        ChaveIdempotencia.objects.update(expira_em=timezone.now() - timedelta(1))
+
+        response = self.post(data={**self.data, "cpf": "52998224725"})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertEqual(ProdutorRural.objects.count(), 2)
+
+    def test_chaves_isoladas_por_usuario(self):
+        self.post()
+        outro = User.objects.create_user(email="outro@email.com", password="x")
+        self.client.force_authenticate(user=outro)
+
+        response = self.post(data={**self.data, "cpf": "52998224725"})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(ProdutorRural.objects.count(), 2)
+
+    def test_requisicao_concorrente_recebe_resposta_da_primeira(self):
+        primeira = self.post()
+        # Simula a segunda requisição chegando antes da primeira confirmar: a
+        # consulta inicial não encontra a chave e o insert falha no índice único
+        registro = ChaveIdempotencia.objects.get(chave="chave-1")
+        with patch.object(
+            IdempotentCreateMixin,
+            "get_registro_idempotencia",
+            side_effect=[None, registro],
+        ):
+            response = self.post()
+
+        self.assertEqual(response.json(), primeira.json())
+        self.assertEqual(ProdutorRural.objects.count(), 1)
+
+    def test_chave_invalida(self):
+        response = self.post(chave="x" * 256)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_purge_idempotency_keys(self):
+        self.post()
+        self.post(data={**self.data, "cpf": "52998224725"}, chave="chave-2")
+        ChaveIdempotencia.objects.filter(chave="chave-1").update(
+            expira_em=timezone.now() - timedelta(1)
+        )
+
+        self.assertEqual(purge_idempotency_keys(), {"removidos": 1})
+        self.assertEqual(
+            list(ChaveIdempotencia.objects.values_list("chave", flat=True)),
+            ["chave-2"],
+        )
@@ -0,0 +1,143 @@
+import asyncio
+from contextlib import suppress
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import live
+from core.live import GraphicsBroadcaster
+from core.models import RegistroAlteracao
+from core.tests.base import CoreTestMixin
+from users.models import User
+
+
+class GraphicsBroadcasterTestCase(CoreTestMixin, TestCase):
+    def setUp(self):
+        self.broadcaster = GraphicsBroadcaster(intervalo=60, tamanho_fila=2)
+
+    async def test_subscribe_recebe_snapshot(self):
+        fila = await self.broadcaster.subscribe()
+        evento = fila.get_nowait()
+        self.broadcaster.unsubscribe(fila)
+
+        self.assertEqual(evento["tipo"], "snapshot")
+        self.assertEqual(evento["dados"]["total_fazendas"], 0)
+
+    async def test_atualizar_envia_apenas_delta_quando_log_avanca(self):
+        fila = await self.broadcaster.subscribe()
+        fila.get_nowait()
+
+        await self.broadcaster.atualizar()
+        self.assertTrue(fila.empty())
+
+        await sync_to_async(self.create_produtor_rural)()
+        await self.broadcaster.atualizar()
+        evento = fila.get_nowait()
+        self.broadcaster.unsubscribe(fila)
+
+        self.assertEqual(evento["tipo"], "delta")
+        self.assertEqual(evento["dados"]["total_fazendas"], 1)
+
+    def test_cursor_avanca_com_registro_confirmado_depois(self):
+        produtor = self.create_produtor_rural()
+        cursor = live.ultimo_cursor()
+        # Registro com pk menor que os já vistos, confirmado por último
+        primeiro = RegistroAlteracao.objects.order_by("pk").first().pk
+        RegistroAlteracao.objects.filter(pk=primeiro).delete()
+        RegistroAlteracao.objects.create(
+            pk=primeiro,
+            entidade=RegistroAlteracao.Entidade.PRODUTOR_RURAL,
+            objeto_id=produtor.pk,
+            operacao=RegistroAlteracao.Operacao.UPDATE,
+        )
+
+        self.assertGreater(live.ultimo_cursor(), cursor)
+
+    async def test_fila_cheia_recebe_snapshot(self):
+        fila = await self.broadcaster.subscribe()
+        for cursor in range(3):
+            self.broadcaster.publicar({"tipo": "delta", "cursor": cursor, "dados": {}})
+        self.broadcaster.unsubscribe(fila)
+
+        # Os deltas pendentes foram trocados pelo snapshot completo
+        self.assertEqual(
+            [fila.get_nowait()["tipo"] for _ in range(fila.qsize())],
+            ["snapshot", "delta"],
+        )
+
+
+class FazendaGraphicsStreamTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse("core:fazenda-graphics-stream")
+
+    def test_stream_exige_asgi(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 501)
+
+    async def test_stream_exige_ticket(self):
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get(self.url, {"ticket": "invalido"})
+        self.assertEqual(response.status_code, 401)
+
+    def test_ticket_exige_autenticacao_e_consome_throttle(self):
+        url = reverse("core:fazenda-graphics-stream-ticket")
+        self.assertEqual(self.client.post(url).status_code, 401)
+
+        user = User.objects.create_user(email="email@email.com", password="x")
+        self.client.force_login(user)
+        with override_settings(
+            REST_FRAMEWORK={
+                **settings.REST_FRAMEWORK,
+                "DEFAULT_THROTTLE_RATES": {"dashboard": "1/min"},
+            }
+        ):
+            self.assertEqual(self.client.post(url).status_code, 201)
+            self.assertEqual(self.client.post(url).status_code, 429)
+
+    def test_ticket_de_uso_unico(self):
+        user = User.objects.create_user(email="email@email.com", password="x")
+        ticket = live.emitir_ticket(user)
+
+        self.assertEqual(live.usar_ticket(ticket), user)
+        self.assertIsNone(live.usar_ticket(ticket))
+
+    def test_ticket_expirado(self):
+        user = User.objects.create_user(email="email@email.com", password="x")
+        ticket = live.emitir_ticket(user)
+
+        with override_settings(LIVE_DASHBOARD_TICKET_SECONDS=-1):
+            self.assertIsNone(live.usar_ticket(ticket))
+
+    async def test_stream_com_ticket(self):
+        user = await User.objects.acreate(email="email@email.com", password="x")
+        ticket = live.emitir_ticket(user)
+        broadcaster = GraphicsBroadcaster(intervalo=60)
+
+        with patch.object(live, "broadcaster", broadcaster):
+            response = await self.async_client.get(self.url, {"ticket": ticket})
+            recebido = asyncio.Event()
+            partes = []
+
+            async def consumir():
+                async for parte in response:
+                    partes.append(parte)
+                    recebido.set()
+
+            # O servidor ASGI cancela o consumo quando o cliente desconecta
+            task = asyncio.create_task(consumir())
+            await recebido.wait()
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+            primeiro = partes[0]
+
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertTrue(primeiro.decode().startswith("event: snapshot\n"))
+        self.assertEqual(broadcaster.clientes, set())
@@ -2,7 +2,8 @@ from parameterized import parameterized
 from rest_framework import status, test
 
 from django.core.exceptions import ValidationError as DjangoValidationError
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from core import validators
@@ -47,9 +48,11 @@ class ProdutorRuralModelTestCase(BaseCoreTestCase):
             self.create_produtor_rural(cpf=self.cpf, nome=self.nome_produtor)
 
     def test_unique_cnpj(self):
-        self.create_produtor_rural(cnpj=self.cnpj, nome=self.nome_produtor)
+        self.create_produtor_rural(cpf=None, cnpj=self.cnpj, nome=self.nome_produtor)
         with self.assertRaises(IntegrityError):
-            self.create_produtor_rural(cnpj=self.cnpj, nome=self.nome_produtor)
+            self.create_produtor_rural(
+                cpf=None, cnpj=self.cnpj, nome=self.nome_produtor
+            )
 
     def test_str(self):
         produtor = self.create_produtor_rural(cpf=self.cpf, nome=self.nome_produtor)
@@ -71,6 +74,18 @@ class ProdutorRuralModelTestCase(BaseCoreTestCase):
         produtor = ProdutorRural(cnpj=self.cnpj, nome=self.nome_produtor)
         self.assertTrue(produtor.is_pessoa_juridica())
 
+    def test_identificador_normalizado_no_save(self):
+        produtor = self.create_produtor_rural(cpf=None, cnpj=self.cnpj)
+        self.assertEqual(produtor.identificador, self.cnpj)
+        self.assertEqual(produtor.tipo, ProdutorRural.TipoPessoa.JURIDICA)
+
+        produtor.cnpj = None
+        produtor.cpf = self.cpf
+        produtor.save(update_fields=["cpf", "cnpj"])
+        produtor.refresh_from_db()
+        self.assertEqual(produtor.identificador, self.cpf)
+        self.assertEqual(produtor.tipo, ProdutorRural.TipoPessoa.FISICA)
+
     def test_produtor_rural_and_fazenda_relacao(self):
         nome_fazenda = "Fazenda Teste 2"
         fazenda = self.create_fazenda(
@@ -134,6 +149,158 @@ class TestProdutorViewSet(CoreTestMixin, test.APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["nome"], nome_produtor_rural)
 
+    def test_list_produtor_rural_com_fields(self):
+        produtor_rural = self.create_produtor_rural()
+        url = reverse("core:produtor-rural-list")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {"fields": "id,nome"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data, [{"id": produtor_rural.pk, "nome": produtor_rural.nome}]
+        )
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("core_fazenda", queries[0]["sql"])
+        self.assertNotIn("cpf", queries[0]["sql"])
+
+    def test_retrieve_produtor_rural_com_fields_aninhados(self):
+        produtor_rural = self.create_produtor_rural()
+        url = reverse("core:produtor-rural-detail", kwargs={"pk": produtor_rural.pk})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {"fields": "nome,fazenda.nome"})
+
+        self.assertEqual(
+            response.data,
+            {"nome": produtor_rural.nome, "fazenda": {"nome": "Fazenda Teste"}},
+        )
+        # Sem culturas no retorno o prefetch não é executado
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("area_total_hectares", queries[0]["sql"])
+
+    def test_list_produtor_rural_com_exclude(self):
+        self.create_produtor_rural()
+        url = reverse("core:produtor-rural-list")
+        response = self.client.get(url, {"exclude": "cnpj,fazenda.culturas_plantadas"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("cnpj", response.data[0])
+        self.assertNotIn("culturas_plantadas", response.data[0]["fazenda"])
+        self.assertIn("cidade", response.data[0]["fazenda"])
+
+    def test_list_produtor_rural_com_fields_e_exclude(self):
+        url = reverse("core:produtor-rural-list")
+        response = self.client.get(url, {"fields": "id,nome", "exclude": "nome"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("exclude", response.data)
+
+    def test_list_produtor_rural_com_campo_invalido(self):
+        url = reverse("core:produtor-rural-list")
+        response = self.client.get(url, {"fields": "nome,fazenda.inexistente"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data, {"fields": ["Campo inválido: fazenda.inexistente"]}
+        )
+
+    def test_list_produtor_rural_com_expand(self):
+        self.create_produtor_rural()
+        url = reverse("core:produtor-rural-list")
+        params = {"expand": "fazenda.cidade.estado,fazenda.culturas_plantadas"}
+        response = self.client.get(url, params)
+
+        fazenda = response.data[0]["fazenda"]
+        self.assertEqual(fazenda["cidade"]["nome"], "Cidade Teste")
+        self.assertEqual(fazenda["cidade"]["estado"]["sigla"], "ET")
+        self.assertEqual(
+            sorted(cultura["nome"] for cultura in fazenda["culturas_plantadas"]),
+            ["Café", "Cana de Açúcar"],
+        )
+
+    def test_list_produtor_rural_com_expand_consultas_constantes(self):
+        url = reverse("core:produtor-rural-list")
+        params = {"expand": "fazenda.cidade.estado,fazenda.culturas_plantadas"}
+        self.create_produtor_rural()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, params)
+        quantidade = len(queries)
+
+        self.create_produtor_rural(cpf="52998224725")
+        self.create_produtor_rural(cpf="11144477735")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual(len(queries), quantidade)
+
+    def test_list_produtor_rural_com_expand_e_fields(self):
+        self.create_produtor_rural()
+        url = reverse("core:produtor-rural-list")
+        params = {"expand": "fazenda.cidade", "fields": "nome,fazenda.cidade.nome"}
+        response = self.client.get(url, params)
+
+        self.assertEqual(
+            response.data[0],
+            {
+                "nome": "Produtor Rural Teste",
+                "fazenda": {"cidade": {"nome": "Cidade Teste"}},
+            },
+        )
+
+    def test_list_produtor_rural_com_expand_invalido(self):
+        url = reverse("core:produtor-rural-list")
+        response = self.client.get(url, {"expand": "fazenda.nome"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {"expand": ["Relação inválida: fazenda.nome"]})
+
+    def test_busca_por_prefixo_formatado_ou_digitos(self):
+        pessoa_fisica = self.create_produtor_rural(cpf="12345678909")
+        pessoa_juridica = self.create_produtor_rural(cpf=None, cnpj="12345678000195")
+        self.create_produtor_rural(cpf="52998224725")
+        url = reverse("core:produtor-rural-busca")
+
+        response = self.client.get(url, {"q": "123.456"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [produtor["id"] for produtor in response.data],
+            [pessoa_juridica.pk, pessoa_fisica.pk],
+        )
+
+        response = self.client.get(url, {"q": "12.345.678/0001", "fields": "id"})
+        self.assertEqual(response.data, [{"id": pessoa_juridica.pk}])
+
+        response = self.client.get(url, {"q": "123456", "tipo": "F"})
+        self.assertEqual([p["id"] for p in response.data], [pessoa_fisica.pk])
+
+    def test_list_filtrado_por_culturas(self):
+        soja, milho = self.create_cultura("Soja"), self.create_cultura("Milho")
+        cidade = self.create_cidade(self.create_estado())
+        ambas = self.create_produtor_rural(
+            fazenda=self.create_fazenda(cidade, [soja, milho])
+        )
+        self.create_produtor_rural(
+            cpf="52998224725", fazenda=self.create_fazenda(cidade, [soja])
+        )
+        url = reverse("core:produtor-rural-list")
+
+        response = self.client.get(url, {"culturas": f"{soja.pk},{milho.pk}"})
+        self.assertEqual([p["id"] for p in response.data], [ambas.pk])
+
+        response = self.client.get(url, {"culturas": soja.pk})
+        self.assertEqual(len(response.data), 2)
+
+        response = self.client.get(url, {"culturas": "soja"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("culturas", response.data)
+
+    def test_busca_sem_digitos(self):
+        url = reverse("core:produtor-rural-busca")
+        response = self.client.get(url, {"q": "abc"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("q", response.data)
+
     def test_create_produtor_rural(self):
         data = self.create_produtor_rural_data()
         url = reverse("core:produtor-rural-list")
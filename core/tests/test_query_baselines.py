@@ -0,0 +1,218 @@
+import os
+from pathlib import Path
+
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from django.core.cache import cache
+from django.db import connection
+from django.urls import reverse
+
+from base.testing import QueryBaselineMixin
+from core.models import Cidade, Cultura, Estado, Fazenda, ProdutorRural
+from core.tests.base import CoreTestMixin, gerar_cpf
+from users.models import User
+
+QUERY_BASELINE_PATH = Path(__file__).with_name("query_baselines.json")
+
+
+class EndpointQueryBaselineTestCase(QueryBaselineMixin, CoreTestMixin, APITestCase):
+    query_baseline_path = QUERY_BASELINE_PATH
+    total_produtores = 3
+
+    def setUp(self):
+        cache.clear()
+        self.email = "email@email.com"
+        self.password = "password"
+        self.user = User.objects.create_user(email=self.email, password=self.password)
+        self.client.force_authenticate(user=self.user)
+        self.produtores = [
+            self.create_produtor_rural(nome=f"Produtor {numero}", cpf=gerar_cpf(numero))
+            for numero in range(123456001, 123456001 + self.total_produtores)
+        ]
+        self.produtor = self.produtores[0]
+        self.detail_url = reverse(
+            "core:produtor-rural-detail", kwargs={"pk": self.produtor.pk}
+        )
+
+    def fazenda_data(self) -> dict:
+        fazenda = self.produtor.fazenda
+        return {
+            "nome": "Fazenda Atualizada",
+            "cidade": fazenda.cidade_id,
+            "area_total_hectares": 100.0,
+            "area_agricultavel_hectares": 80.0,
+            "area_vegetacao_hectares": 20.0,
+            "culturas_plantadas": list(
+                fazenda.culturas_plantadas.values_list("id", flat=True)
+            ),
+        }
+
+    def test_produtor_rural_list(self):
+        url = reverse("core:produtor-rural-list")
+        self.assertQueryBaseline("produtor-rural-list", lambda: self.client.get(url))
+
+    def test_produtor_rural_list_sparse(self):
+        url = reverse("core:produtor-rural-list")
+        self.assertQueryBaseline(
+            "produtor-rural-list-sparse",
+            lambda: self.client.get(url, {"fields": "id,nome"}),
+        )
+
+    def test_produtor_rural_list_expand(self):
+        url = reverse("core:produtor-rural-list")
+        params = {"expand": "fazenda.cidade.estado,fazenda.culturas_plantadas"}
+        self.assertQueryBaseline(
+            "produtor-rural-list-expand", lambda: self.client.get(url, params)
+        )
+
+    def test_produtor_rural_busca(self):
+        url = reverse("core:produtor-rural-busca")
+        self.assertQueryBaseline(
+            "produtor-rural-busca", lambda: self.client.get(url, {"q": "123.456"})
+        )
+
+    def test_produtor_rural_retrieve(self):
+        self.assertQueryBaseline(
+            "produtor-rural-retrieve", lambda: self.client.get(self.detail_url)
+        )
+
+    def test_produtor_rural_create(self):
+        url = reverse("core:produtor-rural-list")
+        data = self.create_produtor_rural_data(cpf=gerar_cpf(987654001))
+        self.assertQueryBaseline(
+            "produtor-rural-create",
+            lambda: self.client.post(url, data, format="json"),
+        )
+
+    def test_produtor_rural_update(self):
+        data = {
+            "nome": "Produtor Atualizado",
+            "cpf": self.produtor.cpf,
+            "fazenda": self.fazenda_data(),
+        }
+        self.assertQueryBaseline(
+            "produtor-rural-update",
+            lambda: self.client.put(self.detail_url, data, format="json"),
+        )
+
+    def test_produtor_rural_partial_update(self):
+        data = {"nome": "Produtor Atualizado", "fazenda": {"nome": "Fazenda Nova"}}
+        self.assertQueryBaseline(
+            "produtor-rural-partial-update",
+            lambda: self.client.patch(self.detail_url, data, format="json"),
+        )
+
+    def test_produtor_rural_destroy(self):
+        self.assertQueryBaseline(
+            "produtor-rural-destroy", lambda: self.client.delete(self.detail_url)
+        )
+
+    def test_fazenda_graphics(self):
+        url = reverse("core:fazenda-graphics")
+        self.assertQueryBaseline("fazenda-graphics", lambda: self.client.get(url))
+
+    def test_fazenda_distribuicoes(self):
+        url = reverse("core:fazenda-distribuicoes")
+        self.assertQueryBaseline(
+            "fazenda-distribuicoes",
+            lambda: self.client.get(url, {"campo": "area_total", "por": "cultura"}),
+        )
+
+    def test_change_feed(self):
+        url = reverse("core:change-feed")
+        self.assertQueryBaseline(
+            "change-feed", lambda: self.client.get(url, {"since": 1})
+        )
+
+    def test_token_obtain_pair(self):
+        url = reverse("users:token_obtain_pair")
+        data = {"email": self.email, "password": self.password}
+        self.assertQueryBaseline(
+            "token-obtain-pair", lambda: self.client.post(url, data, format="json")
+        )
+
+    def test_token_refresh(self):
+        url = reverse("users:token_refresh")
+        data = {"refresh": str(RefreshToken.for_user(self.user))}
+        self.assertQueryBaseline(
+            "token-refresh", lambda: self.client.post(url, data, format="json")
+        )
+
+    def test_logout(self):
+        url = reverse("users:logout")
+        data = {"refresh_token": str(RefreshToken.for_user(self.user))}
+        self.assertQueryBaseline(
+            "logout", lambda: self.client.post(url, data, format="json")
+        )
+
+
+class EndpointQueryPlanTestCase(QueryBaselineMixin, APITestCase):
+    """
+    Popula as tabelas com volume suficiente para o planner preferir índices e
+    compara os planos com a baseline (os planos só são coletados no PostgreSQL).
+    O volume é ajustável pela variável de ambiente QUERY_PLAN_SEED_ROWS.
+    """
+
+    query_baseline_path = QUERY_BASELINE_PATH
+
+    @classmethod
+    def setUpTestData(cls):
+        total = int(os.environ.get("QUERY_PLAN_SEED_ROWS", 5000))
+        estado = Estado.objects.create(nome="Estado Plano", sigla="EP")
+        cidade = Cidade.objects.create(nome="Cidade Plano", estado=estado)
+        fazendas = Fazenda.objects.bulk_create(
+            Fazenda(
+                nome=f"Fazenda {numero}",
+                cidade=cidade,
+                area_total_hectares=100,
+                area_agricultavel_hectares=80,
+                area_vegetacao_hectares=20,
+            )
+            for numero in range(total)
+        )
+        culturas = list(Cultura.objects.all())
+        Fazenda.culturas_plantadas.through.objects.bulk_create(
+            Fazenda.culturas_plantadas.through(
+                fazenda_id=fazenda.pk, cultura_id=culturas[indice % len(culturas)].pk
+            )
+            for indice, fazenda in enumerate(fazendas)
+        )
+        ProdutorRural.objects.bulk_create(
+            ProdutorRural(
+                nome=f"Produtor {indice}",
+                cpf=gerar_cpf(200000000 + indice),
+                fazenda=fazenda,
+            )
+            for indice, fazenda in enumerate(fazendas)
+        )
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+        cls.user = User.objects.create_user(email="plano@email.com", password="x")
+        cls.produtor = ProdutorRural.objects.order_by("pk").last()
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.user)
+
+    def test_produtor_rural_retrieve_plan(self):
+        url = reverse("core:produtor-rural-detail", kwargs={"pk": self.produtor.pk})
+        self.assertQueryBaseline(
+            "produtor-rural-retrieve-plan", lambda: self.client.get(url), explain=True
+        )
+
+    def test_fazenda_graphics_plan(self):
+        url = reverse("core:fazenda-graphics")
+        self.assertQueryBaseline(
+            "fazenda-graphics-plan", lambda: self.client.get(url), explain=True
+        )
+
+    def test_produtor_rural_busca_plan(self):
+        # A busca por prefixo deve usar o índice varchar_pattern_ops
+        url = reverse("core:produtor-rural-busca")
+        params = {"q": self.produtor.cpf[:7], "fields": "id,nome"}
+        self.assertQueryBaseline(
+            "produtor-rural-busca-plan",
+            lambda: self.client.get(url, params),
+            explain=True,
+        )
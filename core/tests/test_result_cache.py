@@ -0,0 +1,128 @@
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.test import override_settings
+from django.urls import reverse
+
+from core.models import Cultura, Fazenda, ProdutorRural
+from core.tests.base import CoreTestMixin
+from users.models import User
+
+
+@override_settings(RESULT_CACHE_ENABLED=True)
+class ResultCacheTestCase(CoreTestMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        caches[settings.RESULT_CACHE_ALIAS].clear()
+        self.user = User.objects.create_user(email="email@email.com", password="x")
+        self.client.force_authenticate(user=self.user)
+        self.produtor = self.create_produtor_rural()
+        self.url = reverse("core:produtor-rural-list")
+
+    def get(self, url=None, **params):
+        response = self.client.get(url or self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def assertInvalidado(self, escrita):
+        self.get()
+        self.assertEqual(self.get()["X-Result-Cache"], "HIT")
+        with self.captureOnCommitCallbacks(execute=True):
+            escrita()
+        response = self.get()
+        self.assertEqual(response["X-Result-Cache"], "MISS")
+        return response.json()
+
+    def test_segunda_leitura_vem_do_cache_sem_consultas(self):
+        primeira = self.get()
+
+        with self.assertNumQueries(0):
+            segunda = self.get()
+
+        self.assertEqual(primeira["X-Result-Cache"], "MISS")
+        self.assertEqual(segunda["X-Result-Cache"], "HIT")
+        self.assertEqual(segunda.content, primeira.content)
+        self.assertEqual(segunda["Content-Type"], primeira["Content-Type"])
+
+    def test_query_params_normalizados(self):
+        self.get(page=1, fields="id,nome")
+
+        response = self.client.get(f"{self.url}?fields=id,nome&page=1")
+
+        self.assertEqual(response["X-Result-Cache"], "HIT")
+        self.assertEqual(self.get(page=1)["X-Result-Cache"], "MISS")
+
+    def test_retrieve(self):
+        url = reverse("core:produtor-rural-detail", kwargs={"pk": self.produtor.pk})
+        self.get(url)
+
+        self.assertEqual(self.get(url)["X-Result-Cache"], "HIT")
+
+    def test_autenticacao_verificada_antes_do_cache(self):
+        self.get()
+        self.client.force_authenticate(user=None)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_escrita_pela_api_invalida(self):
+        data = self.create_produtor_rural_data(cpf="52998224725")
+
+        dados = self.assertInvalidado(
+            lambda: self.client.post(self.url, data, format="json")
+        )
+
+        self.assertEqual(len(dados), 2)
+
+    def test_escritas_em_lote_invalidam(self):
+        dados = self.assertInvalidado(
+            lambda: Fazenda.objects.update(nome="Fazenda Renomeada")
+        )
+        self.assertEqual(dados[0]["fazenda"]["nome"], "Fazenda Renomeada")
+
+        dados = self.assertInvalidado(lambda: ProdutorRural.objects.all().delete())
+        self.assertEqual(dados, [])
+
+    def test_relacionados_e_m2m_invalidam(self):
+        def renomear_cultura():
+            cultura = Cultura.objects.get(nome="Café")
+            cultura.nome = "Café Arábica"
+            cultura.save()
+
+        self.assertInvalidado(renomear_cultura)
+        self.assertInvalidado(
+            lambda: self.produtor.fazenda.culturas_plantadas.remove(
+                Cultura.objects.get(nome="Café Arábica")
+            )
+        )
+
+    @override_settings(RESULT_CACHE_MAX_ENTRY_BYTES=10)
+    def test_resposta_grande_nao_e_guardada(self):
+        self.get()
+
+        self.assertEqual(self.get()["X-Result-Cache"], "MISS")
+
+    def test_metricas(self):
+        url = reverse("monitoring:result-cache-stats")
+        self.get()
+        self.get()
+        self.get()
+
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+        admin = User.objects.create_user(
+            email="admin@email.com", password="x", is_admin=True
+        )
+        self.client.force_authenticate(user=admin)
+        response = self.client.get(url)
+
+        self.assertEqual(
+            response.data["produtores-rurais"],
+            {"hit": 2, "miss": 1, "skip": 0, "hit_ratio": 0.6667},
+        )
+        self.client.delete(url)
+        self.assertEqual(
+            self.client.get(url).data["produtores-rurais"]["hit_ratio"], None
+        )
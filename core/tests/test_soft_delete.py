@@ -0,0 +1,145 @@
+from datetime import timedelta
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from django.db import IntegrityError
+from django.urls import reverse
+from django.utils import timezone
+
+from base.paginators import has_default_filters_only
+from core.dashboard import dados_graficos
+from core.models import (
+    Fazenda,
+    FazendaArquivada,
+    ProdutorRural,
+    ProdutorRuralArquivado,
+    RegistroAlteracao,
+)
+from core.tasks import archive_deleted_rows
+from core.tests.base import BaseCoreTestCase, CoreTestMixin
+from users.models import User
+
+
+class SoftDeleteTestCase(BaseCoreTestCase):
+    def test_delete_exclui_logicamente(self):
+        produtor = self.create_produtor_rural()
+        cursor = RegistroAlteracao.objects.order_by("pk").last().pk
+
+        produtor.delete()
+
+        self.assertFalse(ProdutorRural.objects.exists())
+        excluido = ProdutorRural.todos.get(pk=produtor.pk)
+        self.assertIsNotNone(excluido.excluido_em)
+        self.assertEqual(excluido.atualizado_em, excluido.excluido_em)
+        self.assertEqual(
+            list(
+                RegistroAlteracao.objects.filter(pk__gt=cursor).values_list(
+                    "entidade", "objeto_id", "operacao"
+                )
+            ),
+            [("produtor_rural", produtor.pk, "D")],
+        )
+
+    def test_delete_fazenda_exclui_produtores_em_cascata(self):
+        produtor = self.create_produtor_rural()
+        self.create_produtor_rural(cpf="52998224725")
+
+        total, contagens = Fazenda.objects.filter(pk=produtor.fazenda_id).delete()
+
+        self.assertEqual(total, 2)
+        self.assertEqual(contagens, {"core.Fazenda": 1, "core.ProdutorRural": 1})
+        self.assertEqual(
+            list(ProdutorRural.objects.values_list("cpf", flat=True)),
+            ["52998224725"],
+        )
+        self.assertEqual(Fazenda.todos.excluidos().get().pk, produtor.fazenda_id)
+
+    def test_agregados_ignoram_excluidos(self):
+        produtor = self.create_produtor_rural()
+        self.create_produtor_rural(cpf="52998224725")
+        produtor.fazenda.delete()
+
+        dados = dados_graficos()
+
+        self.assertEqual(dados["total_fazendas"], 1)
+        totais = {
+            linha["nome"]: linha["total"] for linha in dados["total_fazenda_culturas"]
+        }
+        self.assertEqual(totais["Café"], 1)
+
+    def test_cpf_de_produtor_excluido_pode_ser_reutilizado(self):
+        self.create_produtor_rural().delete()
+        self.create_produtor_rural()
+
+        with self.assertRaises(IntegrityError):
+            self.create_produtor_rural()
+
+    def test_manager_padrao_nao_conta_como_filtro(self):
+        self.assertTrue(has_default_filters_only(ProdutorRural.objects.all()))
+        self.assertFalse(
+            has_default_filters_only(ProdutorRural.objects.filter(nome="x"))
+        )
+
+    def test_archive_deleted_rows(self):
+        antigo = self.create_produtor_rural()
+        recente = self.create_produtor_rural(cpf="52998224725")
+        ativo = self.create_produtor_rural(cpf="11144477735")
+        culturas = sorted(
+            antigo.fazenda.culturas_plantadas.values_list("pk", flat=True)
+        )
+        antigo.fazenda.delete()
+        recente.delete()
+        ProdutorRural.todos.filter(pk=antigo.pk).update(
+            excluido_em=timezone.now() - timedelta(days=100)
+        )
+        Fazenda.todos.filter(pk=antigo.fazenda_id).update(
+            excluido_em=timezone.now() - timedelta(days=100)
+        )
+        total_registros = RegistroAlteracao.objects.count()
+
+        resultado = archive_deleted_rows(dias=90)
+
+        self.assertEqual(resultado, {"produtores": 1, "fazendas": 1})
+        self.assertEqual(
+            set(ProdutorRural.todos.values_list("pk", flat=True)),
+            {recente.pk, ativo.pk},
+        )
+        arquivado = ProdutorRuralArquivado.objects.get()
+        self.assertEqual(
+            (arquivado.pk, arquivado.cpf, arquivado.fazenda_id),
+            (antigo.pk, antigo.cpf, antigo.fazenda_id),
+        )
+        fazenda = FazendaArquivada.objects.get()
+        self.assertEqual(fazenda.pk, antigo.fazenda_id)
+        self.assertEqual(fazenda.culturas, culturas)
+        self.assertFalse(Fazenda.todos.filter(pk=antigo.fazenda_id).exists())
+        # A exclusão já foi registrada no log quando o produtor foi excluído
+        self.assertEqual(RegistroAlteracao.objects.count(), total_registros)
+        self.assertEqual(
+            archive_deleted_rows(dias=90), {"produtores": 0, "fazendas": 0}
+        )
+
+
+class SoftDeleteApiTestCase(CoreTestMixin, APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="email@email.com", password="x")
+        self.client.force_authenticate(user=self.user)
+
+    def test_produtor_excluido_some_da_api_e_libera_cpf(self):
+        produtor = self.create_produtor_rural()
+        url = reverse("core:produtor-rural-detail", kwargs={"pk": produtor.pk})
+        self.client.delete(url)
+
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        data = self.create_produtor_rural_data()
+        response = self.client.post(
+            reverse("core:produtor-rural-list"), data, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.post(
+            reverse("core:produtor-rural-list"), data, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("cpf", response.data)
@@ -0,0 +1,108 @@
+from datetime import date, timedelta
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from django.urls import reverse
+
+from core.models import TotalDiario
+from core.tasks import snapshot_daily_totals
+from core.tests.base import CoreTestMixin
+from users.models import User
+
+
+class TotaisDiariosTestCase(CoreTestMixin, APITestCase):
+    def setUp(self):
+        self.sp = self.create_cidade(self.create_estado("São Paulo", "SP"))
+        self.soja = self.create_cultura("Soja")
+        self.fazenda = self.create_fazenda(self.sp, [self.soja])
+
+    def gravar_dias(self, inicio: date, dias: int):
+        TotalDiario.objects.bulk_create(
+            TotalDiario(
+                data=inicio + timedelta(days=dia),
+                dimensao="estado",
+                chave="SP",
+                fazendas=dia + 1,
+                area_total_hectares=100 * (dia + 1),
+                area_agricultavel_hectares=0,
+                area_vegetacao_hectares=0,
+            )
+            for dia in range(dias)
+        )
+
+    def test_snapshot_daily_totals(self):
+        self.create_fazenda(self.create_cidade(self.create_estado("Bahia", "BA")))
+
+        resultado = snapshot_daily_totals(data="2024-03-10")
+
+        self.assertEqual(resultado, {"data": "2024-03-10", "registros": 3})
+        self.assertEqual(
+            list(
+                TotalDiario.objects.order_by("dimensao", "chave").values_list(
+                    "dimensao", "chave", "fazendas", "area_total_hectares"
+                )
+            ),
+            [
+                ("cultura", "Soja", 1, 100),
+                ("estado", "BA", 1, 100),
+                ("estado", "SP", 1, 100),
+            ],
+        )
+
+        # Rodar de novo no mesmo dia refaz os totais do dia
+        self.fazenda.delete()
+        snapshot_daily_totals(data="2024-03-10")
+        self.assertEqual(
+            set(TotalDiario.objects.values_list("chave", flat=True)), {"BA"}
+        )
+
+    def test_serie_diaria(self):
+        self.gravar_dias(date(2024, 1, 1), 10)
+
+        with self.assertNumQueries(1):
+            serie = TotalDiario.objects.serie(
+                "estado", inicio=date(2024, 1, 3), fim=date(2024, 1, 5)
+            )
+
+        self.assertEqual(
+            serie["datas"], [date(2024, 1, 3), date(2024, 1, 4), date(2024, 1, 5)]
+        )
+        self.assertEqual(serie["chaves"], ["SP"])
+        self.assertEqual(serie["valores"]["fazendas"], [[3, 4, 5]])
+        self.assertEqual(
+            serie["valores"]["area_total_hectares"], [[300.0, 400.0, 500.0]]
+        )
+
+    def test_serie_reduzida_ao_ultimo_dia_de_cada_periodo(self):
+        # 01/01/2024 é uma segunda-feira
+        self.gravar_dias(date(2024, 1, 1), 45)
+
+        semanal = TotalDiario.objects.serie("estado", intervalo="semana")
+        mensal = TotalDiario.objects.serie(
+            "estado", fim=date(2024, 2, 10), intervalo="mes"
+        )
+
+        self.assertEqual(len(semanal["datas"]), 7)
+        self.assertEqual(semanal["datas"][:2], [date(2024, 1, 7), date(2024, 1, 14)])
+        self.assertEqual(semanal["datas"][-1], date(2024, 2, 14))
+        self.assertEqual(mensal["datas"], [date(2024, 1, 31), date(2024, 2, 10)])
+        self.assertEqual(mensal["valores"]["fazendas"], [[31, 41]])
+
+    def test_series_api(self):
+        url = reverse("core:fazenda-series")
+        self.gravar_dias(date(2024, 1, 1), 3)
+        self.client.force_authenticate(
+            User.objects.create_user(email="email@email.com", password="x")
+        )
+
+        response = self.client.get(url, {"inicio": "2024-01-02"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["dimensao"], "estado")
+        self.assertEqual(response.data["intervalo"], "dia")
+        self.assertEqual(response.data["valores"]["fazendas"], [[2, 3]])
+
+        response = self.client.get(url, {"inicio": "2024-01-02", "fim": "2024-01-01"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("fim", response.data)
@@ -1,7 +1,17 @@
 from django.urls import path
 from rest_framework import routers
 
-from core.api.views import FazendaGraphicsApiView, ProdutorRuralViewSet
+from core.api.views import (
+    AnalyticsSnapshotApiView,
+    ChangeFeedApiView,
+    FazendaDistribuicaoApiView,
+    FazendaGraphicsApiView,
+    FazendaGraphicsStreamTicketApiView,
+    FazendaPivoApiView,
+    FazendaSeriesApiView,
+    ProdutorRuralViewSet,
+    fazenda_graphics_stream,
+)
 
 app_name = "core"
 
@@ -9,7 +19,22 @@ router = routers.DefaultRouter()
 router.register("produtores-rurais", ProdutorRuralViewSet, basename="produtor-rural")
 
 urlpatterns = [
-    path("graphics/", FazendaGraphicsApiView.as_view(), name="fazenda-graphics")
+    path("graphics/", FazendaGraphicsApiView.as_view(), name="fazenda-graphics"),
+    path("graphics/stream/", fazenda_graphics_stream, name="fazenda-graphics-stream"),
+    path(
+        "graphics/stream/ticket/",
+        FazendaGraphicsStreamTicketApiView.as_view(),
+        name="fazenda-graphics-stream-ticket",
+    ),
+    path(
+        "graphics/distribuicoes/",
+        FazendaDistribuicaoApiView.as_view(),
+        name="fazenda-distribuicoes",
+    ),
+    path("graphics/pivo/", FazendaPivoApiView.as_view(), name="fazenda-pivo"),
+    path("graphics/series/", FazendaSeriesApiView.as_view(), name="fazenda-series"),
+    path("changes/", ChangeFeedApiView.as_view(), name="change-feed"),
+    path("exports/", AnalyticsSnapshotApiView.as_view(), name="analytics-snapshot"),
 ]
 
 urlpatterns += router.urls
@@ -1,9 +1,11 @@
 import re
+from contextlib import contextmanager
 
 from rest_framework import status
 from rest_framework.exceptions import ValidationError as DRFValidationError
 
 from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError
 from django.utils.translation import gettext_lazy as _
 
 
@@ -88,3 +90,49 @@ class CnpjOrCpfRequiredDRFValidationError(CnpjOrCpfRequiredMixin, DRFValidationE
         if code is None:
             code = self.code
         super().__init__(detail, code)
+
+
+# Nomes das CheckConstraints de Fazenda e ProdutorRural e o erro de validação
+# equivalente a cada uma
+AREA_CONSTRAINT = "fazenda_areas_dentro_do_total"
+CPF_E_CNPJ_CONSTRAINT = "produtor_cpf_e_cnpj_exclusivos"
+CPF_OU_CNPJ_CONSTRAINT = "produtor_cpf_ou_cnpj_obrigatorio"
+CONSTRAINT_ERRORS = {
+    AREA_CONSTRAINT: AreaHectaresValidationError,
+    CPF_E_CNPJ_CONSTRAINT: CnpAndCnpjValidationError,
+    CPF_OU_CNPJ_CONSTRAINT: CnpjOrCpfRequiredValidationError,
+}
+
+
+def nome_da_constraint(error: IntegrityError):
+    """
+    Nome da constraint violada. No PostgreSQL vem do diagnóstico do psycopg2;
+    no SQLite, que não o expõe, procura na mensagem os nomes conhecidos como
+    palavras inteiras, do mais longo para o mais curto.
+    """
+    diag = getattr(error.__cause__, "diag", None)
+    if diag is not None:
+        return diag.constraint_name
+    mensagem = str(error)
+    for nome in sorted(CONSTRAINT_ERRORS, key=len, reverse=True):
+        if re.search(rf"\b{re.escape(nome)}\b", mensagem):
+            return nome
+    return None
+
+
+def erro_de_constraint(error: IntegrityError):
+    """Erro de validação equivalente à CheckConstraint violada, ou None."""
+    erro = CONSTRAINT_ERRORS.get(nome_da_constraint(error))
+    return erro() if erro is not None else None
+
+
+@contextmanager
+def erros_de_constraint():
+    """Converte violações das CheckConstraints nos erros de validação do core."""
+    try:
+        yield
+    except IntegrityError as error:
+        erro = erro_de_constraint(error)
+        if erro is None:
+            raise
+        raise erro from error
@@ -0,0 +1,12 @@
+from django.contrib import admin
+
+from jobs.models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("nome", "status", "tentativas", "executar_em", "finalizado_em")
+    list_filter = ("status", "nome")
+    readonly_fields = ("resultado", "erro")
+
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,20 @@
+from base.serializers import BaseModelSerializer
+from jobs.models import Job
+
+
+class JobSerializer(BaseModelSerializer):
+    class Meta:
+        model = Job
+        fields = (
+            "id",
+            "nome",
+            "status",
+            "resultado",
+            "tentativas",
+            "max_tentativas",
+            "executar_em",
+            "criado_em",
+            "iniciado_em",
+            "finalizado_em",
+        )
+        read_only_fields = fields
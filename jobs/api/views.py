@@ -0,0 +1,28 @@
+from rest_framework import status
+from rest_framework.generics import RetrieveAPIView
+from rest_framework.response import Response
+
+from django.urls import reverse
+
+from jobs.api.serializers import JobSerializer
+from jobs.models import Job
+
+
+def job_accepted_response(request, job: Job) -> Response:
+    """Resposta padrão para operações longas que foram enviadas para a fila."""
+    url = reverse("jobs:job-detail", kwargs={"pk": job.pk})
+    return Response(
+        {"id": job.pk, "status": job.status, "url": request.build_absolute_uri(url)},
+        status=status.HTTP_202_ACCEPTED,
+        headers={"Location": url},
+    )
+
+
+class JobRetrieveApiView(RetrieveAPIView):
+    serializer_class = JobSerializer
+
+    def get_queryset(self):
+        queryset = Job.objects.all()
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(criado_por=self.request.user)
+        return queryset
@@ -0,0 +1,63 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+
+from jobs.worker import Worker
+
+
+def start_worker(sleep: float, burst: bool):
+    worker = Worker(sleep=sleep, burst=burst)
+    # Termina o job em execução antes de encerrar
+    anteriores = {
+        sinal: signal.signal(sinal, worker.stop)
+        for sinal in (signal.SIGTERM, signal.SIGINT)
+    }
+    try:
+        worker.run()
+    finally:
+        for sinal, handler in anteriores.items():
+            signal.signal(sinal, handler)
+
+
+class Command(BaseCommand):
+    help = "Executa os jobs pendentes da fila armazenada no banco de dados"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=1)
+        parser.add_argument(
+            "--sleep", type=float, default=1.0, help="Espera entre consultas à fila"
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Encerra quando não houver mais jobs disponíveis",
+        )
+
+    def handle(self, *args, **options):
+        processes = options["processes"]
+        if processes > 1 and not connection.features.has_select_for_update_skip_locked:
+            self.stderr.write(
+                f"{connection.vendor} não suporta SELECT ... FOR UPDATE SKIP LOCKED, "
+                "usando apenas um worker."
+            )
+            processes = 1
+
+        # Cada worker devolve à fila os jobs abandonados (Worker.requeue_stale)
+        if processes == 1:
+            start_worker(options["sleep"], options["burst"])
+            return
+
+        # Conexões não podem ser compartilhadas entre processos
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(
+                target=start_worker, args=(options["sleep"], options["burst"])
+            )
+            for _ in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from django.db import connections, models, router, transaction
+from django.utils import timezone
+
+
+class JobQuerySet(models.QuerySet):
+    def disponiveis(self):
+        return self.filter(
+            status=self.model.Status.PENDENTE, executar_em__lte=timezone.now()
+        )
+
+    def claim(self):
+        """
+        Reserva o próximo job disponível. Com SKIP LOCKED vários workers podem
+        disputar a fila sem bloquear uns aos outros; sem suporte (SQLite) a
+        fila deve ser consumida por um único worker.
+        """
+        alias = router.db_for_write(self.model)
+        with transaction.atomic(using=alias):
+            queryset = self.using(alias).disponiveis().order_by("executar_em")
+            if connections[alias].features.has_select_for_update_skip_locked:
+                queryset = queryset.select_for_update(skip_locked=True)
+            job = queryset.first()
+            if job is None:
+                return None
+            job.status = self.model.Status.EXECUTANDO
+            job.tentativas += 1
+            job.iniciado_em = job.heartbeat_em = timezone.now()
+            job.save(
+                update_fields=["status", "tentativas", "iniciado_em", "heartbeat_em"]
+            )
+        return job
+
+    def heartbeat(self, pk) -> int:
+        return self.filter(pk=pk, status=self.model.Status.EXECUTANDO).update(
+            heartbeat_em=timezone.now()
+        )
+
+    def requeue_stale(self, timeout: timedelta) -> int:
+        """
+        Jobs de workers que morreram no meio da execução voltam para a fila.
+        Enquanto o job roda o worker renova heartbeat_em, então só os jobs sem
+        sinal do worker há mais de `timeout` são considerados abandonados.
+        """
+        return self.filter(
+            status=self.model.Status.EXECUTANDO,
+            heartbeat_em__lt=timezone.now() - timeout,
+        ).update(status=self.model.Status.PENDENTE)
@@ -0,0 +1,91 @@
+# Generated by Django 5.0.2 on 2026-10-19 12:38
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Job",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("nome", models.CharField(max_length=150, verbose_name="Tarefa")),
+                (
+                    "argumentos",
+                    models.JSONField(
+                        default=dict,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pendente", "Pendente"),
+                            ("executando", "Executando"),
+                            ("concluido", "Concluído"),
+                            ("falhou", "Falhou"),
+                        ],
+                        default="pendente",
+                        max_length=15,
+                    ),
+                ),
+                (
+                    "resultado",
+                    models.JSONField(
+                        blank=True,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        null=True,
+                    ),
+                ),
+                ("erro", models.TextField(blank=True)),
+                ("tentativas", models.PositiveIntegerField(default=0)),
+                ("max_tentativas", models.PositiveIntegerField(default=3)),
+                (
+                    "executar_em",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("criado_em", models.DateTimeField(auto_now_add=True)),
+                ("iniciado_em", models.DateTimeField(blank=True, null=True)),
+                ("finalizado_em", models.DateTimeField(blank=True, null=True)),
+                (
+                    "criado_por",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Job",
+                "verbose_name_plural": "Jobs",
+                "indexes": [
+                    models.Index(
+                        fields=["status", "executar_em"], name="job_status_executar_em"
+                    )
+                ],
+            },
+        ),
+    ]
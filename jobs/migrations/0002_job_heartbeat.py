@@ -0,0 +1,27 @@
+# Generated by Django 5.0.2 on 2026-10-19 13:47
+
+from django.db import migrations, models
+
+
+def heartbeat_inicial(apps, schema_editor):
+    # Jobs já em execução passam a ser avaliados pelo horário de início
+    Job = apps.get_model("jobs", "Job")
+    Job.objects.filter(iniciado_em__isnull=False).update(
+        heartbeat_em=models.F("iniciado_em")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobs", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="heartbeat_em",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(heartbeat_inicial, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,71 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from jobs.managers import JobQuerySet
+
+
+class Job(models.Model):
+    class Status(models.TextChoices):
+        PENDENTE = "pendente", _("Pendente")
+        EXECUTANDO = "executando", _("Executando")
+        CONCLUIDO = "concluido", _("Concluído")
+        FALHOU = "falhou", _("Falhou")
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    nome = models.CharField(_("Tarefa"), max_length=150)
+    argumentos = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    status = models.CharField(
+        max_length=15, choices=Status.choices, default=Status.PENDENTE
+    )
+    resultado = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    erro = models.TextField(blank=True)
+    tentativas = models.PositiveIntegerField(default=0)
+    max_tentativas = models.PositiveIntegerField(default=3)
+    executar_em = models.DateTimeField(default=timezone.now)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    iniciado_em = models.DateTimeField(null=True, blank=True)
+    heartbeat_em = models.DateTimeField(null=True, blank=True)
+    finalizado_em = models.DateTimeField(null=True, blank=True)
+    criado_por = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL
+    )
+    objects = JobQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _("Job")
+        verbose_name_plural = _("Jobs")
+        indexes = [
+            models.Index(
+                fields=["status", "executar_em"], name="job_status_executar_em"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.nome} ({self.status})"
+
+    def backoff(self) -> timedelta:
+        segundos = settings.JOBS_RETRY_BACKOFF_SECONDS * 2 ** (self.tentativas - 1)
+        return timedelta(seconds=min(segundos, settings.JOBS_RETRY_BACKOFF_MAX_SECONDS))
+
+    def concluir(self, resultado):
+        self.status = self.Status.CONCLUIDO
+        self.resultado = resultado
+        self.erro = ""
+        self.finalizado_em = timezone.now()
+        self.save(update_fields=["status", "resultado", "erro", "finalizado_em"])
+
+    def falhar(self, erro: str):
+        self.erro = erro
+        if self.tentativas < self.max_tentativas:
+            self.status = self.Status.PENDENTE
+            self.executar_em = timezone.now() + self.backoff()
+        else:
+            self.status = self.Status.FALHOU
+            self.finalizado_em = timezone.now()
+        self.save(update_fields=["status", "erro", "executar_em", "finalizado_em"])
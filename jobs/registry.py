@@ -0,0 +1,32 @@
+tasks = {}
+
+
+def task(name: str = None, max_tentativas: int = 3):
+    """
+    Registra uma função como tarefa executável pela fila de jobs.
+    Ex:
+        @task("users.purge_expired_tokens")
+        def purge_expired_tokens(): ...
+    """
+
+    def decorator(func):
+        func.task_name = name or f"{func.__module__}.{func.__name__}"
+        func.max_tentativas = max_tentativas
+        tasks[func.task_name] = func
+        return func
+
+    return decorator
+
+
+def enqueue(task_name: str, criado_por=None, **argumentos):
+    from jobs.models import Job
+
+    if task_name not in tasks:
+        raise KeyError(f"Tarefa '{task_name}' não registrada")
+    job = Job.objects.create(
+        nome=task_name,
+        argumentos=argumentos,
+        max_tentativas=tasks[task_name].max_tentativas,
+        criado_por=criado_por,
+    )
+    return job
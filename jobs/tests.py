@@ -0,0 +1,184 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.registry import enqueue, task
+from jobs.worker import Worker, run_job
+from users.models import User
+
+
+@task("tests.soma")
+def soma(a, b):
+    return {"total": a + b}
+
+
+@task("tests.falha", max_tentativas=2)
+def falha():
+    raise RuntimeError("erro esperado")
+
+
+@override_settings(JOBS_RETRY_BACKOFF_SECONDS=10, JOBS_RETRY_BACKOFF_MAX_SECONDS=15)
+class JobQueueTestCase(TestCase):
+    def test_enqueue_tarefa_nao_registrada(self):
+        with self.assertRaises(KeyError):
+            enqueue("tests.inexistente")
+
+    def test_claim_reserva_job_disponivel(self):
+        job = enqueue("tests.soma", a=1, b=2)
+
+        claimed = Job.objects.claim()
+
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual(claimed.status, Job.Status.EXECUTANDO)
+        self.assertEqual(claimed.tentativas, 1)
+        self.assertIsNone(Job.objects.claim())
+
+    def test_claim_ignora_job_agendado_para_o_futuro(self):
+        job = enqueue("tests.soma", a=1, b=2)
+        Job.objects.filter(pk=job.pk).update(
+            executar_em=timezone.now() + timedelta(minutes=1)
+        )
+
+        self.assertIsNone(Job.objects.claim())
+
+    def test_run_job_conclui_com_resultado(self):
+        enqueue("tests.soma", a=1, b=2)
+        job = Job.objects.claim()
+
+        run_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.CONCLUIDO)
+        self.assertEqual(job.resultado, {"total": 3})
+
+    def test_run_job_reagenda_com_backoff_e_falha_apos_max_tentativas(self):
+        enqueue("tests.falha")
+        job = Job.objects.claim()
+        with self.assertLogs("jobs.worker", level="ERROR"):
+            run_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.PENDENTE)
+        self.assertIn("erro esperado", job.erro)
+        self.assertGreater(job.executar_em, timezone.now() + timedelta(seconds=5))
+
+        Job.objects.filter(pk=job.pk).update(executar_em=timezone.now())
+        job = Job.objects.claim()
+        with self.assertLogs("jobs.worker", level="ERROR"):
+            run_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.FALHOU)
+        self.assertEqual(job.tentativas, 2)
+
+    def test_backoff_limitado(self):
+        job = Job(tentativas=5)
+        self.assertEqual(job.backoff(), timedelta(seconds=15))
+
+    def test_requeue_stale(self):
+        enqueue("tests.soma", a=1, b=2)
+        job = Job.objects.claim()
+        Job.objects.filter(pk=job.pk).update(
+            iniciado_em=timezone.now() - timedelta(hours=1),
+            heartbeat_em=timezone.now() - timedelta(hours=1),
+        )
+
+        self.assertEqual(Job.objects.requeue_stale(timedelta(minutes=30)), 1)
+        self.assertEqual(Job.objects.claim().pk, job.pk)
+
+    def test_requeue_stale_ignora_job_com_heartbeat_recente(self):
+        enqueue("tests.soma", a=1, b=2)
+        job = Job.objects.claim()
+        Job.objects.filter(pk=job.pk).update(
+            iniciado_em=timezone.now() - timedelta(hours=1),
+            heartbeat_em=timezone.now() - timedelta(hours=1),
+        )
+
+        self.assertEqual(Job.objects.heartbeat(job.pk), 1)
+
+        self.assertEqual(Job.objects.requeue_stale(timedelta(minutes=30)), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.EXECUTANDO)
+
+    def test_worker_devolve_jobs_abandonados(self):
+        enqueue("tests.soma", a=1, b=2)
+        job = Job.objects.claim()
+        Job.objects.filter(pk=job.pk).update(
+            heartbeat_em=timezone.now() - timedelta(hours=1)
+        )
+
+        with self.assertLogs("jobs.worker", level="WARNING") as logs:
+            self.assertEqual(Worker(burst=True).run(), 1)
+        self.assertIn("1 job(s) abandonado(s)", logs.output[0])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.CONCLUIDO)
+
+    @override_settings(JOBS_STALE_TIMEOUT_SECONDS=60)
+    def test_worker_repete_requeue_a_cada_timeout(self):
+        worker = Worker()
+
+        with (
+            patch("jobs.worker.time.monotonic", side_effect=[0, 30, 61]),
+            patch.object(Job.objects, "requeue_stale", return_value=0) as requeue_stale,
+        ):
+            for _ in range(3):
+                worker.requeue_stale()
+
+        self.assertEqual(requeue_stale.call_count, 2)
+        requeue_stale.assert_called_with(timedelta(seconds=60))
+
+    def test_um_processo_instala_os_handlers_de_sinal(self):
+        with patch(
+            "jobs.management.commands.run_jobs_worker.start_worker"
+        ) as start_worker:
+            call_command("run_jobs_worker", burst=True)
+
+        start_worker.assert_called_once_with(1.0, True)
+
+
+class RunJobsWorkerTestCase(TransactionTestCase):
+    # Os workers rodam em outros processos e precisam ver os jobs já gravados
+    def test_run_jobs_worker_burst(self):
+        jobs = [enqueue("tests.soma", a=numero, b=1) for numero in range(3)]
+        stderr = StringIO()
+
+        call_command("run_jobs_worker", burst=True, processes=2, stderr=stderr)
+
+        self.assertEqual(
+            Job.objects.filter(
+                pk__in=[job.pk for job in jobs], status=Job.Status.CONCLUIDO
+            ).count(),
+            3,
+        )
+        if not connection.features.has_select_for_update_skip_locked:
+            self.assertIn("SKIP LOCKED", stderr.getvalue())
+
+
+class JobRetrieveApiViewTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="email@email.com", password="x")
+        self.client.force_authenticate(user=self.user)
+
+    def test_retrieve_job_do_usuario(self):
+        job = enqueue("tests.soma", criado_por=self.user, a=1, b=2)
+        response = self.client.get(reverse("jobs:job-detail", kwargs={"pk": job.pk}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], Job.Status.PENDENTE)
+
+    def test_retrieve_job_de_outro_usuario(self):
+        outro = User.objects.create_user(email="outro@email.com", password="x")
+        job = enqueue("tests.soma", criado_por=outro, a=1, b=2)
+        response = self.client.get(reverse("jobs:job-detail", kwargs={"pk": job.pk}))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from jobs.api.views import JobRetrieveApiView
+
+app_name = "jobs"
+
+urlpatterns = [
+    path("jobs/<uuid:pk>/", JobRetrieveApiView.as_view(), name="job-detail"),
+]
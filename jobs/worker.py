@@ -0,0 +1,99 @@
+import logging
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+
+from jobs.models import Job
+from jobs.registry import tasks
+
+logger = logging.getLogger(__name__)
+
+
+class Heartbeat(threading.Thread):
+    """
+    Renova heartbeat_em do job a cada JOBS_HEARTBEAT_SECONDS enquanto ele roda,
+    para que requeue_stale não devolva à fila um job de um worker vivo.
+    """
+
+    def __init__(self, job: Job):
+        super().__init__(daemon=True)
+        self.job = job
+        self.interval = settings.JOBS_HEARTBEAT_SECONDS
+        self.finished = threading.Event()
+
+    def run(self):
+        try:
+            while not self.finished.wait(self.interval):
+                Job.objects.heartbeat(self.job.pk)
+        except Exception:
+            logger.exception("Heartbeat do job %s falhou", self.job.pk)
+        finally:
+            # A thread tem conexões próprias com o banco
+            connections.close_all()
+
+    def stop(self):
+        self.finished.set()
+        self.join()
+
+
+def run_job(job: Job):
+    func = tasks.get(job.nome)
+    if func is None:
+        job.tentativas = job.max_tentativas
+        job.falhar(f"Tarefa '{job.nome}' não registrada")
+        return
+    heartbeat = Heartbeat(job)
+    heartbeat.start()
+    try:
+        resultado = func(**job.argumentos)
+    except Exception:
+        logger.exception("Job %s (%s) falhou", job.pk, job.nome)
+        heartbeat.stop()
+        job.falhar(traceback.format_exc())
+    else:
+        heartbeat.stop()
+        job.concluir(resultado)
+
+
+class Worker:
+    def __init__(self, sleep: float = 1.0, burst: bool = False):
+        self.sleep = sleep
+        self.burst = burst
+        self.running = True
+        self.stale_timeout = settings.JOBS_STALE_TIMEOUT_SECONDS
+        self.requeued_at = None
+
+    def stop(self, *args):
+        self.running = False
+
+    def requeue_stale(self) -> int:
+        """
+        A cada JOBS_STALE_TIMEOUT_SECONDS devolve à fila os jobs de workers que
+        morreram (OOM, SIGKILL) sem renovar o heartbeat.
+        """
+        now = time.monotonic()
+        if self.requeued_at is not None and now - self.requeued_at < self.stale_timeout:
+            return 0
+        self.requeued_at = now
+        requeued = Job.objects.requeue_stale(timedelta(seconds=self.stale_timeout))
+        if requeued:
+            logger.warning("%s job(s) abandonado(s) voltaram para a fila", requeued)
+        return requeued
+
+    def run(self) -> int:
+        processados = 0
+        while self.running:
+            self.requeue_stale()
+            job = Job.objects.claim()
+            if job is None:
+                if self.burst:
+                    break
+                time.sleep(self.sleep)
+                continue
+            run_job(job)
+            processados += 1
+        return processados
@@ -0,0 +1,101 @@
+from rest_framework import status
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from django.conf import settings
+from django.http import FileResponse
+
+from base.cache import reset_result_cache_stats, result_cache_stats
+from monitoring.nplusone import report_store
+from monitoring.profiling import get_profile_store
+from monitoring.queries import query_report, snapshot_publisher
+
+
+class NPlusOneReportApiView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if not settings.NPLUSONE_DETECTOR_ENABLED:
+            raise NotFound()
+
+    def get(self, request, format=None):
+        return Response(report_store.all())
+
+    def delete(self, request, format=None):
+        report_store.clear()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ResultCacheStatsApiView(APIView):
+    """Acertos, faltas e respostas não guardadas do cache de resultados."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, format=None):
+        return Response(result_cache_stats())
+
+    def delete(self, request, format=None):
+        reset_result_cache_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ProfilingEnabledMixin:
+    permission_classes = [IsAdminUser]
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if not settings.PROFILING_ENABLED:
+            raise NotFound()
+
+
+class ProfileListApiView(ProfilingEnabledMixin, APIView):
+    """Perfis gravados pelo ProfilingMiddleware, do mais recente ao mais antigo."""
+
+    def get(self, request, format=None):
+        return Response(get_profile_store().all())
+
+    def delete(self, request, format=None):
+        get_profile_store().clear()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ProfileDownloadApiView(ProfilingEnabledMixin, APIView):
+    """Arquivo .prof do perfil, para abrir com pstats ou snakeviz."""
+
+    def get(self, request, profile_id, format=None):
+        try:
+            arquivo = get_profile_store().open(profile_id)
+        except FileNotFoundError:
+            raise NotFound()
+        return FileResponse(
+            arquivo,
+            as_attachment=True,
+            filename=f"{profile_id}.prof",
+            content_type="application/octet-stream",
+        )
+
+
+class QueryReportApiView(APIView):
+    """
+    Consultas que mais consumiram tempo de banco por view, somando os snapshots
+    publicados por todos os processos. Aceita ?view= e ?limit=.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if not settings.QUERY_OBSERVER_ENABLED:
+            raise NotFound()
+
+    def get(self, request, format=None):
+        try:
+            limit = min(int(request.query_params.get("limit", 50)), 500)
+        except ValueError:
+            raise ValidationError({"limit": "Informe um número inteiro"})
+        # O snapshot deste processo entra mesmo antes do próximo intervalo
+        snapshot_publisher.publish()
+        return Response(query_report(request.query_params.get("view"), limit))
@@ -0,0 +1,111 @@
+import json
+import os
+import statistics
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from monitoring.startup import import_time_by_package, run_profile
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede a inicialização do Django em processos novos: tempo de import por "
+        "módulo, ready() de cada app e tempo total de partida"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--runs", type=int, default=5, help="Processos medidos no benchmark"
+        )
+        parser.add_argument(
+            "--command",
+            help="Carrega o settings como `manage.py <comando>` (ex: run_jobs_worker)",
+        )
+        parser.add_argument("--top", type=int, default=15)
+        parser.add_argument(
+            "--budget-ms",
+            type=float,
+            help="Falha se a mediana da partida ultrapassar o limite",
+        )
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["runs"] < 1:
+            raise CommandError("--runs deve ser maior que zero")
+        settings_module = os.environ["DJANGO_SETTINGS_MODULE"]
+        profiles = [
+            run_profile(settings_module, str(settings.BASE_DIR), options["command"])
+            for _ in range(options["runs"])
+        ]
+        result = self.summarize(profiles, options["top"])
+
+        if options["json"]:
+            self.stdout.write(json.dumps(result, indent=2))
+        else:
+            self.write_report(result)
+
+        budget = options["budget_ms"]
+        if budget is not None and result["process_ms"]["median"] > budget:
+            raise CommandError(
+                f"Partida levou {result['process_ms']['median']:.0f} ms "
+                f"(limite {budget:.0f} ms)"
+            )
+
+    @staticmethod
+    def summarize(profiles: list, top: int) -> dict:
+        def stats(values):
+            return {
+                "min": min(values),
+                "median": statistics.median(values),
+                "max": max(values),
+            }
+
+        # O import de cada módulo é medido no processo mais rápido, o menos
+        # afetado por ruído
+        fastest = min(profiles, key=lambda profile: profile["process_ms"])
+        modules = fastest["modules"]
+        packages = import_time_by_package(modules)
+        return {
+            "runs": len(profiles),
+            "process_ms": stats([p["process_ms"] for p in profiles]),
+            "setup_ms": stats([p["setup_ms"] for p in profiles]),
+            "settings_ms": stats([p["settings_ms"] for p in profiles]),
+            "modules_loaded": fastest["modules_loaded"],
+            "ready_ms": dict(
+                sorted(fastest["ready_ms"].items(), key=lambda item: -item[1])
+            ),
+            "packages_ms": {
+                package: own / 1000
+                for package, own in sorted(packages.items(), key=lambda item: -item[1])[
+                    :top
+                ]
+            },
+            "modules_ms": {
+                module: cumulative / 1000
+                for module, _own, cumulative, _depth in sorted(
+                    modules, key=lambda module: -module[2]
+                )[:top]
+            },
+        }
+
+    def write_report(self, result: dict):
+        process = result["process_ms"]
+        self.stdout.write(
+            f"Partida ({result['runs']} processo(s)): mediana {process['median']:.1f} ms, "
+            f"mín {process['min']:.1f} ms, máx {process['max']:.1f} ms"
+        )
+        self.stdout.write(
+            f"settings: {result['settings_ms']['median']:.1f} ms | "
+            f"django.setup(): {result['setup_ms']['median']:.1f} ms | "
+            f"módulos carregados: {result['modules_loaded']}"
+        )
+        sections = (
+            ("ready() por app", "ready_ms"),
+            ("Import por pacote (tempo próprio)", "packages_ms"),
+            ("Módulos mais lentos (acumulado)", "modules_ms"),
+        )
+        for title, key in sections:
+            self.stdout.write(f"\n{title}:")
+            for name, ms in result[key].items():
+                self.stdout.write(f"  {ms:8.1f} ms  {name}")
@@ -0,0 +1,122 @@
+import cProfile
+import logging
+import random
+import time
+
+from django.conf import settings
+
+from monitoring.nplusone import NPlusOneDetector, report_store
+from monitoring.profiling import (
+    PROFILE_HEADER,
+    QueryTimer,
+    get_profile_store,
+    is_admin_request,
+    top_functions,
+)
+from monitoring.queries import QueryObserver, snapshot_publisher
+
+logger = logging.getLogger(__name__)
+
+
+class NPlusOneDetectorMiddleware:
+    """
+    Detector de N+1 para ambientes de desenvolvimento e homologação. Não depende
+    do debug_toolbar: os relatórios vão para o log e para o endpoint
+    monitoring:nplusone-reports.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.threshold = settings.NPLUSONE_THRESHOLD
+
+    def __call__(self, request):
+        detector = NPlusOneDetector(self.threshold)
+        with detector.watch():
+            response = self.get_response(request)
+
+        report = detector.build_report(request)
+        if report:
+            report_store.add(report)
+            for query in report["repeated_queries"]:
+                logger.warning(
+                    "Possível N+1 em %s %s: consulta repetida %s vezes\n%s\n%s",
+                    report["method"],
+                    report["path"],
+                    query["count"],
+                    query["sql"],
+                    "\n".join(query["stack"]),
+                )
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Grava um perfil cProfile (view, serializers e SQL) das requisições de
+    admins com o cabeçalho X-Profile: 1 e de uma amostra de PROFILING_SAMPLE_RATE
+    das demais. Requisições não escolhidas passam direto, sem profiler nem
+    wrapper de SQL.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def should_profile(self, request) -> bool:
+        if request.headers.get(PROFILE_HEADER) == "1":
+            return is_admin_request(request)
+        sample_rate = settings.PROFILING_SAMPLE_RATE
+        return sample_rate > 0 and random.random() < sample_rate
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        timer = QueryTimer()
+        start = time.perf_counter()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Outro profiler já ativo na thread
+            return self.get_response(request)
+        try:
+            with timer.watch():
+                response = self.get_response(request)
+        finally:
+            profiler.disable()
+        duration = time.perf_counter() - start
+
+        try:
+            profile_id = get_profile_store().save(
+                profiler,
+                {
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "duration_ms": round(duration * 1000, 3),
+                    "created_at": time.time(),
+                    "queries": timer.summary(),
+                    "top_functions": top_functions(profiler),
+                },
+            )
+        except OSError:
+            logger.exception("Não foi possível gravar o perfil de %s", request.path)
+        else:
+            response["X-Profile-Id"] = profile_id
+        return response
+
+
+class QueryObserverMiddleware:
+    """
+    Agrega as consultas SQL de cada request por view e fingerprint
+    (monitoring.queries) e publica periodicamente o snapshot do processo para
+    o relatório monitoring:query-report.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryObserver(request).watch():
+            response = self.get_response(request)
+        snapshot_publisher.maybe_publish()
+        return response
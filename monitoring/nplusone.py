@@ -0,0 +1,86 @@
+import threading
+import traceback
+from collections import Counter, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from base.queries import normalize_sql
+
+IGNORED_PREFIXES = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+class NPlusOneReportStore:
+    """Guarda em memória os últimos relatórios de N+1 do processo."""
+
+    def __init__(self, maxlen: int = 100):
+        self._reports = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def add(self, report: dict):
+        with self._lock:
+            self._reports.appendleft(report)
+
+    def all(self) -> list:
+        with self._lock:
+            return list(self._reports)
+
+    def clear(self):
+        with self._lock:
+            self._reports.clear()
+
+
+report_store = NPlusOneReportStore()
+
+
+class NPlusOneDetector:
+    """
+    Wrapper de execução que identifica o formato de cada consulta SQL do
+    request e registra a pilha Python no momento em que um mesmo formato
+    ultrapassa o limite de repetições.
+    """
+
+    def __init__(self, threshold: int):
+        self.threshold = threshold
+        self.counter = Counter()
+        self.stacks = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        shape = normalize_sql(sql)
+        if not shape.startswith(IGNORED_PREFIXES):
+            self.counter[shape] += 1
+            if self.counter[shape] == self.threshold + 1:
+                self.stacks[shape] = self.capture_stack()
+        return execute(sql, params, many, context)
+
+    @staticmethod
+    def capture_stack() -> list:
+        base_dir = str(settings.BASE_DIR)
+        return [
+            f"{frame.filename}:{frame.lineno} in {frame.name}"
+            for frame in traceback.extract_stack()[:-2]
+            if frame.filename.startswith(base_dir)
+            and "site-packages" not in frame.filename
+        ]
+
+    def watch(self) -> ExitStack:
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self))
+        return stack
+
+    def build_report(self, request) -> dict:
+        repeated = [
+            {"sql": shape, "count": count, "stack": self.stacks.get(shape, [])}
+            for shape, count in self.counter.most_common()
+            if count > self.threshold
+        ]
+        if not repeated:
+            return None
+        return {
+            "method": request.method,
+            "path": request.get_full_path(),
+            "total_queries": sum(self.counter.values()),
+            "repeated_queries": repeated,
+        }
@@ -0,0 +1,142 @@
+import cProfile
+import io
+import json
+import logging
+import pstats
+import re
+import time
+import uuid
+from contextlib import ExitStack
+from pathlib import Path
+
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from django.conf import settings
+from django.db import connections
+
+from base.queries import normalize_sql
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID = re.compile(r"^\d{19}-[0-9a-f]{8}$")
+
+
+class ProfileStore:
+    """
+    Anel de perfis em disco: cada perfil é um .prof (pstats) com um .json de
+    metadados ao lado. Ao passar de max_profiles os mais antigos são apagados.
+    Os ids começam pelo horário em nanossegundos, então a ordem dos nomes é a
+    ordem de gravação, mesmo com vários processos no mesmo diretório.
+    """
+
+    def __init__(self, directory, max_profiles: int):
+        self.directory = Path(directory)
+        self.max_profiles = max_profiles
+
+    def path(self, profile_id: str, suffix: str) -> Path:
+        if not PROFILE_ID.match(profile_id):
+            raise FileNotFoundError(profile_id)
+        return self.directory / f"{profile_id}{suffix}"
+
+    def save(self, profiler: cProfile.Profile, metadata: dict) -> str:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profile_id = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+        profiler.dump_stats(self.path(profile_id, ".prof"))
+        # O .json é gravado por último: só perfis completos aparecem na lista
+        self.path(profile_id, ".json").write_text(
+            json.dumps({"id": profile_id, **metadata})
+        )
+        self.prune()
+        return profile_id
+
+    def ids(self) -> list:
+        if not self.directory.is_dir():
+            return []
+        return sorted(
+            (path.stem for path in self.directory.glob("*.json")), reverse=True
+        )
+
+    def prune(self):
+        for profile_id in self.ids()[self.max_profiles :]:
+            self.delete(profile_id)
+
+    def delete(self, profile_id: str):
+        for suffix in (".json", ".prof"):
+            self.path(profile_id, suffix).unlink(missing_ok=True)
+
+    def all(self) -> list:
+        profiles = []
+        for profile_id in self.ids():
+            try:
+                profiles.append(json.loads(self.path(profile_id, ".json").read_text()))
+            except FileNotFoundError:
+                # Apagado por outro processo durante a listagem
+                continue
+        return profiles
+
+    def open(self, profile_id: str):
+        return self.path(profile_id, ".prof").open("rb")
+
+    def clear(self):
+        for profile_id in self.ids():
+            self.delete(profile_id)
+
+
+def get_profile_store() -> ProfileStore:
+    return ProfileStore(settings.PROFILING_DIR, settings.PROFILING_MAX_PROFILES)
+
+
+def is_admin_request(request) -> bool:
+    """
+    Verifica se quem pediu o perfil é admin. O token JWT só é validado aqui
+    quando o cabeçalho foi enviado, já que a autenticação do DRF acontece
+    depois do middleware.
+    """
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        try:
+            result = JWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return False
+        user = result[0] if result else None
+    return user is not None and user.is_active and user.is_staff
+
+
+class QueryTimer:
+    """Wrapper de execução que mede o tempo de cada consulta SQL."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((normalize_sql(sql), time.perf_counter() - start))
+
+    def watch(self) -> ExitStack:
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self))
+        return stack
+
+    def summary(self, limit: int = 20) -> dict:
+        slowest = sorted(self.queries, key=lambda query: query[1], reverse=True)
+        return {
+            "count": len(self.queries),
+            "total_ms": round(sum(duration for _, duration in self.queries) * 1000, 3),
+            # SQL normalizado: os parâmetros não vão para o disco
+            "slowest": [
+                {"sql": sql, "ms": round(duration * 1000, 3)}
+                for sql, duration in slowest[:limit]
+            ],
+        }
+
+
+def top_functions(profiler: cProfile.Profile, limit: int = 20) -> str:
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(limit)
+    return output.getvalue()
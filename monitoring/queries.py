@@ -0,0 +1,295 @@
+import bisect
+import logging
+import os
+import socket
+import threading
+import time
+from contextlib import ExitStack
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.redis import RedisCache
+from django.db import connections
+
+from base.queries import fingerprint_sql, normalize_sql
+
+logger = logging.getLogger(__name__)
+
+# Limites (em ms) dos buckets de duração. Histogramas com limites fixos podem
+# ser somados entre processos, o que amostras de p95 não permitem.
+BUCKETS_MS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+SNAPSHOT_KEY = "query-stats:{}"
+PROCESSES_KEY = "query-stats:processes"
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql: str) -> tuple:
+    """(fingerprint, sql normalizado). O texto do SQL se repete entre chamadas."""
+    return fingerprint_sql(sql), normalize_sql(sql)
+
+
+def redact_params(params, many: bool = False):
+    """Só o tipo de cada parâmetro vai para o log."""
+    if params is None:
+        return None
+    if many:
+        return f"<{len(params)} linhas>" if hasattr(params, "__len__") else "<lote>"
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    return [type(value).__name__ for value in params]
+
+
+def percentile(buckets: list, count: int, max_ms: float, q: float = 0.95) -> float:
+    """Limite superior do bucket que contém o percentil `q`."""
+    target = q * count
+    accumulated = 0
+    for bound, total in zip(BUCKETS_MS, buckets):
+        accumulated += total
+        if accumulated >= target:
+            return min(bound, max_ms)
+    return max_ms
+
+
+class QueryStats:
+    """
+    Agregados por (view, fingerprint) do processo: quantidade, tempo total,
+    tempo máximo e histograma de durações. Guarda no máximo max_entries
+    combinações; as consultas de combinações novas além disso só são contadas
+    em `dropped`.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._entries = {}
+            self.dropped = 0
+
+    def record(self, view: str, sql: str, duration_ms: float):
+        key, normalized = fingerprint(sql)
+        with self._lock:
+            entry = self._entries.get((view, key))
+            if entry is None:
+                if len(self._entries) >= self.max_entries:
+                    self.dropped += 1
+                    return
+                entry = self._entries[view, key] = {
+                    "view": view,
+                    "fingerprint": key,
+                    "sql": normalized,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "buckets": [0] * (len(BUCKETS_MS) + 1),
+                }
+            entry["count"] += 1
+            entry["total_ms"] += duration_ms
+            entry["max_ms"] = max(entry["max_ms"], duration_ms)
+            entry["buckets"][bisect.bisect_left(BUCKETS_MS, duration_ms)] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "generated_at": time.time(),
+                "dropped": self.dropped,
+                "entries": [
+                    {**entry, "buckets": list(entry["buckets"])}
+                    for entry in self._entries.values()
+                ],
+            }
+
+
+query_stats = QueryStats(settings.QUERY_STATS_MAX_ENTRIES)
+
+
+class QueryObserver:
+    """
+    Wrapper de execução que mede cada consulta do request, agrega em
+    query_stats e loga as que passam de SLOW_QUERY_THRESHOLD_MS com os
+    parâmetros reduzidos aos seus tipos.
+    """
+
+    def __init__(self, request, stats: QueryStats = query_stats):
+        self.request = request
+        self.stats = stats
+        self.threshold_ms = settings.SLOW_QUERY_THRESHOLD_MS
+
+    @property
+    def view(self) -> str:
+        match = getattr(self.request, "resolver_match", None)
+        return match.view_name if match is not None else "<sem view>"
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            view = self.view
+            self.stats.record(view, sql, duration_ms)
+            if duration_ms >= self.threshold_ms:
+                logger.warning(
+                    "Consulta lenta (%.1f ms) em %s: %s params=%s",
+                    duration_ms,
+                    view,
+                    sql,
+                    redact_params(params, many),
+                )
+
+    def watch(self) -> ExitStack:
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self))
+        return stack
+
+
+class ProcessIndex:
+    """
+    Índice dos processos que publicaram snapshot, com o horário da última
+    publicação. Com o RedisCache é um sorted set: cada processo só altera o
+    próprio membro, sem ler e regravar o índice. Nos demais backends o índice
+    é atualizado com get/set sob um lock local, o que só é atômico dentro do
+    processo e serve para desenvolvimento e testes.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, key: str = PROCESSES_KEY):
+        self.key = key
+
+    def _redis(self, write: bool = False):
+        key = cache.make_and_validate_key(self.key)
+        return key, cache._cache.get_client(key, write=write)
+
+    def touch(self, process: str, timeout: int):
+        """Registra o processo e remove os que não publicam há `timeout` s."""
+        now = time.time()
+        if isinstance(cache, RedisCache):
+            key, client = self._redis(write=True)
+            pipeline = client.pipeline()
+            pipeline.zadd(key, {process: now})
+            pipeline.zremrangebyscore(key, "-inf", now - timeout)
+            pipeline.expire(key, timeout)
+            pipeline.execute()
+            return
+        with self._lock:
+            processes = cache.get(self.key) or {}
+            processes[process] = now
+            cache.set(
+                self.key,
+                {
+                    name: seen
+                    for name, seen in processes.items()
+                    if seen >= now - timeout
+                },
+                timeout,
+            )
+
+    def active(self, timeout: int) -> list:
+        cutoff = time.time() - timeout
+        if isinstance(cache, RedisCache):
+            key, client = self._redis()
+            return [
+                process.decode()
+                for process in client.zrangebyscore(key, cutoff, "+inf")
+            ]
+        processes = cache.get(self.key) or {}
+        return [process for process, seen in processes.items() if seen >= cutoff]
+
+
+process_index = ProcessIndex()
+
+
+def snapshot_timeout() -> int:
+    # Snapshots de processos que pararam expiram sozinhos
+    return settings.QUERY_STATS_SNAPSHOT_SECONDS * 3
+
+
+class SnapshotPublisher:
+    """
+    Publica no cache compartilhado o snapshot do processo a cada
+    QUERY_STATS_SNAPSHOT_SECONDS, para que o relatório junte todos os workers.
+    Cada processo grava só a própria chave e se registra no process_index.
+    """
+
+    def __init__(self, stats: QueryStats = query_stats):
+        self.stats = stats
+        self.process = f"{socket.gethostname()}:{os.getpid()}"
+        self.published_at = 0.0
+        self._lock = threading.Lock()
+
+    def maybe_publish(self):
+        interval = settings.QUERY_STATS_SNAPSHOT_SECONDS
+        now = time.monotonic()
+        if now - self.published_at < interval:
+            return
+        with self._lock:
+            if now - self.published_at < interval:
+                return
+            self.published_at = now
+        self.publish()
+
+    def publish(self):
+        timeout = snapshot_timeout()
+        cache.set(SNAPSHOT_KEY.format(self.process), self.stats.snapshot(), timeout)
+        process_index.touch(self.process, timeout)
+
+
+snapshot_publisher = SnapshotPublisher()
+
+
+def merge_snapshots(snapshots: list) -> dict:
+    merged = {}
+    dropped = 0
+    for snapshot in snapshots:
+        dropped += snapshot["dropped"]
+        for entry in snapshot["entries"]:
+            key = entry["view"], entry["fingerprint"]
+            if key not in merged:
+                merged[key] = {**entry, "buckets": list(entry["buckets"])}
+                continue
+            total = merged[key]
+            total["count"] += entry["count"]
+            total["total_ms"] += entry["total_ms"]
+            total["max_ms"] = max(total["max_ms"], entry["max_ms"])
+            total["buckets"] = [
+                a + b for a, b in zip(total["buckets"], entry["buckets"])
+            ]
+    return {"dropped": dropped, "entries": list(merged.values())}
+
+
+def query_report(view: str = None, limit: int = 50) -> dict:
+    """
+    Relatório dos snapshots publicados por todos os processos, das combinações
+    view × consulta que mais consumiram tempo de banco.
+    """
+    processes = process_index.active(snapshot_timeout())
+    snapshots = cache.get_many([SNAPSHOT_KEY.format(process) for process in processes])
+    merged = merge_snapshots(list(snapshots.values()))
+    entries = [
+        entry for entry in merged["entries"] if view is None or entry["view"] == view
+    ]
+    entries.sort(key=lambda entry: entry["total_ms"], reverse=True)
+    return {
+        "processes": len(snapshots),
+        "dropped": merged["dropped"],
+        "queries": [
+            {
+                "view": entry["view"],
+                "fingerprint": entry["fingerprint"],
+                "sql": entry["sql"],
+                "count": entry["count"],
+                "total_ms": round(entry["total_ms"], 3),
+                "mean_ms": round(entry["total_ms"] / entry["count"], 3),
+                "p95_ms": round(
+                    percentile(entry["buckets"], entry["count"], entry["max_ms"]), 3
+                ),
+                "max_ms": round(entry["max_ms"], 3),
+            }
+            for entry in entries[:limit]
+        ],
+    }
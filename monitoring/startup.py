@@ -0,0 +1,107 @@
+"""
+Mede o custo de inicialização do Django em um processo novo, como acontece em
+cada comando do manage.py e em cada worker.
+
+Executado como script pelo comando profile_startup:
+    python -X importtime -m monitoring.startup [comando]
+Com um comando, o settings é carregado como se fosse `manage.py <comando>`.
+Imprime no stdout um JSON com os tempos de settings, carga dos apps e ready()
+de cada app. O -X importtime escreve o tempo de cada import no stderr.
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+def parse_importtime(stderr: str) -> list:
+    """Lista de (módulo, próprio_us, acumulado_us, profundidade)."""
+    modules = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            own, cumulative, indent, module = match.groups()
+            modules.append((module, int(own), int(cumulative), (len(indent) - 1) // 2))
+    return modules
+
+
+def import_time_by_package(modules: list) -> dict:
+    totals = defaultdict(int)
+    for module, own, _cumulative, _depth in modules:
+        totals[module.split(".")[0]] += own
+    return dict(totals)
+
+
+def run_profile(settings_module: str, cwd: str, command: str = None) -> dict:
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings_module}
+    args = [sys.executable, "-X", "importtime", "-m", "monitoring.startup"]
+    if command:
+        args.append(command)
+    inicio = time.perf_counter()
+    process = subprocess.run(
+        args,
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total_ms = (time.perf_counter() - inicio) * 1000
+    profile = json.loads(process.stdout)
+    profile["process_ms"] = total_ms
+    profile["modules"] = parse_importtime(process.stderr)
+    return profile
+
+
+def main():
+    if len(sys.argv) > 1:
+        sys.argv = ["manage.py", *sys.argv[1:]]
+    inicio = time.perf_counter()
+    from django.apps.config import AppConfig
+    from django.conf import settings
+
+    ready = {}
+    create = AppConfig.create.__func__
+
+    def timed_create(cls, entry):
+        app_config = create(cls, entry)
+        original_ready = app_config.ready
+
+        def timed_ready():
+            inicio_ready = time.perf_counter()
+            original_ready()
+            ready[app_config.label] = (time.perf_counter() - inicio_ready) * 1000
+
+        app_config.ready = timed_ready
+        return app_config
+
+    AppConfig.create = classmethod(timed_create)
+
+    settings.INSTALLED_APPS  # força a leitura do settings
+    settings_ms = (time.perf_counter() - inicio) * 1000
+
+    import django
+
+    inicio_setup = time.perf_counter()
+    django.setup()
+    setup_ms = (time.perf_counter() - inicio_setup) * 1000
+
+    json.dump(
+        {
+            "settings_ms": settings_ms,
+            "setup_ms": setup_ms,
+            "ready_ms": ready,
+            "modules_loaded": len(sys.modules),
+        },
+        sys.stdout,
+    )
+
+
+if __name__ == "__main__":
+    main()
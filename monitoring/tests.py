@@ -0,0 +1,331 @@
+import json
+import pstats
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from core.api.views import ProdutorRuralViewSet
+from core.models import ProdutorRural
+from core.tests.base import CoreTestMixin, gerar_cpf
+from monitoring.nplusone import report_store
+from monitoring.profiling import ProfileStore, get_profile_store
+from monitoring.queries import (
+    QueryStats,
+    SnapshotPublisher,
+    merge_snapshots,
+    percentile,
+    query_report,
+    query_stats,
+    redact_params,
+)
+from monitoring.startup import parse_importtime
+from users.models import User
+
+
+def com_middleware(path: str) -> list:
+    """MIDDLEWARE com `path` uma única vez, mesmo se já ligado pelo .env."""
+    outros = [middleware for middleware in settings.MIDDLEWARE if middleware != path]
+    return [*outros, path]
+
+
+@override_settings(
+    NPLUSONE_DETECTOR_ENABLED=True,
+    NPLUSONE_THRESHOLD=2,
+    MIDDLEWARE=com_middleware("monitoring.middleware.NPlusOneDetectorMiddleware"),
+)
+class NPlusOneDetectorMiddlewareTestCase(CoreTestMixin, APITestCase):
+    def setUp(self):
+        report_store.clear()
+        self.user = User.objects.create_user(
+            email="admin@email.com", password="password", is_admin=True
+        )
+        self.client.force_authenticate(user=self.user)
+        for numero in range(123456001, 123456005):
+            self.create_produtor_rural(nome=f"Produtor {numero}", cpf=gerar_cpf(numero))
+        self.url = reverse("core:produtor-rural-list")
+
+    def test_list_com_prefetch_nao_gera_relatorio(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(report_store.all(), [])
+
+    @patch.object(
+        ProdutorRuralViewSet,
+        "get_queryset",
+        lambda self: ProdutorRural.objects.select_related("fazenda"),
+    )
+    def test_list_sem_prefetch_gera_relatorio_com_pilha(self):
+        with self.assertLogs("monitoring.middleware", level="WARNING"):
+            self.client.get(self.url)
+
+        reports = report_store.all()
+        self.assertEqual(len(reports), 1)
+        repeated = reports[0]["repeated_queries"][0]
+        self.assertEqual(repeated["count"], 4)
+        self.assertIn("core_fazenda_culturas_plantadas", repeated["sql"])
+        self.assertTrue(repeated["stack"])
+
+        response = self.client.get(reverse("monitoring:nplusone-reports"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]["path"], self.url)
+
+    def test_endpoint_restrito_a_administradores(self):
+        self.client.force_authenticate(
+            user=User.objects.create_user(email="user@email.com", password="x")
+        )
+        response = self.client.get(reverse("monitoring:nplusone-reports"))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(NPLUSONE_DETECTOR_ENABLED=False)
+    def test_endpoint_indisponivel_com_detector_desligado(self):
+        response = self.client.get(reverse("monitoring:nplusone-reports"))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ProfilingMiddlewareTestCase(CoreTestMixin, APITestCase):
+    def setUp(self):
+        self.profiles_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.profiles_dir.cleanup)
+        settings_override = override_settings(
+            PROFILING_DIR=self.profiles_dir.name, PROFILING_MAX_PROFILES=2
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.admin = User.objects.create_user(
+            email="admin@email.com", password="x", is_admin=True
+        )
+        self.create_produtor_rural()
+        self.url = reverse("core:produtor-rural-list")
+
+    def get(self, user, **headers):
+        token = AccessToken.for_user(user)
+        return self.client.get(
+            self.url, HTTP_AUTHORIZATION=f"Bearer {token}", **headers
+        )
+
+    def test_sem_cabecalho_nao_grava_perfil(self):
+        response = self.get(self.admin)
+
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(get_profile_store().all(), [])
+
+    def test_cabecalho_de_admin_grava_perfil(self):
+        response = self.get(self.admin, HTTP_X_PROFILE="1")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        (perfil,) = get_profile_store().all()
+        self.assertEqual(perfil["id"], response["X-Profile-Id"])
+        self.assertEqual(perfil["path"], self.url)
+        self.assertGreater(perfil["queries"]["count"], 0)
+        self.assertNotIn("12345678909", json.dumps(perfil["queries"]))
+
+        self.client.force_authenticate(user=self.admin)
+        listagem = self.client.get(reverse("monitoring:profiles"))
+        self.assertEqual(listagem.data[0]["id"], perfil["id"])
+        download = self.client.get(
+            reverse("monitoring:profile-download", args=[perfil["id"]])
+        )
+        self.assertEqual(download.status_code, status.HTTP_200_OK)
+        with tempfile.NamedTemporaryFile(suffix=".prof") as arquivo:
+            arquivo.write(b"".join(download.streaming_content))
+            arquivo.flush()
+            self.assertTrue(pstats.Stats(arquivo.name).total_calls)
+
+    def test_cabecalho_de_usuario_comum_e_ignorado(self):
+        user = User.objects.create_user(email="user@email.com", password="x")
+
+        response = self.get(user, HTTP_X_PROFILE="1")
+
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(get_profile_store().all(), [])
+
+    @override_settings(PROFILING_SAMPLE_RATE=1.0)
+    def test_amostragem_e_anel_limitado(self):
+        user = User.objects.create_user(email="user@email.com", password="x")
+        ids = [self.get(user)["X-Profile-Id"] for _ in range(3)]
+
+        self.assertEqual(
+            [perfil["id"] for perfil in get_profile_store().all()], ids[:0:-1]
+        )
+
+    def test_ids_invalidos(self):
+        store = ProfileStore(self.profiles_dir.name, 2)
+        with self.assertRaises(FileNotFoundError):
+            store.open("../../settings")
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(
+            reverse("monitoring:profile-download", args=["..%2Fsettings"])
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class QueryStatsTestCase(SimpleTestCase):
+    def test_agrega_por_view_e_fingerprint(self):
+        stats = QueryStats(max_entries=2)
+        stats.record("a", "SELECT * FROM t WHERE id = %s", 1.0)
+        stats.record("a", "SELECT  * FROM t WHERE id = %s", 30.0)
+        stats.record("b", "SELECT * FROM t WHERE id = %s", 1.0)
+        stats.record("c", "SELECT 1", 1.0)
+
+        snapshot = stats.snapshot()
+
+        self.assertEqual(snapshot["dropped"], 1)
+        entrada = snapshot["entries"][0]
+        self.assertEqual(
+            (entrada["view"], entrada["count"], entrada["total_ms"]), ("a", 2, 31.0)
+        )
+        self.assertEqual(entrada["sql"], "SELECT * FROM t WHERE id = ?")
+        self.assertEqual(percentile(entrada["buckets"], 2, entrada["max_ms"]), 30.0)
+
+    def test_merge_e_percentil(self):
+        stats = QueryStats(max_entries=10)
+        for duracao in [1.0] * 95 + [400.0] * 5:
+            stats.record("a", "SELECT 1", duracao)
+        merged = merge_snapshots([stats.snapshot(), stats.snapshot()])
+
+        (entrada,) = merged["entries"]
+        self.assertEqual(entrada["count"], 200)
+        self.assertEqual(percentile(entrada["buckets"], 200, entrada["max_ms"]), 1)
+        self.assertEqual(
+            percentile(entrada["buckets"], 200, entrada["max_ms"], q=0.99), 400.0
+        )
+
+    def test_redact_params(self):
+        self.assertEqual(
+            redact_params(["12345678909", 10, None]), ["str", "int", "NoneType"]
+        )
+        self.assertEqual(redact_params({"cpf": "123"}), {"cpf": "str"})
+        self.assertEqual(redact_params([(1,), (2,)], many=True), "<2 linhas>")
+
+
+@override_settings(QUERY_STATS_SNAPSHOT_SECONDS=60)
+class SnapshotPublisherTestCase(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def publisher(self, process: str) -> SnapshotPublisher:
+        stats = QueryStats(max_entries=10)
+        stats.record(process, "SELECT 1", 1.0)
+        publisher = SnapshotPublisher(stats)
+        publisher.process = process
+        return publisher
+
+    def test_um_snapshot_por_processo(self):
+        self.publisher("a:1").publish()
+        self.publisher("b:2").publish()
+        self.publisher("a:1").publish()
+
+        report = query_report()
+
+        self.assertEqual(report["processes"], 2)
+        self.assertEqual({q["view"] for q in report["queries"]}, {"a:1", "b:2"})
+
+    def test_processos_parados_saem_do_indice(self):
+        with patch("monitoring.queries.time.time", return_value=1000.0):
+            self.publisher("a:1").publish()
+        with patch("monitoring.queries.time.time", return_value=1181.0):
+            self.publisher("b:2").publish()
+            report = query_report()
+
+        self.assertEqual(report["processes"], 1)
+        self.assertEqual([q["view"] for q in report["queries"]], ["b:2"])
+
+
+@override_settings(
+    QUERY_OBSERVER_ENABLED=True,
+    MIDDLEWARE=com_middleware("monitoring.middleware.QueryObserverMiddleware"),
+)
+class QueryObserverMiddlewareTestCase(CoreTestMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        query_stats.reset()
+        self.produtor = self.create_produtor_rural()
+        self.user = User.objects.create_user(
+            email="admin@email.com", password="x", is_admin=True
+        )
+        self.client.force_authenticate(user=self.user)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_relatorio_e_log_de_consultas_lentas(self):
+        with self.assertLogs("monitoring.queries", level="WARNING") as logs:
+            self.client.get(reverse("core:produtor-rural-list"))
+            self.client.get(
+                reverse("core:produtor-rural-detail", kwargs={"pk": self.produtor.pk})
+            )
+        self.assertNotIn("12345678909", "\n".join(logs.output))
+        self.assertIn("core:produtor-rural-list", logs.output[0])
+
+        response = self.client.get(
+            reverse("monitoring:query-report"),
+            {"view": "core:produtor-rural-list"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["processes"], 1)
+        consultas = response.data["queries"]
+        self.assertTrue(consultas)
+        self.assertEqual(
+            {consulta["view"] for consulta in consultas}, {"core:produtor-rural-list"}
+        )
+        self.assertIn("core_produtorrural", " ".join(c["sql"] for c in consultas))
+        self.assertTrue(
+            all(c["p95_ms"] <= c["max_ms"] and c["count"] >= 1 for c in consultas)
+        )
+
+    def test_relatorio_restrito_a_administradores(self):
+        self.client.force_authenticate(
+            user=User.objects.create_user(email="user@email.com", password="x")
+        )
+
+        response = self.client.get(reverse("monitoring:query-report"))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ProfileStartupCommandTestCase(SimpleTestCase):
+    def test_parse_importtime(self):
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |     django.utils\n"
+            "import time:       300 |        420 |   django\n"
+        )
+        self.assertEqual(
+            parse_importtime(stderr),
+            [("django.utils", 120, 120, 2), ("django", 300, 420, 1)],
+        )
+
+    def test_profile_startup_comando_nao_carrega_admin(self):
+        stdout = StringIO()
+        call_command(
+            "profile_startup",
+            runs=1,
+            top=5,
+            command="run_jobs_worker",
+            json=True,
+            stdout=stdout,
+        )
+
+        result = json.loads(stdout.getvalue())
+        self.assertEqual(result["runs"], 1)
+        self.assertIn("jobs", result["ready_ms"])
+        self.assertEqual(len(result["modules_ms"]), 5)
+        # Sem o autodiscover do admin o stack do DRF não é importado no setup
+        self.assertNotIn("rest_framework.request", result["modules_ms"])
+
+    def test_profile_startup_acima_do_limite(self):
+        with self.assertRaisesMessage(CommandError, "limite"):
+            call_command("profile_startup", runs=1, budget_ms=1, stdout=StringIO())
@@ -0,0 +1,23 @@
+from django.urls import path
+
+from monitoring.api.views import (
+    NPlusOneReportApiView,
+    ProfileDownloadApiView,
+    ProfileListApiView,
+    QueryReportApiView,
+    ResultCacheStatsApiView,
+)
+
+app_name = "monitoring"
+
+urlpatterns = [
+    path("nplusone/", NPlusOneReportApiView.as_view(), name="nplusone-reports"),
+    path("result-cache/", ResultCacheStatsApiView.as_view(), name="result-cache-stats"),
+    path("queries/", QueryReportApiView.as_view(), name="query-report"),
+    path("profiles/", ProfileListApiView.as_view(), name="profiles"),
+    path(
+        "profiles/<str:profile_id>/",
+        ProfileDownloadApiView.as_view(),
+        name="profile-download",
+    ),
+]
@@ -0,0 +1,12 @@
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from django.utils import timezone
+
+from jobs.registry import task
+
+
+@task("users.purge_expired_tokens")
+def purge_expired_tokens() -> dict:
+    # Tokens na blacklist são removidos em cascata
+    total, _ = OutstandingToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    return {"removidos": total}
@@ -1,12 +1,18 @@
+from datetime import timedelta
+
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.test import APITestCase
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
 
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.test import TestCase
+from django.utils import timezone
+
+from users.tasks import purge_expired_tokens
 
 User = get_user_model()
 
@@ -87,3 +93,18 @@ class LogoutViewTests(BaseUserViewTestCase):
 
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(response.data["detail"], "Invalid token")
+
+
+class PurgeExpiredTokensTaskTestCase(TestCase):
+    def test_remove_apenas_tokens_expirados(self):
+        user = User.objects.create_user(email="token@exemplo.com", password="pass")
+        RefreshToken.for_user(user)
+        OutstandingToken.objects.create(
+            user=user,
+            jti="expirado",
+            token="token",
+            expires_at=timezone.now() - timedelta(days=1),
+        )
+
+        self.assertEqual(purge_expired_tokens(), {"removidos": 1})
+        self.assertEqual(OutstandingToken.objects.count(), 1)